@@ -0,0 +1,4 @@
+import time
+
+# Начало импорта приложения: от него считается время импорта и запуска воркера (см. app.main)
+IMPORT_STARTED = time.perf_counter()
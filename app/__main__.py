@@ -0,0 +1,55 @@
+"""
+Запуск приложения в production: несколько процессов-воркеров uvicorn
+
+    python -m app
+
+Каждый воркер импортирует приложение и создает его через `app.main.create_app` сам, а внешние
+ресурсы (пулы соединений, фоновые задачи, пул процессов) открываются в lifespan воркера после
+запуска, поэтому процессы не делят соединения. Мастер-процесс перезапускает упавших воркеров.
+"""
+
+import os
+
+import uvicorn
+
+from app.core.config import settings
+
+
+def available_cpus() -> int:
+    """
+    Количество CPU, на которых процессу разрешено выполняться.
+
+    `os.cpu_count()` возвращает все CPU машины, даже если процесс ограничен affinity
+    (например, `taskset` или `cpuset` контейнера). Квоту CPU контейнера (`--cpus`) не учитывает
+    ни один из способов, в этом случае количество воркеров нужно задать в `WEB_WORKERS`.
+
+    Returns:
+        int: Количество доступных CPU, не меньше 1.
+    """
+    if hasattr(os, "process_cpu_count"):
+        return os.process_cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    workers = settings.WEB_WORKERS or available_cpus()
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=settings.WEB_HOST,
+        port=settings.WEB_PORT,
+        workers=workers,
+        timeout_keep_alive=settings.WEB_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_SHUTDOWN_TIMEOUT,
+        # Запросы пишет в лог LogRequestsMiddleware, конфигурация логов uvicorn не применяется
+        access_log=False,
+        log_config=None,
+        # X-Forwarded-For и X-Forwarded-Proto от прокси перед приложением
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.database.profiler import query_profiler
+
+router = APIRouter(tags=["Debug"], prefix="/debug")
+
+
+@router.get('/queries', include_in_schema=False)
+async def recent_query_profiles(limit: int = Query(20, ge=1, le=1000)):
+    return query_profiler.recent(limit)
+
+
+@router.get('/queries/{profile_id}', include_in_schema=False)
+async def query_profile(profile_id: str):
+    profile = query_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
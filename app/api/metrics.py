@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
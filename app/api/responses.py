@@ -0,0 +1,29 @@
+"""
+Классы ответов для быстрого пути сериализации
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON ответ, сериализуемый orjson, для данных без схемы: словарей и строк из
+    `BaseDAO.find_all_mappings`.
+
+    Не задается классом ответа по умолчанию: для маршрутов с `response_model` FastAPI сам
+    валидирует и сериализует ответ за один проход pydantic-core, а явный класс ответа
+    этот путь отключает. Эндпоинт, вернувший экземпляр ответа, FastAPI не валидирует,
+    `response_model` маршрута в этом случае остается только для документации.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
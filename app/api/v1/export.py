@@ -0,0 +1,85 @@
+import csv
+import io
+from contextlib import aclosing
+from typing import AsyncIterator, Literal, Type
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.database.data_layer.base_dao import BaseDAO
+from app.schemas.adapters import get_adapter
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def create_export_router(
+    dao: Type[BaseDAO],
+    schema: Type[BaseModel],
+    prefix: str,
+    tags: list[str] | None = None,
+    chunk_size: int = 1000,
+) -> APIRouter:
+    """
+    Создает роутер с эндпоинтом `GET {prefix}/export` для потоковой выгрузки таблицы DAO.
+
+    Записи читаются из серверного курсора пачками по `chunk_size` и сразу отправляются клиенту,
+    поэтому память не зависит от размера таблицы. Следующая пачка читается только после того,
+    как предыдущая отправлена, а при отключении клиента запрос к базе прекращается.
+
+    Args:
+        dao (Type[BaseDAO]): DAO выгружаемой таблицы.
+        schema (Type[BaseModel]): Схема, в которую сериализуется каждая запись.
+        prefix (str): Префикс роутера.
+        tags (list[str] | None): Теги для документации.
+        chunk_size (int): Количество записей в одной пачке.
+
+    Returns:
+        APIRouter: Роутер с эндпоинтом выгрузки.
+    """
+    router = APIRouter(tags=tags, prefix=prefix)
+    adapter = get_adapter(schema)
+    name = dao.model.__tablename__
+
+    async def ndjson_chunks(request: Request) -> AsyncIterator[bytes]:
+        async with aclosing(dao.stream_chunks(chunk_size=chunk_size)) as chunks:
+            async for chunk in chunks:
+                if await request.is_disconnected():
+                    return
+                yield b"".join(
+                    adapter.dump_json(adapter.validate_python(row, from_attributes=True)) + b"\n"
+                    for row in chunk
+                )
+
+    async def csv_chunks(request: Request) -> AsyncIterator[bytes]:
+        fields = list(schema.model_fields)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+
+        async with aclosing(dao.stream_chunks(chunk_size=chunk_size)) as chunks:
+            async for chunk in chunks:
+                if await request.is_disconnected():
+                    return
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(
+                    adapter.dump_python(adapter.validate_python(row, from_attributes=True), mode="json")
+                    for row in chunk
+                )
+                yield buffer.getvalue().encode()
+
+    @router.get('/export')
+    async def export(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+        body = csv_chunks if format == "csv" else ndjson_chunks
+        return StreamingResponse(
+            body(request),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+        )
+
+    return router
@@ -1,21 +1,101 @@
-from uuid import uuid4
+import hashlib
+import os
+from typing import Literal
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from app.api.responses import OrjsonResponse
+from app.core.deadline import request_deadline
+from app.core.http_cache import http_cache, make_etag, not_modified
 from app.database.data_layer.test_dao import TestDAO
-from app.schemas.tests import TestDTO
+from app.dependencies.database import UnitOfWork
+from app.exceptions.database import InvalidCursorError, QueryFailedError
+from app.schemas.pagination import CursorPageDTO
+from app.schemas.tests import TestDTO, TestHashDTO
+from app.tasks.runner import task_runner
+from app.tasks.test_tasks import create_test_item, test_items_buffer
+from app.utils.cpu_pool import cpu_pool
 
 router = APIRouter(tags=["Test"], prefix="/test")
 
 
-@router.get('')
+@router.get('', response_class=OrjsonResponse)
 async def test_router():
     return {"response:": "test success"}
 
 
+@router.get('/items', response_model=list[TestDTO])
+@request_deadline(5.0)
+@http_cache(no_cache=True)
+async def test_get_items():
+    # Строки выбираются без ORM объектов только по полям схемы и сразу сериализуются orjson,
+    # без валидации ответа в FastAPI. ETag вычисляет ConditionalGetMiddleware по телу ответа
+    rows = await TestDAO.find_all_mappings(columns=list(TestDTO.model_fields))
+    return OrjsonResponse(rows or [])
 
 
-@router.post('', response_model=TestDTO)
+@router.get('/items/{test_id}', response_model=TestDTO)
+@http_cache(max_age=10, private=True)
+async def test_get_item(test_id: UUID, request: Request, response: Response):
+    # ETag по версии записи: если у клиента актуальная версия, запись не читается и не сериализуется
+    version = await TestDAO.get_version(test_id=test_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    etag = make_etag(test_id, version)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    # Запись могла быть удалена между чтением версии и чтением самой записи
+    item = await TestDAO.find_one_or_none(test_id=test_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = etag
+    return item
+
+
+@router.get('/keyset', response_model=CursorPageDTO[TestDTO])
+async def test_get_items_keyset(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    direction: Literal["next", "prev"] = "next",
+):
+    try:
+        page = await TestDAO.get_keyset_page(limit=limit, cursor=cursor, direction=direction)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise QueryFailedError("Cannot load keyset page")
+    return page
+
+
+@router.post('', response_model=TestDTO, dependencies=[UnitOfWork])
 async def test_add_item(info: str):
     result = await TestDAO.create(info=info)
-    return result
\ No newline at end of file
+    return result
+
+
+@router.post('/bulk', response_model=list[TestDTO], dependencies=[UnitOfWork])
+async def test_add_items_bulk(infos: list[str]):
+    result = await TestDAO.bulk_create(rows=[{"info": info} for info in infos], returning=True)
+    return result
+
+
+@router.post('/background', status_code=202)
+async def test_add_item_background(info: str):
+    job_id = await task_runner.submit(create_test_item, info=info)
+    return {"job_id": job_id}
+
+
+@router.post('/deferred', status_code=202)
+async def test_add_item_deferred(info: str):
+    await test_items_buffer.add(info=info)
+    return {"status": "accepted"}
+
+
+@router.post('/hash')
+async def test_hash(data: TestHashDTO):
+    # PBKDF2 занимает CPU на десятки миллисекунд: выполняется в пуле процессов, event loop не блокируется
+    salt = os.urandom(16)
+    password = data.password.get_secret_value().encode()
+    digest = await cpu_pool.run(hashlib.pbkdf2_hmac, "sha256", password, salt, 100_000)
+    return {"salt": salt.hex(), "hash": digest.hex()}
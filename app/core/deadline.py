@@ -0,0 +1,109 @@
+"""
+Дедлайн обработки запроса
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+from app.exceptions.deadline import DeadlineExceededError
+
+F = TypeVar("F", bound=Callable)
+
+# Момент по time.monotonic(), к которому запрос должен быть обработан
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+DEADLINE_ATTR = "__deadline__"
+
+
+def get_deadline() -> float | None:
+    """
+    Returns:
+        float | None: Дедлайн текущего запроса по `time.monotonic()` или None, если он не задан.
+    """
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """
+    Returns:
+        float | None: Оставшееся до дедлайна время в секундах (может быть отрицательным)
+            или None, если дедлайн не задан.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> float | None:
+    """
+    Проверяет, что дедлайн не истек.
+
+    Returns:
+        float | None: Оставшееся время в секундах или None, если дедлайн не задан.
+
+    Raises:
+        DeadlineExceededError: Дедлайн истек.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    return left
+
+
+@contextmanager
+def deadline_scope(timeout: float) -> Iterator[float]:
+    """
+    Задает дедлайн внутри блока. Вложенный блок может только сократить уже заданный дедлайн.
+
+    Args:
+        timeout (float): Время на выполнение блока в секундах.
+
+    Yields:
+        float: Действующий дедлайн по `time.monotonic()`.
+    """
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def clear_deadline() -> None:
+    """Снимает дедлайн в текущем контексте до конца `deadline_scope`: для работы после отправки ответа."""
+    _deadline.set(None)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """Снимает дедлайн внутри блока: для фоновой работы, запущенной из запроса и переживающей его."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_deadline(seconds: float) -> Callable[[F], F]:
+    """
+    Декоратор эндпоинта: время на обработку запроса по умолчанию для роута.
+
+    Заголовок запроса может только сократить это время (см. `DeadlineMiddleware`).
+
+    Args:
+        seconds (float): Время на обработку запроса в секундах.
+
+    Returns:
+        Callable: Декоратор, возвращающий эндпоинт без изменений.
+    """
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, DEADLINE_ATTR, seconds)
+        return endpoint
+
+    return decorator
@@ -0,0 +1,131 @@
+"""
+Условные GET запросы (ETag / If-None-Match) и Cache-Control роутов
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+F = TypeVar("F", bound=Callable)
+
+HTTP_CACHE_ATTR = "__http_cache__"
+
+# Заголовки, которые сохраняются в ответе 304 (RFC 9110, 15.4.5)
+NOT_MODIFIED_HEADERS = frozenset((b"cache-control", b"content-location", b"date", b"etag", b"expires", b"vary"))
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Политика кеширования ответов роута."""
+    # Значение заголовка Cache-Control или None, чтобы не задавать его
+    cache_control: str | None = None
+    # Вычислять ETag по телу ответа, если эндпоинт не задал его сам
+    etag: bool = True
+
+
+def http_cache(
+    max_age: int | None = None,
+    private: bool = False,
+    no_cache: bool = False,
+    no_store: bool = False,
+    etag: bool = True,
+) -> Callable[[F], F]:
+    """
+    Декоратор эндпоинта: Cache-Control и ETag для успешных ответов роута.
+
+    Применяется `ConditionalGetMiddleware`: если эндпоинт не задал ETag сам, он вычисляется
+    по телу ответа, и на совпадающий If-None-Match клиент получает 304 без тела. Чтобы не
+    выполнять запрос и сериализацию вовсе, эндпоинт может проверить ETag заранее через `not_modified`.
+
+    Args:
+        max_age (int | None): Время свежести ответа в секундах (max-age).
+        private (bool): Ответ только для кеша клиента, не для общих прокси.
+        no_cache (bool): Кеш должен перепроверять ответ перед каждым использованием.
+        no_store (bool): Ответ нельзя сохранять в кеш.
+        etag (bool): Вычислять ETag по телу ответа.
+
+    Returns:
+        Callable: Декоратор, возвращающий эндпоинт без изменений.
+    """
+    directives = ["private" if private else "public"]
+    if no_cache:
+        directives.append("no-cache")
+    if no_store:
+        directives.append("no-store")
+    if max_age is not None:
+        directives.append(f"max-age={max_age}")
+    policy = CachePolicy(cache_control=", ".join(directives), etag=etag)
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, HTTP_CACHE_ATTR, policy)
+        return endpoint
+
+    return decorator
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит слабый ETag из значений, однозначно определяющих представление,
+    например, первичного ключа и версии записи (`VersionedMixin`).
+
+    ETag слабый, потому что тело ответа может быть сжато по-разному (см. `CompressionMiddleware`).
+
+    Args:
+        *parts (Any): Значения, от которых зависит ответ.
+
+    Returns:
+        str: Значение заголовка ETag.
+    """
+    return body_etag("\x1f".join(map(str, parts)).encode())
+
+
+def body_etag(body: bytes) -> str:
+    """
+    Args:
+        body (bytes): Тело ответа.
+
+    Returns:
+        str: Слабый ETag по хешу тела ответа.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Сравнивает ETag с заголовком If-None-Match по правилам слабого сравнения.
+
+    Args:
+        if_none_match (str | None): Значение заголовка If-None-Match.
+        etag (str): ETag текущего представления.
+
+    Returns:
+        bool: True, если у клиента уже есть это представление.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    Проверяет If-None-Match до выполнения эндпоинта, чтобы не читать и не сериализовать данные,
+    которые у клиента уже есть.
+
+    Если представление изменилось, эндпоинт должен отдать тот же ETag в заголовке ответа.
+
+    Args:
+        request (Request): Запрос.
+        etag (str): ETag текущего представления, например, из `make_etag`.
+
+    Returns:
+        Response | None: Ответ 304, если у клиента актуальная версия, иначе None.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -1,31 +1,190 @@
 import logging
-from datetime import datetime
-
-from pythonjsonlogger import jsonlogger
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 
 from app.core.config import settings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
 logger = logging.getLogger()
 
+# Обработчик, который фактически пишет записи в stdout. Пока приложение запущено,
+# он вызывается из фонового потока QueueListener, а не из event loop
 logHandler = logging.StreamHandler()
 
+# Атрибуты LogRecord, которые не считаются пользовательскими полями из extra
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class CustomJsonFormatter(logging.Formatter):
+    """
+    JSON форматтер записей лога: message, timestamp, level, module, funcName и поля из extra.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = ""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "message": record.getMessage(),
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "module": record.module,
+            "funcName": record.funcName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS:
+                log_record[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exc_info"] = record.exc_text
+        if record.stack_info:
+            log_record["stack_info"] = self.formatStack(record.stack_info)
+        if orjson is not None:
+            return orjson.dumps(log_record, default=str).decode()
+        return json.dumps(log_record, default=str, ensure_ascii=False)
+
+    def _timestamp(self, created: float) -> str:
+        """Форматирует время в UTC, кешируя строку с точностью до секунды."""
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._second_text}.{int((created - second) * 1_000_000):06d}Z"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Обработчик, который только кладет запись в ограниченную очередь.
+
+    Форматирование и запись в stdout выполняет фоновый `QueueListener`, поэтому медленный
+    вывод не блокирует event loop. При переполнении очереди применяется политика:
+    "drop_new" - отбросить новую запись, "drop_old" - вытеснить самую старую,
+    "block" - ждать места в очереди (блокирует вызывающий поток).
+    Пока фоновый поток не запущен (скрипты, миграции, до старта приложения), записи
+    пишутся синхронно, чтобы не теряться.
+    """
+
+    DROP_POLICIES = ("drop_new", "drop_old", "block")
+
+    def __init__(self, log_queue: queue.Queue, target: logging.Handler, drop_policy: str = "drop_new"):
+        """
+        Args:
+            log_queue (queue.Queue): Ограниченная очередь записей.
+            target (logging.Handler): Обработчик, в который пишет фоновый поток.
+            drop_policy (str): Политика при переполнении очереди.
+        """
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unknown log drop policy {drop_policy}, available: {', '.join(self.DROP_POLICIES)}")
+        super().__init__(log_queue)
+        self.target = target
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.listener: QueueListener | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.listener is None:
+            self.target.handle(record)
+            return
+        super().emit(record)
 
-class CustomJsonFormatter(jsonlogger.JsonFormatter):
-    def add_fields(self, log_record, record, message_dict):
-        super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-        if not log_record.get("timestamp"):
-            now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            log_record["timestamp"] = now
-        if log_record.get("level"):
-            log_record["level"] = log_record["level"].upper()
-        else:
-            log_record["level"] = record.levelname
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Подготавливает запись к передаче в другой поток без форматирования JSON.
 
+        Аргументы подставляются в сообщение, а исключение превращается в текст сразу,
+        чтобы фоновый поток не обращался к объектам вызывающего кода. Запись не копируется:
+        корневой логгер - единственный получатель записей приложения.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-formatter = CustomJsonFormatter(
-    "%(message)s %(timestamp)s %(level)s  %(module)s %(funcName)s"
-)
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.drop_policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.drop_policy == "drop_new":
+                self.dropped += 1
+                return
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
+
+class LogQueueListener(QueueListener):
+    """QueueListener, который при остановке ждет места в заполненной очереди, а не падает."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def configure_logging() -> DroppingQueueHandler:
+    """
+    Подключает к корневому логгеру JSON вывод через ограниченную очередь с уровнем `settings.LOG_LEVEL`.
+
+    Вызывается в `app.main.create_app` и при запуске фонового потока записи, а не при импорте модуля,
+    поэтому импорт не меняет конфигурацию логов процесса. Повторный вызов ничего не делает.
+
+    Returns:
+        DroppingQueueHandler: Обработчик корневого логгера.
+    """
+    global queueHandler
+    if queueHandler is None:
+        queueHandler = DroppingQueueHandler(
+            queue.Queue(maxsize=settings.LOG_QUEUE_SIZE),
+            target=logHandler,
+            drop_policy=settings.LOG_DROP_POLICY,
+        )
+        logger.addHandler(queueHandler)
+        logger.setLevel(settings.LOG_LEVEL)
+    return queueHandler
+
+
+def start_log_listener() -> None:
+    """Запускает фоновый поток записи логов. Повторный вызов ничего не делает."""
+    handler = configure_logging()
+    if handler.listener is not None:
+        return
+    listener = LogQueueListener(handler.queue, logHandler, respect_handler_level=True)
+    listener.start()
+    handler.listener = listener
+
+
+def stop_log_listener() -> None:
+    """Дописывает накопленные записи и останавливает фоновый поток записи логов."""
+    if queueHandler is None or queueHandler.listener is None:
+        return
+    listener = queueHandler.listener
+    queueHandler.listener = None
+    listener.stop()
+    if queueHandler.dropped:
+        logger.warning("Log records dropped because the log queue was full", extra={"dropped": queueHandler.dropped})
+
+
+formatter = CustomJsonFormatter()
 logHandler.setFormatter(formatter)
-logger.addHandler(logHandler)
-logger.setLevel(settings.LOG_LEVEL)
+
+# Обработчик корневого логгера, создается в `configure_logging`
+queueHandler: DroppingQueueHandler | None = None
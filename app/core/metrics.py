@@ -0,0 +1,308 @@
+"""
+Метрики приложения в текстовом формате Prometheus
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Границы корзин гистограмм длительностей в секундах
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """
+    Базовый класс метрики с набором меток.
+
+    Значения обновляются без блокировок: все обновления выполняются в потоке event loop,
+    а каждое изменение - это одна операция над числом в списке или словаре. Дочерняя
+    метрика для набора значений меток создается один раз и кешируется, поэтому
+    горячий путь - это поиск в словаре и сложение.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание метрики для HELP.
+            labelnames (Iterable[str]): Имена меток.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+
+    def labels(self, *values: str):
+        """
+        Возвращает дочернюю метрику для значений меток.
+
+        Args:
+            *values (str): Значения меток в порядке `labelnames`.
+
+        Returns:
+            Дочерняя метрика.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def collect(self) -> Iterable[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        for values, child in list(self._children.items()):
+            yield from self._collect_child(values, child)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _collect_child(self, values: tuple, child) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _format_labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _collect_child(self, values: tuple, child: _Value) -> Iterable[str]:
+        yield f"{self.name}{self._format_labels(values)} {_format_value(child.value)}"
+
+
+class Gauge(Metric):
+    """
+    Значение, которое может расти и уменьшаться.
+
+    Вместо хранимого значения можно задать функцию (`set_function`), которая вызывается
+    только при сборе метрик - так дешевле всего отдавать состояние пулов соединений.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Callable[[], float] | None = None
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Задает функцию, возвращающую значение метрики без меток при сборе.
+
+        Args:
+            function (Callable[[], float]): Функция без аргументов.
+        """
+        self._function = function
+
+    def collect(self) -> Iterable[str]:
+        if self._function is None:
+            yield from super().collect()
+            return
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield f"{self.name} {_format_value(self._function())}"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _collect_child(self, values: tuple, child: _Value) -> Iterable[str]:
+        yield f"{self.name}{self._format_labels(values)} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # Последняя корзина - +Inf
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> "_Timer":
+        """Контекстный менеджер, измеряющий длительность блока в секундах."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Histogram(Metric):
+    """
+    Гистограмма распределения значений по корзинам.
+
+    Каждое наблюдение увеличивает только счетчик своей корзины; накопительные значения
+    `_bucket`, которые требует формат Prometheus, считаются при сборе.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание метрики для HELP.
+            labelnames (Iterable[str]): Имена меток.
+            buckets (Iterable[float]): Верхние границы корзин без +Inf.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _collect_child(self, values: tuple, child: _HistogramValue) -> Iterable[str]:
+        labels = self._format_labels(values)
+        cumulative = 0
+        for upper_bound, count in zip((*self.buckets, float("inf")), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(upper_bound)}"'
+            yield f"{self.name}_bucket{self._format_labels(values, le)} {cumulative}"
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Реестр метрик, отдающий их все одним текстом в формате Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Регистрирует метрику.
+
+        Args:
+            metric (Metric): Метрика.
+
+        Returns:
+            Metric: Та же метрика.
+
+        Raises:
+            ValueError: Если метрика с таким именем уже зарегистрирована.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Собирает все метрики.
+
+        Returns:
+            str: Метрики в текстовом формате Prometheus.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Total HTTP requests.", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed."
+)
+
+dao_query_duration_seconds = registry.histogram(
+    "dao_query_duration_seconds", "DAO method duration in seconds.", ("dao", "method")
+)
+dao_query_errors_total = registry.counter(
+    "dao_query_errors_total", "DAO method errors.", ("dao", "method")
+)
+
+db_statement_duration_seconds = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time in seconds.", ("operation",)
+)
+db_pool_checkout_wait_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection in seconds.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+db_pool_size = registry.gauge("db_pool_size", "Configured database pool size.")
+db_pool_checked_out = registry.gauge("db_pool_checked_out", "Database connections currently checked out.")
+db_pool_overflow = registry.gauge("db_pool_overflow", "Database connections opened above the pool size.")
@@ -12,3 +12,20 @@
 
 
 # Далее вызов круд операций необходимо использовать <Model>DAO.<метод>
+
+
+# Для кеширования поиска по первичному ключу (память процесса + Redis) достаточно указать время жизни записей
+#
+# class <Model>DAO(BaseDAO):
+#     model = <Model>
+#     cache_ttl = 60
+#     cache_max_size = 1024
+
+
+# Для объединения одновременных поисков по первичному ключу в один запрос (N+1 -> 1) включите пакетную загрузку.
+# Зависимость RequestCache из app.dependencies.database дополнительно кеширует найденные записи до конца запроса
+#
+# class <Model>DAO(BaseDAO):
+#     model = <Model>
+#     batch_loading = True
+#     batch_window = 0.0  # 0 - в пределах одной итерации event loop
@@ -1,44 +1,239 @@
-from functools import wraps
+import time
+from functools import partial, wraps
+from itertools import islice
 from uuid import UUID
-from typing import Union, TypeVar, Generic, Type, Sequence
+from typing import Any, AsyncIterator, Iterable, Iterator, Union, TypeVar, Generic, Type, Sequence
 from abc import ABC
 
-from sqlalchemy import delete, insert, select, update
-from sqlalchemy.exc import SQLAlchemyError
+from pydantic import BaseModel
+from sqlalchemy import (
+    ARRAY,
+    Column,
+    any_,
+    bindparam,
+    column,
+    delete,
+    insert,
+    select,
+    text,
+    update,
+    values as values_table,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.deadline import check_deadline, get_deadline
 from app.core.logger import logger
+from app.core.metrics import dao_query_duration_seconds, dao_query_errors_total, db_pool_checkout_wait_seconds
 
-from app.database.postgres import async_session_maker, Base
+from app.database.data_layer.cache import DAOCache
+from app.database.data_layer.codecs import from_jsonable, to_jsonable
+from app.database.data_layer.loader import BatchLoader, clear_request_cache
+from app.database.data_layer.pagination import (
+    Direction,
+    KeysetPage,
+    decode_cursor,
+    encode_cursor,
+    keyset_columns,
+    seek_condition,
+)
+from app.database.postgres import async_session_maker, Base, VersionedMixin
+from app.database.profiler import current_profile, profiled_method
+from app.database.replicas import is_primary_pinned, pin_primary, primary_reads, replica_router
+from app.exceptions.database import PoolExhaustedError, QueryFailedError, QueryTimeoutError
+from app.exceptions.deadline import DeadlineExceededError
+from app.schemas.adapters import get_adapter
+from app.database.unit_of_work import after_commit, current_or_new_session, get_current_session, run_after_commit
 
 
 TABLE_MODEL = TypeVar("TABLE_MODEL", bound=Base)
+DTO = TypeVar("DTO", bound=BaseModel)
 
+checkout_wait = db_pool_checkout_wait_seconds.labels()
 
-def transaction_handler(func):
+POOL_EXHAUSTED_MESSAGE = "No free database connection in the pool, try again later"
+
+# Ограничение протокола Postgres на количество параметров в одном запросе
+MAX_QUERY_PARAMS = 32767
+
+# SQLSTATE query_canceled: запрос отменен по statement_timeout
+QUERY_CANCELED_SQLSTATE = "57014"
+# Запас, чтобы Postgres отменил запрос раньше, чем дедлайн отменит задачу запроса
+STATEMENT_TIMEOUT_MARGIN = 0.05
+DEADLINE_KEY = "deadline"
+
+
+def transaction_handler(func=None, *, read_only: bool = False):
     """
     Декоратор для обработки транзакций и логирования ошибок в DAO методах.
 
-    Выполняет указанную функцию внутри транзакции и логирует ошибки, если они возникают.
+    Если открыт unit of work (см. `app.database.unit_of_work`), функция выполняется в его сессии,
+    а фиксацией управляет unit of work; ошибка логируется и пробрасывается, чтобы транзакция
+    запроса откатилась. Иначе функция выполняется в собственной сессии, которая фиксируется
+    после успешного выполнения, а ошибка логируется и метод возвращает None.
+    Исчерпание пула соединений не скрывается в обоих случаях: пробрасывается `PoolExhaustedError`.
+    Также не скрываются таймауты: если у запроса есть дедлайн (см. `app.core.deadline`), остаток
+    времени ставится транзакции как `SET LOCAL statement_timeout`, и отмена запроса сервером
+    пробрасывается как `DeadlineExceededError` (или `QueryTimeoutError`, если дедлайна нет).
+    Длительность и ошибки метода записываются в метрики `dao_query_*` (см. `app.core.metrics`),
+    а в профилируемом запросе SQL запросы метода учитываются под его именем (см. `app.database.profiler`).
+
+    Методы с `read_only=True` выполняются на реплике (см. `app.database.replicas`), если реплики
+    настроены и чтения текущего запроса не закреплены за основным сервером. Каждая запись
+    закрепляет последующие чтения запроса за основным сервером (read-your-writes).
 
     Args:
         func (Callable): Функция DAO, которая будет обернута в декоратор.
+        read_only (bool): Метод только читает данные и может выполняться на реплике.
 
     Returns:
         Callable: Функция-декоратор для обработки транзакций и логирования ошибок.
     """
+    if func is None:
+        return partial(transaction_handler, read_only=read_only)
 
-    @wraps(func)
-    async def wrapper(cls, *args, **kwargs):
-        async with async_session_maker() as session:
+    async def run(cls, *args, **kwargs):
+        duration = dao_query_duration_seconds.labels(cls.__name__, func.__name__)
+        started = time.perf_counter()
+        session = get_current_session()
+        if session is not None:
             try:
-                return await func(cls, *args, **kwargs, session=session)
+                await _apply_deadline(session)
+                result = await func(cls, *args, **kwargs, session=session)
+                if not read_only:
+                    clear_request_cache(cls.model.__table__.fullname)
+                return result
+            except PoolTimeoutError as e:
+                dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
+                cls._log_error(e, func.__name__)
+                raise PoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from e
             except Exception as e:
+                dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
                 cls._log_error(e, func.__name__)
+                timeout_error = _timeout_error(e)
+                if timeout_error is not None and timeout_error is not e:
+                    raise timeout_error from e
+                raise
+            finally:
+                duration.observe(time.perf_counter() - started)
+
+        session = None
+        try:
+            session = await _open_session(read_only)
+            checkout_wait.observe(time.perf_counter() - started)
+            await _apply_deadline(session)
+            result = await func(cls, *args, **kwargs, session=session)
+            await session.commit()
+            if not read_only:
+                pin_primary()
+                clear_request_cache(cls.model.__table__.fullname)
+            await run_after_commit(session)
+            return result
+        except PoolTimeoutError as e:
+            dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
+            cls._log_error(e, func.__name__)
+            raise PoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from e
+        except Exception as e:
+            dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
+            cls._log_error(e, func.__name__)
+            timeout_error = _timeout_error(e)
+            if timeout_error is e:
+                raise
+            if timeout_error is not None:
+                raise timeout_error from e
+        finally:
+            if session is not None:
+                await session.close()
+            duration.observe(time.perf_counter() - started)
+
+    @wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        if current_profile() is None:
+            return await run(cls, *args, **kwargs)
+        with profiled_method(f"{cls.__name__}.{func.__name__}"):
+            return await run(cls, *args, **kwargs)
 
     return wrapper
 
 
+async def _apply_deadline(session: AsyncSession) -> None:
+    """
+    Ограничивает запросы транзакции остатком времени до дедлайна запроса.
+
+    В unit of work ограничение ставится один раз на транзакцию.
+
+    Args:
+        session (AsyncSession): Сессия с начатой транзакцией.
+
+    Raises:
+        DeadlineExceededError: Дедлайн истек или времени не осталось даже на запрос.
+    """
+    left = check_deadline()
+    if left is None or session.info.get(DEADLINE_KEY) == get_deadline():
+        return
+    timeout_ms = int((left - STATEMENT_TIMEOUT_MARGIN) * 1000)
+    if timeout_ms <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    # SET не принимает параметры запроса, значение - целое число из кода, а не из ввода
+    await session.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+    session.info[DEADLINE_KEY] = get_deadline()
+
+
+def _timeout_error(e: Exception) -> Exception | None:
+    """
+    Args:
+        e (Exception): Ошибка метода DAO.
+
+    Returns:
+        Exception | None: Исключение таймаута, которое нужно пробросить, или None, если ошибка - не таймаут.
+    """
+    if isinstance(e, DeadlineExceededError):
+        return e
+    if isinstance(e, DBAPIError) and getattr(e.orig, "sqlstate", None) == QUERY_CANCELED_SQLSTATE:
+        if get_deadline() is not None:
+            return DeadlineExceededError("Request deadline exceeded")
+        return QueryTimeoutError("Query cancelled by statement_timeout")
+    return None
+
+
+async def _open_session(read_only: bool) -> AsyncSession:
+    """
+    Открывает сессию и сразу берет для нее соединение из пула, чтобы отдельно измерить
+    ожидание свободного соединения.
+
+    Чтение открывается на реплике, выбранной `replica_router`. Если получить соединение
+    реплики не удалось, чтение выполняется на основном сервере, а недоступная реплика
+    исключается из выбора.
+
+    Args:
+        read_only (bool): Сессия нужна только для чтения.
+
+    Returns:
+        AsyncSession: Сессия с полученным соединением.
+    """
+    replica = replica_router.choose() if read_only else None
+    if replica is not None:
+        session = replica.session_maker()
+        try:
+            await session.connection()
+            return session
+        except PoolTimeoutError:
+            # Пул реплики занят, но сама она исправна: чтение уходит на основной сервер без исключения
+            await session.close()
+        except (OSError, SQLAlchemyError) as e:
+            await session.close()
+            replica_router.eject(replica, e)
+
+    session = async_session_maker()
+    try:
+        await session.connection()
+    except BaseException:
+        await session.close()
+        raise
+    return session
+
+
 class BaseDAO(ABC, Generic[TABLE_MODEL]):
     """
     Базовый класс DAO (Data Access Object) для работы с базой данных.
@@ -49,16 +244,104 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         Класс `BaseDAO` предназначен для наследования. Чтобы создать DAO для конкретной
         модели, нужно создать подкласс, установить атрибут `model` на нужную модель и,
         при необходимости, добавить или переопределить методы для расширения функциональности.
+
+        Кеширование поиска по первичному ключу включается в подклассе атрибутом `cache_ttl`
+        (секунды). Записи кешируются в памяти процесса (не больше `cache_max_size`) и в Redis,
+        изменения через методы DAO инвалидируют их после коммита во всех воркерах. Отсутствие
+        записи кешируется в Redis на `cache_negative_ttl` секунд (None - не кешируется): запись,
+        созданная в обход методов DAO, может быть не видна поиску по ключу это время.
+
+        Пакетная загрузка включается атрибутом `batch_loading`: одновременные вызовы
+        `find_one_or_none` по первичному ключу собираются в один запрос `WHERE pk = ANY(...)`
+        (см. `app.database.data_layer.loader`). Внутри `request_cache()` или зависимости
+        `RequestCache` загруженные записи переиспользуются до конца запроса.
     """
     model: TABLE_MODEL
+    bulk_batch_size: int = 1000
+    cache_ttl: int | None = None
+    cache_max_size: int = 1024
+    cache_negative_ttl: int | None = 5
+    batch_loading: bool = False
+    batch_window: float = 0.0
+    batch_max_size: int = 1000
+    _cache: DAOCache | None = None
+    _loaders: dict[bool, BatchLoader] | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        model = getattr(cls, "model", None)
+        if cls.cache_ttl and model is not None and len(model.__table__.primary_key.columns) == 1:
+            cls._cache = DAOCache.for_namespace(
+                namespace=model.__table__.fullname,
+                ttl=cls.cache_ttl,
+                max_size=cls.cache_max_size,
+                negative_ttl=cls.cache_negative_ttl,
+            )
+        else:
+            cls._cache = None
+        if cls.batch_loading and model is not None and len(model.__table__.primary_key.columns) == 1:
+            # Отдельные пакеты для чтений с реплики и для заполнения кеша с основного сервера.
+            # Чтения, закрепленные за основным сервером после записи, пакеты не используют
+            cls._loaders = {
+                primary: BatchLoader(
+                    partial(cls._load_batch, primary),
+                    namespace=model.__table__.fullname,
+                    max_batch_size=cls.batch_max_size,
+                    window=cls.batch_window,
+                )
+                for primary in (False, True)
+            }
+        else:
+            cls._loaders = None
 
     @classmethod
-    @transaction_handler
-    async def find_one_or_none(cls, session: AsyncSession, **filter_by) -> Type[TABLE_MODEL] | None:
+    async def find_one_or_none(cls, **filter_by) -> Type[TABLE_MODEL] | None:
         """
         Находит одну запись в базе данных, соответствующую заданным критериям фильтрации,
         или возвращает None, если такая запись не найдена.
 
+        Поиск только по первичному ключу обслуживается кешем и пакетной загрузкой, если они включены
+        в DAO. Внутри unit of work они не используются, чтобы видеть незафиксированные изменения запроса,
+        а пакетная загрузка не используется и после записи (чтения закреплены за основным сервером),
+        чтобы не получить результат пакета, начатого до записи.
+
+        Args:
+            filter_by (dict): Параметры для фильтрации записей.
+
+        Returns:
+            Base: Один экземпляр модели, соответствующий критериям фильтрации, или None.
+        """
+        key = cls._cache_key(filter_by) if cls._cache is not None or cls._loaders is not None else None
+        if key is None or get_current_session() is not None:
+            return await cls._find_one_or_none(**filter_by)
+        try:
+            if cls._cache is None:
+                if is_primary_pinned():
+                    # Пакет, начатый до записи этого запроса, вернул бы ему прежнее значение
+                    return await cls._find_one_or_none(**filter_by)
+                return await cls._loaders[False].load(key)
+            entry = await cls._cache.get(key, partial(cls._load_cache_entry, filter_by))
+        except QueryFailedError:
+            # Ошибка уже записана в лог, результат как у `_find_one_or_none`; в кеш она не попадает
+            return None
+        return cls._from_cache_entry(entry) if entry is not None else None
+
+    @classmethod
+    def cache_stats(cls) -> dict | None:
+        """
+        Возвращает счетчики кеша DAO.
+
+        Returns:
+            dict | None: Счетчики попаданий и промахов или None, если кеширование выключено.
+        """
+        return cls._cache.get_stats() if cls._cache is not None else None
+
+    @classmethod
+    @transaction_handler(read_only=True)
+    async def _find_one_or_none(cls, session: AsyncSession, **filter_by) -> Type[TABLE_MODEL] | None:
+        """
+        Находит одну запись в базе данных в обход кеша.
+
         Args:
             session (Session): Получаем от декоратора @transaction_handler
             filter_by (dict): Параметры для фильтрации записей.
@@ -71,7 +354,55 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         return result.scalars().one_or_none()
 
     @classmethod
-    @transaction_handler
+    @transaction_handler(read_only=True)
+    async def _find_by_pks(cls, session: AsyncSession, keys: Sequence[str]) -> Sequence[TABLE_MODEL]:
+        """
+        Находит записи по списку значений первичного ключа одним запросом.
+
+        Значения передаются одним параметром-массивом (`pk = ANY($1)`), поэтому текст запроса
+        не зависит от их количества и план переиспользуется.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            keys (Sequence[str]): Нормализованные значения первичного ключа (см. `_cache_key`).
+
+        Returns:
+            list[Base]: Найденные экземпляры модели.
+        """
+        primary_key = next(iter(cls.model.__table__.primary_key.columns))
+        values = [from_jsonable(primary_key, key) for key in keys]
+        query = select(cls.model).where(
+            primary_key == any_(bindparam("pk_values", values, type_=ARRAY(primary_key.type)))
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @classmethod
+    async def _load_batch(cls, primary: bool, keys: Sequence[str]) -> dict[str, TABLE_MODEL]:
+        """
+        Загружает пакет записей для `BatchLoader`.
+
+        Args:
+            primary (bool): Читать с основного сервера.
+            keys (Sequence[str]): Нормализованные значения первичного ключа.
+
+        Returns:
+            dict[str, Base]: Найденные записи по ключу.
+
+        Raises:
+            QueryFailedError: Запрос завершился ошибкой.
+        """
+        if primary:
+            with primary_reads():
+                instances = await cls._find_by_pks(keys)
+        else:
+            instances = await cls._find_by_pks(keys)
+        if instances is None:
+            raise QueryFailedError(f"Cannot load {cls.__name__} batch")
+        return {str(to_jsonable(cls._pk_value(instance))): instance for instance in instances}
+
+    @classmethod
+    @transaction_handler(read_only=True)
     async def find_all(cls, session: AsyncSession, **filter_by) -> Sequence[Type[TABLE_MODEL]]:
         """
         Находит все записи в базе данных, соответствующие заданным критериям фильтрации.
@@ -87,6 +418,74 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         result = await session.execute(query)
         return result.scalars().all()
 
+    @classmethod
+    @transaction_handler(read_only=True)
+    async def find_all_mappings(
+        cls,
+        session: AsyncSession,
+        columns: Sequence[str] | None = None,
+        **filter_by
+    ) -> list[dict[str, Any]]:
+        """
+        Находит записи и возвращает их словарями без создания ORM объектов.
+
+        Строки не попадают в identity map сессии и не отслеживаются, поэтому для больших
+        выборок на чтение это заметно дешевле `find_all`. Выбираются только нужные колонки.
+        Результат можно сразу отдать клиенту через `app.api.responses.OrjsonResponse`.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            columns (Sequence[str] | None): Имена атрибутов модели для выборки. По умолчанию все колонки.
+            filter_by (dict): Параметры для фильтрации записей.
+
+        Returns:
+            list[dict[str, Any]]: Строки с ключами - именами атрибутов модели.
+        """
+        names = columns or [prop.key for prop in cls.model.__mapper__.column_attrs]
+        query = select(*(getattr(cls.model, name).label(name) for name in names)).filter_by(**filter_by)
+        result = await session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def find_all_as(cls, schema: Type[DTO], **filter_by) -> list[DTO] | None:
+        """
+        Находит записи и возвращает их сразу в виде DTO.
+
+        Выбираются только колонки, соответствующие полям схемы, а DTO создаются из строк
+        одним вызовом pydantic-core, без промежуточных ORM объектов.
+
+        Args:
+            schema (Type[DTO]): Схема pydantic, поля которой названы как атрибуты модели.
+            filter_by (dict): Параметры для фильтрации записей.
+
+        Returns:
+            list[DTO] | None: Экземпляры схемы или None при ошибке базы данных.
+        """
+        columns = [name for name in schema.model_fields if name in cls.model.__mapper__.column_attrs]
+        rows = await cls.find_all_mappings(columns=columns, **filter_by)
+        if rows is None:
+            return None
+        return get_adapter(list[schema]).validate_python(rows)
+
+    @classmethod
+    @transaction_handler(read_only=True)
+    async def get_version(cls, session: AsyncSession, **filter_by) -> int | None:
+        """
+        Возвращает версию записи без чтения остальных колонок, например, для ETag ответа.
+
+        Модель должна наследовать `VersionedMixin`.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            filter_by (dict): Параметры для фильтрации записи.
+
+        Returns:
+            int | None: Версия записи или None, если запись не найдена.
+        """
+        query = select(cls.model.version).filter_by(**filter_by)
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
     @classmethod
     @transaction_handler
     async def create(cls, session: AsyncSession, **data) -> Type[TABLE_MODEL] | None:
@@ -102,11 +501,12 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         """
         query = insert(cls.model).values(**data).returning(cls.model)
         result = await session.execute(query)
-        await session.commit()
-        return result.scalars().first()
+        instance = result.scalars().first()
+        cls._invalidate_after_commit(session, [cls._pk_value(instance)])
+        return instance
 
     @classmethod
-    @transaction_handler
+    @transaction_handler(read_only=True)
     async def get_paginated(
         cls,
         session: AsyncSession,
@@ -130,6 +530,190 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         result = await session.execute(query)
         return result.scalars().all()
 
+    @classmethod
+    async def get_keyset_page(
+        cls,
+        limit: int,
+        cursor: str | None = None,
+        order_by: str | None = None,
+        direction: Direction = "next",
+        **filter_data
+    ) -> KeysetPage[TABLE_MODEL] | None:
+        """
+        Возвращает страницу записей с keyset (cursor) пагинацией.
+
+        В отличие от `get_paginated` не использует OFFSET: выборка начинается сразу с позиции курсора
+        по индексу, поэтому время ответа не растет с номером страницы.
+
+        Args:
+            limit (int): Количество записей на странице.
+            cursor (str | None): Курсор из предыдущего ответа. Без курсора возвращается первая
+                (или последняя для direction="prev") страница.
+            order_by (str | None): Колонка сортировки: первичный ключ (по умолчанию) или индексированная
+                NOT NULL колонка.
+            direction (Direction): "next" - страница после курсора, "prev" - страница до курсора.
+            filter_data (dict): Опциональный фильтр для фильтрации записей.
+
+        Returns:
+            KeysetPage: Страница с записями и курсорами соседних страниц или None в случае ошибки.
+
+        Raises:
+            InvalidCursorError: Если курсор поврежден или выдан для другой сортировки.
+            ValueError: Если колонка сортировки не существует, допускает NULL или не индексирована.
+        """
+        columns = keyset_columns(cls.model.__table__, order_by)
+        values = decode_cursor(cursor, columns) if cursor else None
+
+        rows = await cls._fetch_keyset(
+            columns=columns, values=values, limit=limit + 1, direction=direction, filter_data=filter_data
+        )
+        if rows is None:
+            return None
+
+        has_more = len(rows) > limit
+        items = list(rows[:limit])
+        if direction == "prev":
+            items.reverse()
+
+        page = KeysetPage(items=items)
+        if not items:
+            return page
+
+        first_cursor = encode_cursor(columns, cls._keyset_values(items[0], columns))
+        last_cursor = encode_cursor(columns, cls._keyset_values(items[-1], columns))
+        if direction == "next":
+            page.next_cursor = last_cursor if has_more else None
+            page.prev_cursor = first_cursor if cursor else None
+        else:
+            page.prev_cursor = first_cursor if has_more else None
+            page.next_cursor = last_cursor if cursor else None
+        return page
+
+    @classmethod
+    async def iter_chunks(
+        cls,
+        chunk_size: int = 1000,
+        order_by: str | None = None,
+        **filter_data
+    ) -> AsyncIterator[Sequence[TABLE_MODEL]]:
+        """
+        Обходит все записи таблицы пачками фиксированного размера по keyset.
+
+        Каждая пачка читается в отдельной короткой сессии, поэтому соединение не удерживается,
+        пока вызывающий код обрабатывает пачку, а в памяти находится не больше `chunk_size` записей.
+
+        Args:
+            chunk_size (int): Размер пачки.
+            order_by (str | None): Колонка обхода: первичный ключ (по умолчанию) или индексированная
+                NOT NULL колонка.
+            filter_data (dict): Опциональный фильтр для фильтрации записей.
+
+        Yields:
+            Sequence[Base]: Очередная пачка экземпляров модели.
+
+        Raises:
+            QueryFailedError: Чтение пачки завершилось ошибкой: обход не закончен, а прерван.
+        """
+        columns = keyset_columns(cls.model.__table__, order_by)
+        values = None
+        while True:
+            rows = await cls._fetch_keyset(
+                columns=columns, values=values, limit=chunk_size, direction="next", filter_data=filter_data
+            )
+            if rows is None:
+                raise QueryFailedError(f"Cannot read {cls.__name__} chunk after {values}")
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            values = cls._keyset_values(rows[-1], columns)
+
+    @classmethod
+    async def stream_chunks(cls, chunk_size: int = 1000, **filter_by) -> AsyncIterator[Sequence[TABLE_MODEL]]:
+        """
+        Потоково читает записи через серверный курсор, отдавая их пачками.
+
+        В отличие от `find_all` результат не материализуется целиком: в памяти находится
+        не больше одной пачки, следующая читается из курсора, когда вызывающий код ее запросит.
+        Соединение удерживается до конца обхода, поэтому генератор нужно дочитать или закрыть
+        (например, через `contextlib.aclosing`), тогда курсор закрывается сразу.
+
+        Args:
+            chunk_size (int): Количество строк, получаемых из курсора за раз.
+            filter_by (dict): Параметры для фильтрации записей.
+
+        Yields:
+            Sequence[Base]: Очередная пачка экземпляров модели.
+        """
+        query = select(cls.model).filter_by(**filter_by).execution_options(yield_per=chunk_size)
+        try:
+            async with current_or_new_session(read_only=True) as session:
+                await _apply_deadline(session)
+                result = await session.stream_scalars(query)
+                try:
+                    async for partition in result.partitions():
+                        yield partition
+                finally:
+                    await result.close()
+        except PoolTimeoutError as e:
+            cls._log_error(e, "stream_chunks")
+            raise PoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from e
+        except Exception as e:
+            cls._log_error(e, "stream_chunks")
+            timeout_error = _timeout_error(e)
+            if timeout_error is not None and timeout_error is not e:
+                raise timeout_error from e
+            raise
+
+    @classmethod
+    @transaction_handler(read_only=True)
+    async def _fetch_keyset(
+        cls,
+        session: AsyncSession,
+        columns: Sequence[Column],
+        values: tuple | None,
+        limit: int,
+        direction: Direction,
+        filter_data: dict
+    ) -> Sequence[TABLE_MODEL]:
+        """
+        Выбирает записи после (или до) значений курсора в порядке ключа пагинации.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            columns (Sequence[Column]): Колонки ключа пагинации.
+            values (tuple | None): Значения курсора или None для выборки с начала (конца) таблицы.
+            limit (int): Количество записей для выборки.
+            direction (Direction): Направление выборки относительно курсора.
+            filter_data (dict): Параметры для фильтрации записей.
+
+        Returns:
+            list[Base]: Записи в порядке выборки (для direction="prev" - в обратном порядке).
+        """
+        query = select(cls.model).filter_by(**filter_data)
+        if values is not None:
+            query = query.where(seek_condition(columns, values, direction))
+        ordering = columns if direction == "next" else [column.desc() for column in columns]
+        query = query.order_by(*ordering).limit(limit)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @classmethod
+    def _keyset_values(cls, instance: TABLE_MODEL, columns: Sequence[Column]) -> tuple[Any, ...]:
+        """
+        Возвращает значения колонок ключа пагинации для экземпляра модели.
+
+        Args:
+            instance (Base): Экземпляр модели.
+            columns (Sequence[Column]): Колонки ключа пагинации.
+
+        Returns:
+            tuple: Значения колонок в порядке `columns`.
+        """
+        mapper = cls.model.__mapper__
+        return tuple(getattr(instance, mapper.get_property_by_column(column).key) for column in columns)
+
     @classmethod
     @transaction_handler
     async def update_by_id(
@@ -151,10 +735,17 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         Returns:
             Base: Обновленный экземпляр модели или None, если обновление не удалось.
         """
-        query = update(cls.model).where(getattr(cls.model, id_field) == id_value).values(**update_data)
-        await session.execute(query)
-        await session.commit()
-        return await cls.find_one_or_none(**{id_field: id_value})
+        query = (
+            update(cls.model)
+            .where(getattr(cls.model, id_field) == id_value)
+            .values(**update_data, **cls._version_bump())
+            .returning(cls.model)
+        )
+        result = await session.execute(query)
+        instances = result.scalars().all()
+        # `id_field` может быть не уникальным: инвалидируются все обновленные записи
+        cls._invalidate_after_commit(session, [cls._pk_value(instance) for instance in instances])
+        return instances[0] if instances else None
 
     @classmethod
     @transaction_handler
@@ -170,10 +761,388 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         Returns:
             bool: Возвращает True, если запись была успешно удалена, иначе False.
         """
-        query = delete(cls.model).where(getattr(cls.model, id_field) == id_value)
+        query = (
+            delete(cls.model)
+            .where(getattr(cls.model, id_field) == id_value)
+            .returning(*cls.model.__table__.primary_key.columns)
+        )
         result = await session.execute(query)
-        await session.commit()
-        return result.rowcount > 0
+        deleted = result.all()
+        cls._invalidate_after_commit(session, [row[0] for row in deleted])
+        return len(deleted) > 0
+
+    @classmethod
+    @transaction_handler
+    async def bulk_create(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict],
+        batch_size: int | None = None,
+        returning: bool = False
+    ) -> int | Sequence[TABLE_MODEL]:
+        """
+        Создает записи пачками: один многострочный INSERT на пачку и один коммит на весь вызов.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            rows (Sequence[dict]): Данные для создания записей.
+            batch_size (int | None): Количество строк в одном INSERT. По умолчанию `bulk_batch_size`.
+            returning (bool): Вернуть созданные экземпляры модели вместо количества строк.
+
+        Returns:
+            int | list[Base]: Количество созданных записей или созданные экземпляры модели.
+        """
+        created = []
+        count = 0
+        for batch in cls._batches(rows, batch_size):
+            query = insert(cls.model).values(batch)
+            if returning:
+                result = await session.execute(query.returning(cls.model))
+                instances = result.scalars().all()
+                cls._invalidate_after_commit(session, [cls._pk_value(instance) for instance in instances])
+                created.extend(instances)
+            else:
+                # Инвалидация снимает закешированные отметки об отсутствии созданных записей
+                count += await cls._execute_bulk_write(session, query)
+        return created if returning else count
+
+    @classmethod
+    @transaction_handler
+    async def bulk_upsert(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict],
+        conflict_keys: Sequence[str],
+        update_fields: Sequence[str] | None = None,
+        batch_size: int | None = None
+    ) -> int:
+        """
+        Вставляет записи пачками через INSERT ... ON CONFLICT по заданным ключам.
+
+        Строки с одинаковыми значениями ключей внутри пачки схлопываются (побеждает последняя),
+        иначе Postgres отклоняет ON CONFLICT DO UPDATE, затрагивающий одну строку дважды.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            rows (Sequence[dict]): Данные для вставки или обновления.
+            conflict_keys (Sequence[str]): Колонки уникального ограничения для ON CONFLICT.
+            update_fields (Sequence[str] | None): Поля, обновляемые при конфликте. По умолчанию все
+                переданные поля, кроме ключей. Пустой список означает ON CONFLICT DO NOTHING.
+            batch_size (int | None): Количество строк в одном запросе. По умолчанию `bulk_batch_size`.
+
+        Returns:
+            int: Количество вставленных или обновленных записей.
+        """
+        count = 0
+        for batch in cls._batches(rows, batch_size):
+            batch = list({tuple(row[key] for key in conflict_keys): row for row in batch}.values())
+            query = pg_insert(cls.model).values(batch)
+            fields = update_fields
+            if fields is None:
+                fields = [field for field in batch[0] if field not in conflict_keys]
+            if fields:
+                query = query.on_conflict_do_update(
+                    index_elements=conflict_keys,
+                    set_={field: query.excluded[field] for field in fields} | cls._version_bump()
+                )
+            else:
+                query = query.on_conflict_do_nothing(index_elements=conflict_keys)
+            count += await cls._execute_bulk_write(session, query)
+        return count
+
+    @classmethod
+    @transaction_handler
+    async def bulk_update(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict],
+        id_field: str,
+        batch_size: int | None = None
+    ) -> int:
+        """
+        Обновляет записи пачками одним запросом UPDATE ... FROM (VALUES ...) на пачку.
+
+        Каждая строка должна содержать идентификатор `id_field` и одинаковый набор обновляемых полей.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            rows (Sequence[dict]): Данные для обновления вместе с идентификатором.
+            id_field (str): Имя поля, которое является идентификатором.
+            batch_size (int | None): Количество строк в одном запросе. По умолчанию `bulk_batch_size`.
+
+        Returns:
+            int: Количество обновленных записей.
+        """
+        table = cls.model.__table__
+        count = 0
+        for batch in cls._batches(rows, batch_size):
+            names = list(batch[0])
+            fields = [name for name in names if name != id_field]
+            data = values_table(*[column(name, table.c[name].type) for name in names], name="data").data(
+                [tuple(row[name] for name in names) for row in batch]
+            )
+            query = (
+                update(table)
+                .where(table.c[id_field] == data.c[id_field])
+                .values({field: data.c[field] for field in fields} | cls._version_bump())
+            )
+            count += await cls._execute_bulk_write(session, query)
+        return count
+
+    @classmethod
+    @transaction_handler
+    async def bulk_delete_by_ids(
+        cls,
+        session: AsyncSession,
+        id_field: str,
+        id_values: Sequence[Union[str, int, UUID]],
+        batch_size: int | None = None
+    ) -> int:
+        """
+        Удаляет записи по списку идентификаторов пачками.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            id_field (str): Имя поля, которое является идентификатором.
+            id_values (Sequence[Union[str, int, UUID]]): Значения идентификаторов для удаления.
+            batch_size (int | None): Количество идентификаторов в одном запросе. По умолчанию `bulk_batch_size`.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        id_column = getattr(cls.model, id_field)
+        size = min(batch_size or cls.bulk_batch_size, MAX_QUERY_PARAMS)
+        count = 0
+        for batch in _chunked(id_values, size):
+            count += await cls._execute_bulk_write(session, delete(cls.model).where(id_column.in_(batch)))
+        return count
+
+    @classmethod
+    @transaction_handler
+    async def bulk_copy(cls, session: AsyncSession, rows: Iterable[dict], columns: Sequence[str] | None = None) -> int:
+        """
+        Загружает записи через COPY протокола Postgres (asyncpg `copy_records_to_table`).
+
+        Самый быстрый способ для очень больших загрузок: строки передаются потоком без разбора SQL.
+        Записи для COPY строятся генератором по мере отправки, поэтому `rows` тоже может быть
+        генератором, и загрузка не держит в памяти все строки сразу.
+        Python-значения по умолчанию (например, `default=uuid4`) заполняются на стороне клиента,
+        серверные значения по умолчанию применяются только к колонкам, не перечисленным в `columns`.
+
+        Args:
+            session (Session): Получаем от декоратора @transaction_handler
+            rows (Iterable[dict]): Данные для создания записей.
+            columns (Sequence[str] | None): Загружаемые колонки. По умолчанию все колонки таблицы,
+                у которых нет серверного значения по умолчанию.
+
+        Returns:
+            int: Количество загруженных записей.
+        """
+        table = cls.model.__table__
+        if columns is None:
+            columns = [col.name for col in table.columns if col.server_default is None]
+
+        primary_key = next(iter(table.primary_key.columns))
+        # Для инвалидации кеша из записей сохраняются только первичные ключи
+        key_position = None
+        if cls._cache is not None and primary_key.name in columns:
+            key_position = list(columns).index(primary_key.name)
+        keys = []
+        count = 0
+
+        def records() -> Iterator[tuple]:
+            nonlocal count
+            for row in rows:
+                record = tuple(cls._with_python_defaults(row).get(name) for name in columns)
+                if key_position is not None:
+                    keys.append(record[key_position])
+                count += 1
+                yield record
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name, records=records(), columns=list(columns), schema_name=table.schema
+        )
+        if keys:
+            cls._invalidate_after_commit(session, keys)
+        return count
+
+    @classmethod
+    async def _execute_bulk_write(cls, session: AsyncSession, query: Any) -> int:
+        """
+        Выполняет массовый INSERT, UPDATE или DELETE и планирует инвалидацию кеша.
+
+        Если кеширование включено, запрос дополняется RETURNING первичного ключа, чтобы
+        после коммита инвалидировать именно затронутые записи.
+
+        Args:
+            session (Session): Сессия, в которой выполняется запрос.
+            query (Any): Запрос изменения данных.
+
+        Returns:
+            int: Количество затронутых записей.
+        """
+        if cls._cache is None:
+            result = await session.execute(query)
+            return result.rowcount
+
+        primary_key = next(iter(cls.model.__table__.primary_key.columns))
+        result = await session.execute(query.returning(primary_key))
+        changed = [row[0] for row in result.all()]
+        cls._invalidate_after_commit(session, changed)
+        return len(changed)
+
+    @classmethod
+    def _batches(cls, rows: Iterable[dict], batch_size: int | None) -> Iterator[list[dict]]:
+        """
+        Делит строки на пачки, не превышающие лимит параметров одного запроса.
+
+        Args:
+            rows (Iterable[dict]): Строки для записи.
+            batch_size (int | None): Желаемый размер пачки. По умолчанию `bulk_batch_size`.
+
+        Returns:
+            Iterator[list[dict]]: Пачки строк.
+        """
+        params_per_row = max(len(cls.model.__table__.columns), 1)
+        size = min(batch_size or cls.bulk_batch_size, MAX_QUERY_PARAMS // params_per_row)
+        return _chunked(rows, size)
+
+    @classmethod
+    def _with_python_defaults(cls, row: dict) -> dict:
+        """
+        Дополняет строку значениями по умолчанию, которые SQLAlchemy вычисляет на стороне Python.
+
+        Args:
+            row (dict): Данные записи.
+
+        Returns:
+            dict: Данные записи с заполненными значениями по умолчанию.
+        """
+        row = dict(row)
+        for col in cls.model.__table__.columns:
+            default = col.default
+            if col.name in row or default is None:
+                continue
+            if default.is_scalar:
+                row[col.name] = default.arg
+            elif default.is_callable:
+                row[col.name] = default.arg(None)
+        return row
+
+    @classmethod
+    def _version_bump(cls) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: Увеличение версии строки для UPDATE, если модель версионируется
+                (`VersionedMixin`), иначе пустой словарь.
+        """
+        if issubclass(cls.model, VersionedMixin):
+            return {"version": cls.model.__table__.c.version + 1}
+        return {}
+
+    @classmethod
+    def _cache_key(cls, filter_by: dict) -> str | None:
+        """
+        Возвращает ключ кеша, если фильтр - это поиск только по первичному ключу.
+
+        Args:
+            filter_by (dict): Параметры фильтрации.
+
+        Returns:
+            str | None: Нормализованное значение первичного ключа или None, если фильтр не кешируется.
+        """
+        if len(filter_by) != 1:
+            return None
+        primary_key = next(iter(cls.model.__table__.primary_key.columns))
+        name, value = next(iter(filter_by.items()))
+        if name != cls.model.__mapper__.get_property_by_column(primary_key).key or value is None:
+            return None
+        try:
+            return str(to_jsonable(from_jsonable(primary_key, value)))
+        except (ValueError, TypeError):
+            return None
+
+    @classmethod
+    def _pk_value(cls, instance: TABLE_MODEL | None) -> Any:
+        """
+        Возвращает значение первичного ключа экземпляра модели (для моделей с простым ключом).
+
+        Args:
+            instance (Base | None): Экземпляр модели.
+
+        Returns:
+            Any: Значение первичного ключа или None.
+        """
+        if instance is None:
+            return None
+        primary_key = next(iter(cls.model.__table__.primary_key.columns))
+        return getattr(instance, cls.model.__mapper__.get_property_by_column(primary_key).key)
+
+    @classmethod
+    def _invalidate_after_commit(cls, session: AsyncSession, pk_values: Iterable[Any]) -> None:
+        """
+        Планирует инвалидацию кеша для записей с заданными первичными ключами после коммита.
+
+        Args:
+            session (Session): Сессия, в которой изменены записи.
+            pk_values (Iterable[Any]): Значения первичных ключей измененных записей.
+        """
+        if cls._cache is None:
+            return
+        keys = [str(to_jsonable(value)) for value in pk_values if value is not None]
+        if keys:
+            after_commit(session, partial(cls._cache.invalidate, keys))
+
+    @classmethod
+    async def _load_cache_entry(cls, filter_by: dict) -> dict | None:
+        """
+        Загружает запись из базы в виде записи кеша.
+
+        Args:
+            filter_by (dict): Параметры фильтрации по первичному ключу.
+
+        Returns:
+            dict | None: JSON-совместимые значения колонок или None, если запись не найдена.
+
+        Raises:
+            QueryFailedError: Запрос завершился ошибкой, отсутствие записи не подтверждено.
+        """
+        key = cls._cache_key(filter_by)
+        # Кеш заполняется только с основного сервера: реплика с задержкой репликации
+        # могла бы закешировать запись, которая уже инвалидирована после записи
+        with primary_reads():
+            if cls._loaders is not None:
+                instance = await cls._loaders[True].load(key)
+            else:
+                # `_find_by_pks` отличает ошибку (None) от отсутствия записи (пустой список)
+                instances = await cls._find_by_pks([key])
+                if instances is None:
+                    raise QueryFailedError(f"Cannot load {cls.__name__} {key}")
+                instance = instances[0] if instances else None
+        if instance is None:
+            return None
+        return {
+            prop.key: to_jsonable(getattr(instance, prop.key))
+            for prop in cls.model.__mapper__.column_attrs
+        }
+
+    @classmethod
+    def _from_cache_entry(cls, entry: dict) -> TABLE_MODEL:
+        """
+        Создает экземпляр модели из записи кеша.
+
+        Args:
+            entry (dict): JSON-совместимые значения колонок.
+
+        Returns:
+            Base: Экземпляр модели, не привязанный к сессии.
+        """
+        return cls.model(**{
+            prop.key: from_jsonable(prop.columns[0], entry.get(prop.key))
+            for prop in cls.model.__mapper__.column_attrs
+        })
 
     @classmethod
     def _log_error(cls, e: Exception, operation: str) -> None:
@@ -189,3 +1158,19 @@ class BaseDAO(ABC, Generic[TABLE_MODEL]):
         else:
             msg = f"Unknown Exc: Cannot {operation} data in table"
         logger.error(msg, extra={"table": cls.model.__tablename__}, exc_info=True)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Делит последовательность на списки длиной не больше `size`.
+
+    Args:
+        items (Iterable): Исходная последовательность.
+        size (int): Максимальная длина списка.
+
+    Returns:
+        Iterator[list]: Списки элементов по порядку.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,267 @@
+"""
+Двухуровневый read-through кеш для DAO: in-process LRU и Redis с инвалидацией через pub/sub
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Iterable, Iterator
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logger
+from app.database.redis import RedisCache, Uncached, redis_cache
+from app.utils.lru_cache import LRUCache
+
+INVALIDATION_CHANNEL = "dao-cache:invalidate"
+
+CacheLoader = Callable[[], Awaitable[dict | None]]
+
+
+@dataclass
+class CacheStats:
+    """Счетчики попаданий и промахов кеша DAO."""
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    errors: int = 0
+
+
+class DAOCache:
+    """
+    Кеш записей одной таблицы.
+
+    Первый уровень - ограниченный LRU кеш процесса, второй - общий для всех воркеров Redis.
+    Значения хранятся в виде JSON-совместимых словарей, а не ORM объектов, чтобы запросы
+    не делили между собой изменяемые экземпляры моделей. Ошибки Redis не прерывают запрос:
+    кеш деградирует до чтения из базы.
+    """
+
+    registry: dict[str, "DAOCache"] = {}
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int,
+        max_size: int,
+        negative_ttl: int | None = None,
+        redis: RedisCache = redis_cache,
+    ):
+        """
+        Args:
+            namespace (str): Пространство имен ключей, обычно имя таблицы.
+            ttl (int): Время жизни записи в секундах на обоих уровнях.
+            max_size (int): Максимальное количество записей в кеше процесса.
+            negative_ttl (int | None): Время жизни отметки об отсутствии записи в Redis в секундах.
+                None - отсутствие записи не кешируется.
+            redis (RedisCache): Клиент Redis второго уровня.
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self.redis = redis
+        self.stats = CacheStats()
+        # Счетчик инвалидаций и номер последней инвалидации для ключей, которые сейчас загружаются:
+        # загрузка, начатая до инвалидации своего ключа, не сохраняет результат в кеш
+        self._generation = 0
+        self._loading: dict[str, int] = {}
+        self._invalidated_at: dict[str, int] = {}
+
+    @classmethod
+    def for_namespace(cls, namespace: str, ttl: int, max_size: int, negative_ttl: int | None = None) -> "DAOCache":
+        """
+        Возвращает кеш пространства имен, создавая его при первом обращении.
+
+        Args:
+            namespace (str): Пространство имен ключей.
+            ttl (int): Время жизни записи в секундах.
+            max_size (int): Максимальное количество записей в кеше процесса.
+            negative_ttl (int | None): Время жизни отметки об отсутствии записи в секундах.
+
+        Returns:
+            DAOCache: Кеш пространства имен.
+        """
+        if namespace not in cls.registry:
+            cls.registry[namespace] = cls(namespace=namespace, ttl=ttl, max_size=max_size, negative_ttl=negative_ttl)
+        return cls.registry[namespace]
+
+    async def get(self, key: str, loader: CacheLoader) -> dict | None:
+        """
+        Возвращает запись из кеша, при промахе загружает ее через `loader` и сохраняет на обоих уровнях.
+
+        Второй уровень читается через `RedisCache.get_or_compute`, поэтому одновременные промахи
+        по одному ключу во всех воркерах приводят к одному запросу в базу. Отсутствие записи
+        кешируется в Redis на `negative_ttl` секунд (в кеш процесса не попадает), чтобы запросы
+        несуществующих ключей не шли каждый раз в базу. Ошибка `loader` не кешируется и пробрасывается.
+        Если ключ инвалидирован во время загрузки, загруженная запись возвращается, но ни на одном
+        уровне не сохраняется: она могла быть прочитана до изменения.
+
+        Args:
+            key (str): Ключ записи внутри пространства имен.
+            loader (CacheLoader): Корутина-функция, загружающая запись из базы.
+
+        Returns:
+            dict | None: Запись или None, если она не найдена.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            self.stats.local_hits += 1
+            return value
+
+        loaded = False
+        started = self._generation
+
+        async def load() -> dict | None | Uncached:
+            nonlocal loaded
+            loaded = True
+            # Загрузка может выполняться и после возврата из `get` (фоновое раннее обновление)
+            load_started = self._generation
+            with self._tracking(key):
+                value = await loader()
+                return Uncached(value) if self._is_stale(key, load_started) else value
+
+        with self._tracking(key):
+            value = await self.redis.get_or_compute(
+                self._redis_key(key), load, expire=self.ttl, negative_expire=self.negative_ttl
+            )
+            if value is not None and not self._is_stale(key, started):
+                self.local.set(key, value)
+        if loaded:
+            self.stats.misses += 1
+        else:
+            self.stats.redis_hits += 1
+        return value
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        """
+        Удаляет записи на обоих уровнях и оповещает остальные воркеры через pub/sub.
+
+        Args:
+            keys (Iterable[str]): Ключи записей внутри пространства имен.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        self.evict_local(keys)
+        self.stats.invalidations += len(keys)
+        try:
+            await self.redis.delete_many(self._redis_key(key) for key in keys)
+            await self.redis.publish(INVALIDATION_CHANNEL, {"ns": self.namespace, "keys": keys})
+        except (RedisError, OSError):
+            self._log_redis_error("invalidate")
+
+    def evict_local(self, keys: Iterable[str]) -> None:
+        """
+        Удаляет записи из кеша процесса и отмечает идущие загрузки этих ключей устаревшими.
+
+        Args:
+            keys (Iterable[str]): Ключи записей внутри пространства имен.
+        """
+        self._generation += 1
+        for key in keys:
+            self.local.delete(key)
+            if key in self._loading:
+                self._invalidated_at[key] = self._generation
+                self.redis.discard_inflight(self._redis_key(key))
+
+    @contextmanager
+    def _tracking(self, key: str) -> Iterator[None]:
+        """Отмечает ключ загружаемым, чтобы `evict_local` запомнил момент его инвалидации."""
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._invalidated_at.pop(key, None)
+
+    def _is_stale(self, key: str, started: int) -> bool:
+        return self._invalidated_at.get(key, 0) > started
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает счетчики кеша.
+
+        Returns:
+            dict: Счетчики попаданий по уровням, промахов, инвалидаций и ошибок Redis.
+        """
+        return {**asdict(self.stats), "local_size": len(self.local)}
+
+    def _redis_key(self, key: str) -> str:
+        return f"dao:{self.namespace}:{key}"
+
+    def _log_redis_error(self, operation: str) -> None:
+        self.stats.errors += 1
+        logger.warning(f"Redis Exc: Cannot {operation} cache", extra={"namespace": self.namespace}, exc_info=True)
+
+
+class CacheInvalidationListener:
+    """
+    Фоновая задача, получающая инвалидации от других воркеров через Redis pub/sub.
+
+    После каждого (пере)подключения кеши процесса очищаются, так как сообщения,
+    отправленные во время разрыва, потеряны.
+    """
+
+    def __init__(self, redis: RedisCache = redis_cache, max_backoff: float = 30.0):
+        """
+        Args:
+            redis (RedisCache): Клиент Redis.
+            max_backoff (float): Максимальная пауза между попытками переподключения в секундах.
+        """
+        self.redis = redis
+        self.max_backoff = max_backoff
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Запускает прослушивание канала инвалидаций, если в приложении есть кешируемые DAO."""
+        if self._task is None and DAOCache.registry:
+            self._task = asyncio.create_task(self._run(), name="dao-cache-invalidation")
+
+    async def stop(self) -> None:
+        """Останавливает прослушивание канала инвалидаций."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                for cache in DAOCache.registry.values():
+                    cache.local.clear()
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    self._handle(message["data"])
+            except (RedisError, OSError):
+                logger.warning("Redis Exc: cache invalidation channel lost", exc_info=True)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                await pubsub.aclose()
+
+    @staticmethod
+    def _handle(data: str) -> None:
+        try:
+            message = json.loads(data)
+            cache = DAOCache.registry.get(message["ns"])
+            keys = message["keys"]
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Malformed cache invalidation message", extra={"data": data})
+            return
+        if cache is not None:
+            cache.evict_local(keys)
+
+
+invalidation_listener = CacheInvalidationListener()
@@ -0,0 +1,53 @@
+"""
+Преобразование значений колонок в JSON-совместимый вид и обратно
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Column
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Приводит значение колонки к виду, который можно сериализовать в JSON.
+
+    Args:
+        value (Any): Значение колонки модели.
+
+    Returns:
+        Any: Строка для UUID, дат и Decimal, исходное значение для остальных типов.
+    """
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def from_jsonable(column: Column, value: Any) -> Any:
+    """
+    Восстанавливает значение колонки из JSON-совместимого вида по типу колонки.
+
+    Args:
+        column (Column): Колонка таблицы, которой принадлежит значение.
+        value (Any): Значение, полученное из JSON.
+
+    Returns:
+        Any: Значение в python-типе колонки.
+    """
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    if python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    if python_type in (UUID, Decimal):
+        return python_type(value)
+    return value
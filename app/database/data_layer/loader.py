@@ -0,0 +1,179 @@
+"""
+Пакетная загрузка по ключам в стиле DataLoader: одновременные запросы одной записи
+собираются в один запрос к базе
+"""
+
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Hashable, Iterator, Mapping, Sequence
+
+from app.core.deadline import check_deadline
+from app.exceptions.deadline import DeadlineExceededError
+
+BatchLoadFn = Callable[[Sequence[Hashable]], Awaitable[Mapping[Hashable, Any] | None]]
+
+_MISSING = object()
+
+# Кеш результатов загрузки на время запроса: {(пространство имен, ключ): значение}
+_request_cache: ContextVar[dict | None] = ContextVar("loader_request_cache", default=None)
+
+
+@contextmanager
+def request_cache() -> Iterator[dict]:
+    """
+    Включает кеш загруженных по ключу записей до конца блока (обычно - запроса).
+
+    Повторная загрузка той же записи внутри блока не обращается к базе. Вложенный
+    вызов переиспользует уже открытый кеш.
+
+    Yields:
+        dict: Кеш блока.
+    """
+    cache = _request_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    token = _request_cache.set({})
+    try:
+        yield _request_cache.get()
+    finally:
+        _request_cache.reset(token)
+
+
+def clear_request_cache(namespace: str | None = None) -> None:
+    """
+    Удаляет записи из кеша запроса, например после изменения данных.
+
+    Args:
+        namespace (str | None): Пространство имен, записи которого удаляются. None очищает кеш целиком.
+    """
+    cache = _request_cache.get()
+    if not cache:
+        return
+    if namespace is None:
+        cache.clear()
+        return
+    for key in [key for key in cache if key[0] == namespace]:
+        del cache[key]
+
+
+class BatchLoader:
+    """
+    Загрузчик, объединяющий запросы ключей в пакеты.
+
+    Ключи, запрошенные в течение одной итерации event loop (или окна `window` секунд),
+    загружаются одним вызовом `load_many`. Одновременные запросы одного ключа, в том числе
+    пришедшие во время загрузки пакета, ждут одну и ту же future. Если `load_many` падает,
+    исключение получают все ожидающие ключи пакета.
+
+    Пакет общий для нескольких запросов, поэтому `load_many` выполняется в пустом контексте:
+    дедлайн, профиль, закрепление за основным сервером и сессия unit of work запроса, ключ которого
+    попал в пакет первым, на остальные ключи не действуют. Ожидание каждого вызывающего ограничено
+    его собственным дедлайном.
+    """
+
+    def __init__(self, load_many: BatchLoadFn, namespace: str, max_batch_size: int = 1000, window: float = 0.0):
+        """
+        Args:
+            load_many (BatchLoadFn): Корутина-функция, загружающая значения по списку ключей
+                и возвращающая словарь {ключ: значение}. Отсутствующие ключи получают None.
+            namespace (str): Пространство имен ключей в кеше запроса.
+            max_batch_size (int): Максимальное количество ключей в одном пакете.
+            window (float): Время накопления пакета в секундах. 0 - до конца текущей итерации event loop.
+        """
+        self.load_many = load_many
+        self.namespace = namespace
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._futures: dict[Hashable, asyncio.Future] = {}
+        self._batch: list[Hashable] = []
+        self._handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Загружает значение по ключу в составе ближайшего пакета.
+
+        Args:
+            key (Hashable): Ключ.
+
+        Returns:
+            Any: Значение или None, если оно не найдено.
+
+        Raises:
+            DeadlineExceededError: Дедлайн запроса истек до загрузки пакета.
+        """
+        cache = _request_cache.get()
+        if cache is not None:
+            value = cache.get((self.namespace, key), _MISSING)
+            if value is not _MISSING:
+                return value
+
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[key] = future
+            self._batch.append(key)
+            self._schedule_dispatch()
+
+        # shield: отмена одного ожидающего (или истечение его дедлайна) не должна отменять загрузку для остальных
+        left = check_deadline()
+        timer = asyncio.timeout(left)
+        try:
+            async with timer:
+                value = await asyncio.shield(future)
+        except TimeoutError as e:
+            if not timer.expired():
+                raise
+            raise DeadlineExceededError("Request deadline exceeded") from e
+        if cache is not None:
+            cache[(self.namespace, key)] = value
+        return value
+
+    def _schedule_dispatch(self) -> None:
+        if len(self._batch) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            loop = asyncio.get_running_loop()
+            if self.window > 0:
+                self._handle = loop.call_later(self.window, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        # Пустой контекст: пакет не наследует ContextVar запроса, который его запустил
+        task = asyncio.get_running_loop().create_task(self._resolve(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, keys: list[Hashable]) -> None:
+        # Future остаются в `_futures` до конца загрузки, чтобы запросы тех же ключей,
+        # пришедшие во время выполнения пакета, ждали его результат, а не шли в базу снова
+        futures = [self._futures[key] for key in keys]
+        try:
+            results = await self.load_many(keys) or {}
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            # Исключение передается ожидающим, сама задача завершается без ошибки
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in zip(keys, futures):
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for key, future in zip(keys, futures):
+                if self._futures.get(key) is future:
+                    del self._futures[key]
@@ -0,0 +1,444 @@
+"""
+Базовый DAO для коллекций MongoDB
+"""
+
+import time
+from abc import ABC
+from dataclasses import dataclass, field
+from functools import wraps
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator, Mapping, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError, WaitQueueTimeoutError
+
+from app.core.logger import logger
+from app.core.metrics import dao_query_duration_seconds, dao_query_errors_total
+from app.database.mongo import get_database
+from app.exceptions.database import PoolExhaustedError
+
+Document = dict[str, Any]
+Projection = Sequence[str] | Mapping[str, Any] | None
+Sort = Sequence[tuple[str, int]] | None
+
+POOL_EXHAUSTED_MESSAGE = "No free MongoDB connection in the pool, try again later"
+
+
+@dataclass
+class MongoBulkResult:
+    """Суммарный результат пакетной записи по всем батчам."""
+    inserted: int = 0
+    upserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    errors: list[dict] = field(default_factory=list)
+    # Номер первой операции батча, который не выполнен из-за ошибки MongoDB (например, сети).
+    # Результат этого и следующих батчей неизвестен, они не выполнялись
+    failed_at: int | None = None
+
+    def add(self, result: Mapping[str, Any], offset: int = 0) -> None:
+        """
+        Добавляет результат одного батча (`bulk_api_result` или `BulkWriteError.details`).
+
+        Args:
+            result (Mapping[str, Any]): Результат батча.
+            offset (int): Номер первой операции батча среди всех операций, чтобы индексы ошибок
+                указывали на исходную операцию.
+        """
+        self.inserted += result.get("nInserted", 0)
+        self.upserted += result.get("nUpserted", 0)
+        self.matched += result.get("nMatched", 0)
+        self.modified += result.get("nModified", 0)
+        self.deleted += result.get("nRemoved", 0)
+        for error in result.get("writeErrors", []):
+            self.errors.append({**error, "index": error["index"] + offset})
+
+
+def mongo_handler(func):
+    """
+    Декоратор для логирования ошибок и метрик в методах MongoDAO.
+
+    Ошибка MongoDB логируется и метод возвращает None, как и методы `BaseDAO` вне unit of work.
+    Исчерпание пула соединений не скрывается: пробрасывается `PoolExhaustedError`.
+
+    Args:
+        func (Callable): Функция DAO, которая будет обернута в декоратор.
+
+    Returns:
+        Callable: Функция-декоратор.
+    """
+
+    @wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(cls, *args, **kwargs)
+        except WaitQueueTimeoutError as e:
+            dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
+            cls._log_error(e, func.__name__)
+            raise PoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from e
+        except PyMongoError as e:
+            dao_query_errors_total.labels(cls.__name__, func.__name__).inc()
+            cls._log_error(e, func.__name__)
+        finally:
+            dao_query_duration_seconds.labels(cls.__name__, func.__name__).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class MongoDAO(ABC):
+    """
+    Базовый класс DAO для работы с коллекцией MongoDB.
+
+    Примечание:
+        Класс `MongoDAO` предназначен для наследования. В подклассе нужно указать
+        `collection_name` и, при необходимости, индексы в `indexes`: они создаются
+        при старте приложения (`ensure_indexes`). Массовые операции разбиваются на батчи
+        по `bulk_batch_size` документов, чтобы не держать в памяти весь входной поток.
+    """
+    collection_name: str
+    indexes: Sequence[IndexModel] = ()
+    bulk_batch_size: int = 1000
+    registry: dict[str, type["MongoDAO"]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        name = getattr(cls, "collection_name", None)
+        if name is not None:
+            MongoDAO.registry[name] = cls
+
+    @classmethod
+    def collection(cls) -> AsyncIOMotorCollection:
+        """
+        Returns:
+            AsyncIOMotorCollection: Коллекция DAO.
+        """
+        return get_database()[cls.collection_name]
+
+    @classmethod
+    @mongo_handler
+    async def ensure_indexes(cls) -> list[str]:
+        """
+        Создает индексы из `indexes`. Уже существующие индексы не пересоздаются.
+
+        Returns:
+            list[str]: Имена индексов.
+        """
+        if not cls.indexes:
+            return []
+        return await cls.collection().create_indexes(list(cls.indexes))
+
+    @classmethod
+    @mongo_handler
+    async def find_one(cls, filter_by: Mapping[str, Any], projection: Projection = None) -> Document | None:
+        """
+        Находит один документ.
+
+        Args:
+            filter_by (Mapping[str, Any]): Фильтр MongoDB.
+            projection (Projection): Возвращаемые поля: список имен или словарь проекции.
+
+        Returns:
+            Document | None: Документ или None, если он не найден.
+        """
+        return await cls.collection().find_one(filter_by, projection)
+
+    @classmethod
+    @mongo_handler
+    async def find(
+        cls,
+        filter_by: Mapping[str, Any] | None = None,
+        projection: Projection = None,
+        sort: Sort = None,
+        skip: int = 0,
+        limit: int = 0,
+    ) -> list[Document]:
+        """
+        Находит документы и загружает их целиком. Для больших выборок используйте `stream`.
+
+        Args:
+            filter_by (Mapping[str, Any] | None): Фильтр MongoDB.
+            projection (Projection): Возвращаемые поля: список имен или словарь проекции.
+            sort (Sort): Сортировка: список пар (поле, направление).
+            skip (int): Количество пропускаемых документов.
+            limit (int): Максимальное количество документов, 0 - без ограничения.
+
+        Returns:
+            list[Document]: Документы.
+        """
+        cursor = cls.collection().find(filter_by or {}, projection, sort=sort, skip=skip, limit=limit)
+        return await cursor.to_list(length=None)
+
+    @classmethod
+    async def stream(
+        cls,
+        filter_by: Mapping[str, Any] | None = None,
+        projection: Projection = None,
+        sort: Sort = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[Document]]:
+        """
+        Потоково читает документы через курсор, отдавая их пачками по `batch_size`.
+
+        Сервер отдает документы батчами того же размера, поэтому в памяти находится не больше
+        одной пачки. Генератор нужно дочитать или закрыть (`contextlib.aclosing`), тогда
+        курсор на сервере закрывается сразу.
+
+        Args:
+            filter_by (Mapping[str, Any] | None): Фильтр MongoDB.
+            projection (Projection): Возвращаемые поля: список имен или словарь проекции.
+            sort (Sort): Сортировка: список пар (поле, направление).
+            batch_size (int): Количество документов в пачке и в батче курсора.
+
+        Yields:
+            list[Document]: Очередная пачка документов.
+        """
+        cursor = cls.collection().find(filter_by or {}, projection, sort=sort, batch_size=batch_size)
+        try:
+            chunk = []
+            async for document in cursor:
+                chunk.append(document)
+                if len(chunk) >= batch_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        except WaitQueueTimeoutError as e:
+            cls._log_error(e, "stream")
+            raise PoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from e
+        except PyMongoError as e:
+            cls._log_error(e, "stream")
+            raise
+        finally:
+            await cursor.close()
+
+    @classmethod
+    @mongo_handler
+    async def count(cls, filter_by: Mapping[str, Any] | None = None) -> int:
+        """
+        Считает документы, соответствующие фильтру.
+
+        Args:
+            filter_by (Mapping[str, Any] | None): Фильтр MongoDB.
+
+        Returns:
+            int: Количество документов.
+        """
+        return await cls.collection().count_documents(filter_by or {})
+
+    @classmethod
+    @mongo_handler
+    async def insert_one(cls, document: Document) -> Any:
+        """
+        Создает документ.
+
+        Args:
+            document (Document): Документ.
+
+        Returns:
+            Any: `_id` созданного документа.
+        """
+        result = await cls.collection().insert_one(document)
+        return result.inserted_id
+
+    @classmethod
+    @mongo_handler
+    async def insert_many(
+        cls,
+        documents: Iterable[Document],
+        ordered: bool = True,
+        batch_size: int | None = None,
+    ) -> list[Any]:
+        """
+        Создает документы батчами по `batch_size`, по одному запросу на батч.
+
+        При `ordered=True` вставка останавливается на первой ошибке (например, дубликате ключа),
+        при `ordered=False` сервер вставляет все документы, кроме ошибочных, и продолжает
+        со следующим батчем - так быстрее, если порядок не важен. Ошибки документов логируются.
+
+        Если ошибка MongoDB (не ошибка документа) случилась после записи первых батчей,
+        она логируется, а метод возвращает `_id` уже созданных документов без следующих батчей.
+
+        Args:
+            documents (Iterable[Document]): Документы.
+            ordered (bool): Выполнять вставку по порядку и останавливаться на первой ошибке.
+            batch_size (int | None): Размер батча, по умолчанию `bulk_batch_size`.
+
+        Returns:
+            list[Any]: `_id` успешно созданных документов.
+        """
+        inserted_ids = []
+        for batch in _chunked(documents, batch_size or cls.bulk_batch_size):
+            try:
+                result = await cls.collection().insert_many(batch, ordered=ordered)
+                inserted_ids.extend(result.inserted_ids)
+            except BulkWriteError as e:
+                cls._log_write_errors(e, "insert_many")
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                if ordered:
+                    inserted_ids.extend(document["_id"] for document in batch[:min(failed, default=len(batch))])
+                    break
+                inserted_ids.extend(
+                    document["_id"] for index, document in enumerate(batch) if index not in failed
+                )
+            except PyMongoError as e:
+                if not inserted_ids:
+                    raise
+                cls._log_partial_failure(e, "insert_many")
+                break
+        return inserted_ids
+
+    @classmethod
+    @mongo_handler
+    async def bulk_write(
+        cls,
+        operations: Iterable[Any],
+        ordered: bool = True,
+        batch_size: int | None = None,
+    ) -> MongoBulkResult:
+        """
+        Выполняет операции записи (`InsertOne`, `UpdateOne`, `ReplaceOne`, `DeleteOne` и т.д.)
+        батчами по `batch_size`, по одному запросу на батч.
+
+        Если ошибка MongoDB (не ошибка операции) случилась после выполнения первых батчей,
+        она логируется, а метод возвращает накопленный результат с `failed_at` - номером первой
+        невыполненной операции. Ошибка в первом батче обрабатывается как в остальных методах.
+
+        Args:
+            operations (Iterable[Any]): Операции pymongo.
+            ordered (bool): Выполнять по порядку и останавливаться на первой ошибке.
+            batch_size (int | None): Размер батча, по умолчанию `bulk_batch_size`.
+
+        Returns:
+            MongoBulkResult: Суммарные счетчики и ошибки операций с индексами во входной последовательности.
+        """
+        total = MongoBulkResult()
+        offset = 0
+        for batch in _chunked(operations, batch_size or cls.bulk_batch_size):
+            try:
+                result = await cls.collection().bulk_write(batch, ordered=ordered)
+                total.add(result.bulk_api_result, offset)
+            except BulkWriteError as e:
+                cls._log_write_errors(e, "bulk_write")
+                total.add(e.details, offset)
+                if ordered:
+                    break
+            except PyMongoError as e:
+                if not offset:
+                    raise
+                cls._log_partial_failure(e, "bulk_write")
+                total.failed_at = offset
+                break
+            offset += len(batch)
+        return total
+
+    @classmethod
+    async def upsert_many(
+        cls,
+        documents: Iterable[Document],
+        key_fields: Sequence[str],
+        batch_size: int | None = None,
+    ) -> MongoBulkResult | None:
+        """
+        Создает или обновляет документы по ключевым полям одним `bulk_write` на батч.
+
+        Для быстрого поиска по `key_fields` на них должен быть (уникальный) индекс.
+
+        Args:
+            documents (Iterable[Document]): Документы.
+            key_fields (Sequence[str]): Поля, по которым ищется существующий документ.
+            batch_size (int | None): Размер батча, по умолчанию `bulk_batch_size`.
+
+        Returns:
+            MongoBulkResult | None: Суммарный результат или None при ошибке MongoDB в первом батче.
+        """
+        operations = (
+            UpdateOne({key: document[key] for key in key_fields}, {"$set": document}, upsert=True)
+            for document in documents
+        )
+        return await cls.bulk_write(operations, ordered=False, batch_size=batch_size)
+
+    @classmethod
+    @mongo_handler
+    async def update_many(cls, filter_by: Mapping[str, Any], update: Mapping[str, Any]) -> int:
+        """
+        Обновляет документы, соответствующие фильтру.
+
+        Args:
+            filter_by (Mapping[str, Any]): Фильтр MongoDB.
+            update (Mapping[str, Any]): Операторы обновления, например {"$set": {...}}.
+
+        Returns:
+            int: Количество измененных документов.
+        """
+        result = await cls.collection().update_many(filter_by, update)
+        return result.modified_count
+
+    @classmethod
+    @mongo_handler
+    async def delete_many(cls, filter_by: Mapping[str, Any]) -> int:
+        """
+        Удаляет документы, соответствующие фильтру.
+
+        Args:
+            filter_by (Mapping[str, Any]): Фильтр MongoDB.
+
+        Returns:
+            int: Количество удаленных документов.
+        """
+        result = await cls.collection().delete_many(filter_by)
+        return result.deleted_count
+
+    @classmethod
+    def _log_write_errors(cls, e: BulkWriteError, operation: str) -> None:
+        errors = e.details.get("writeErrors", [])
+        logger.warning(
+            f"Mongo Exc: {len(errors)} documents failed in {operation}",
+            extra={"collection": cls.collection_name, "first_error": errors[0].get("errmsg") if errors else None},
+        )
+
+    @classmethod
+    def _log_partial_failure(cls, e: PyMongoError, operation: str) -> None:
+        # Ошибка не доходит до `mongo_handler`, поэтому метрика и лог пишутся здесь
+        dao_query_errors_total.labels(cls.__name__, operation).inc()
+        cls._log_error(e, operation)
+
+    @classmethod
+    def _log_error(cls, e: Exception, operation: str) -> None:
+        """
+        Логирует ошибки, возникающие при выполнении операций с MongoDB.
+
+        Args:
+            e (Exception): Исключение, которое произошло.
+            operation (str): Название операции для логирования.
+        """
+        logger.error(
+            f"Mongo Exc: Cannot {operation} data in collection",
+            extra={"collection": cls.collection_name},
+            exc_info=True,
+        )
+
+
+async def ensure_all_indexes() -> None:
+    """
+    Создает индексы всех подклассов MongoDAO. Ошибки логируются и не прерывают старт приложения.
+
+    Если MongoDB недоступна, остальные коллекции не проверяются, чтобы старт не ждал таймаут
+    выбора сервера для каждой из них.
+    """
+    for dao in MongoDAO.registry.values():
+        try:
+            await dao.ensure_indexes()
+        except ConnectionFailure as e:
+            dao._log_error(e, "ensure_indexes")
+            return
+        except PyMongoError as e:
+            dao._log_error(e, "ensure_indexes")
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
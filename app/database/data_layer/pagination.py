@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) пагинация для DAO
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Generic, Literal, Sequence, TypeVar
+
+from sqlalchemy import Column, Table, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.database.data_layer.codecs import from_jsonable, to_jsonable
+from app.exceptions.database import InvalidCursorError
+
+ITEM = TypeVar("ITEM")
+
+Direction = Literal["next", "prev"]
+
+
+@dataclass
+class KeysetPage(Generic[ITEM]):
+    """
+    Страница keyset-пагинации.
+
+    Attributes:
+        items (list): Записи страницы в порядке сортировки.
+        next_cursor (str | None): Курсор следующей страницы или None, если это последняя страница.
+        prev_cursor (str | None): Курсор предыдущей страницы или None, если это первая страница.
+    """
+    items: list[ITEM] = field(default_factory=list)
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def keyset_columns(table: Table, order_by: str | None = None) -> list[Column]:
+    """
+    Возвращает колонки, по которым выполняется seek: колонку сортировки и первичный ключ.
+
+    Первичный ключ добавляется в конец, чтобы порядок был строгим даже для неуникальной колонки.
+    Колонка сортировки должна быть NOT NULL: сравнение `(column, pk) > (...)` для строк с NULL
+    не истинно, и такие строки молча выпали бы из всех страниц.
+
+    Args:
+        table (Table): Таблица модели.
+        order_by (str | None): Имя колонки сортировки. По умолчанию сортировка по первичному ключу.
+
+    Returns:
+        list[Column]: Колонки ключа пагинации.
+
+    Raises:
+        ValueError: Если колонки нет, она допускает NULL или по ней не построен индекс.
+    """
+    primary_key = list(table.primary_key.columns)
+    if order_by is None:
+        return primary_key
+
+    column = table.columns.get(order_by)
+    if column is None:
+        raise ValueError(f"Column {order_by} does not exist in table {table.name}")
+    if column.primary_key:
+        return [column]
+    if column.nullable:
+        raise ValueError(f"Column {order_by} is nullable, keyset pagination requires a NOT NULL column")
+
+    indexed = column.index or column.unique or any(
+        next(iter(index.columns)) is column for index in table.indexes
+    )
+    if not indexed:
+        raise ValueError(f"Column {order_by} is not indexed, keyset pagination requires an index")
+    return [column, *primary_key]
+
+
+def encode_cursor(columns: Sequence[Column], values: Sequence[Any]) -> str:
+    """
+    Кодирует значения ключа пагинации в непрозрачный курсор.
+
+    Args:
+        columns (Sequence[Column]): Колонки ключа пагинации.
+        values (Sequence[Any]): Значения колонок последней или первой записи страницы.
+
+    Returns:
+        str: Курсор в виде base64url строки.
+    """
+    payload = {"k": [column.name for column in columns], "v": [to_jsonable(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> tuple:
+    """
+    Декодирует курсор и проверяет, что он выдан для тех же колонок сортировки.
+
+    Args:
+        cursor (str): Курсор, полученный от клиента.
+        columns (Sequence[Column]): Колонки ключа пагинации.
+
+    Returns:
+        tuple: Значения колонок ключа пагинации.
+
+    Raises:
+        InvalidCursorError: Если курсор поврежден или выдан для другой сортировки.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        names, values = payload["k"], payload["v"]
+        matches = names == [column.name for column in columns] and len(values) == len(columns)
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+
+    if not matches or not isinstance(values, list):
+        raise InvalidCursorError("Cursor does not match pagination order")
+    try:
+        return tuple(from_jsonable(column, value) for column, value in zip(columns, values))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor value") from e
+
+
+def seek_condition(columns: Sequence[Column], values: Sequence[Any], direction: Direction) -> ColumnElement:
+    """
+    Строит условие seek относительно значений курсора.
+
+    Args:
+        columns (Sequence[Column]): Колонки ключа пагинации.
+        values (Sequence[Any]): Значения курсора.
+        direction (Direction): "next" - записи после курсора, "prev" - записи до курсора.
+
+    Returns:
+        ColumnElement: Условие для WHERE.
+    """
+    if len(columns) == 1:
+        left, right = columns[0], values[0]
+    else:
+        left, right = tuple_(*columns), tuple_(*values)
+    return left > right if direction == "next" else left < right
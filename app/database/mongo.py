@@ -1,15 +1,53 @@
 """
-Инициализация базы данных Postgres
+Инициализация базы данных MongoDB
 """
 
-# from typing import Any
-#
-# import motor.motor_asyncio
-# from motor.motor_asyncio import AsyncIOMotorCollection
-#
-# from app.core.config import settings
-#
-# client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGO_URL)
-# db = client.<name>_database
-#
-# <names>_collection: AsyncIOMotorCollection[Any] = db.<names>
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app.core.config import settings
+
+# Клиент создается в `init_mongo` при старте приложения. Он потокобезопасен и держит
+# общий пул соединений, поэтому на процесс нужен ровно один клиент
+client: AsyncIOMotorClient | None = None
+
+
+def init_mongo(mongo_client: AsyncIOMotorClient | None = None) -> AsyncIOMotorClient:
+    """
+    Создает клиент MongoDB с настройками пула из `Settings`. Повторный вызов возвращает
+    уже созданный клиент.
+
+    Args:
+        mongo_client (AsyncIOMotorClient | None): Готовый клиент, например mongomock-motor в тестах.
+
+    Returns:
+        AsyncIOMotorClient: Клиент MongoDB.
+    """
+    global client
+    if client is None:
+        client = mongo_client or AsyncIOMotorClient(
+            settings.MONGO_URL,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            # Ожидание свободного соединения ограничено, как и в пуле Postgres
+            waitQueueTimeoutMS=int(settings.MONGO_POOL_TIMEOUT * 1000),
+            connectTimeoutMS=int(settings.MONGO_CONNECT_TIMEOUT * 1000),
+            serverSelectionTimeoutMS=int(settings.MONGO_SERVER_SELECTION_TIMEOUT * 1000),
+            socketTimeoutMS=int(settings.MONGO_SOCKET_TIMEOUT * 1000),
+        )
+    return client
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """
+    Returns:
+        AsyncIOMotorDatabase: База данных приложения (`MONGO_DB`).
+    """
+    return init_mongo()[settings.MONGO_DB]
+
+
+def close_mongo() -> None:
+    """Закрывает клиент и его пул соединений."""
+    global client
+    if client is not None:
+        client.close()
+        client = None
@@ -2,18 +2,201 @@
 Инициализация базы данных Postgres
 """
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column
 
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import (
+    db_pool_checked_out,
+    db_pool_overflow,
+    db_pool_size,
+    db_statement_duration_seconds,
+)
+from app.database.profiler import current_profile
+
+
+def database_params() -> dict:
+    """
+    Returns:
+        dict: Параметры пула и подключения для `create_async_engine` основного сервера и реплик.
+    """
+    return {
+        "pool_size": settings.PG_POOL_SIZE,
+        "max_overflow": settings.PG_MAX_OVERFLOW,
+        # Ожидание свободного соединения ограничено, при исчерпании пула запрос быстро
+        # получает PoolExhaustedError вместо зависания
+        "pool_timeout": settings.PG_POOL_TIMEOUT,
+        "pool_recycle": settings.PG_POOL_RECYCLE,
+        "pool_pre_ping": settings.PG_POOL_PRE_PING,
+        "connect_args": {
+            # Кеш подготовленных выражений asyncpg и SQLAlchemy. За pgbouncer в режиме
+            # transaction pooling оба кеша нужно отключить (PG_STATEMENT_CACHE_SIZE=0)
+            "statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+            "timeout": settings.PG_CONNECT_TIMEOUT,
+        },
+    }
 
-DATABASE_URL = settings.POSTGRES_URL
-DATABASE_PARAMS = {}
 
-engine = create_async_engine(DATABASE_URL, **DATABASE_PARAMS)
+# Движок создается в `init_engine` при старте приложения, а не при импорте модуля
+engine: AsyncEngine | None = None
 
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+async_session_maker = async_sessionmaker(expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
     pass
+
+
+class VersionedMixin:
+    """
+    Колонка `version` - номер версии строки, который увеличивается при каждом UPDATE.
+
+    По версии строятся ETag ответов (см. `app.core.http_cache`) без чтения и сериализации
+    всей записи. Версия подключена как `version_id_col`: ORM увеличивает ее сам и проверяет
+    при flush (оптимистичная блокировка), а массовые UPDATE в `BaseDAO` увеличивают ее явно.
+
+    Колонку в существующей таблице создает миграция: `make migrations` (autogenerate добавит
+    `version` с `server_default` 1, поэтому существующие строки получат версию 1) и `make migrate`.
+    Без миграции запросы к модели падают с ошибкой "column version does not exist".
+    """
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        return {"version_id_col": cls.version}
+
+
+def init_engine() -> AsyncEngine:
+    """
+    Создает движок с настройками пула из `Settings` и привязывает к нему `async_session_maker`.
+
+    Вызывается в lifespan приложения; скрипты вне приложения (бенчмарки, утилиты)
+    вызывают ее сами перед работой с DAO. Повторный вызов возвращает уже созданный движок.
+
+    Returns:
+        AsyncEngine: Движок SQLAlchemy.
+    """
+    global engine
+    if engine is None:
+        engine = create_async_engine(settings.POSTGRES_URL, **database_params())
+        instrument_engine(engine)
+        async_session_maker.configure(bind=engine)
+    return engine
+
+
+async def warm_up_engine(min_size: int | None = None) -> None:
+    """
+    Заранее открывает `min_size` соединений, чтобы первые запросы после деплоя
+    не тратили время на установку соединений.
+
+    Соединения открываются параллельно и возвращаются в пул. Ошибка подключения
+    не прерывает старт приложения: пул откроет соединения по требованию.
+
+    Args:
+        min_size (int | None): Количество открываемых соединений, не больше размера пула.
+            По умолчанию `settings.PG_POOL_MIN_SIZE`.
+    """
+    async_engine = init_engine()
+    min_size = min(settings.PG_POOL_MIN_SIZE if min_size is None else min_size, settings.PG_POOL_SIZE)
+    if min_size <= 0:
+        return
+
+    async def open_connection():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    # Все соединения должны быть открыты одновременно, иначе пул будет отдавать одно и то же
+    results = await asyncio.gather(*(open_connection() for _ in range(min_size)), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning(
+            "Postgres pool warm-up failed",
+            extra={"requested": min_size, "failed": len(errors), "error": repr(errors[0])},
+        )
+
+
+async def dispose_engine(timeout: float | None = None) -> None:
+    """
+    Дожидается завершения транзакций, удерживающих соединения, и закрывает пул.
+
+    Args:
+        timeout (float | None): Максимальное время ожидания в секундах, после которого пул
+            закрывается принудительно. По умолчанию `settings.PG_DRAIN_TIMEOUT`.
+    """
+    global engine
+    if engine is None:
+        return
+    await drain_engine(engine, settings.PG_DRAIN_TIMEOUT if timeout is None else timeout)
+    engine = None
+
+
+async def drain_engine(async_engine: AsyncEngine, timeout: float) -> None:
+    """
+    Ждет, пока все соединения движка вернутся в пул, и закрывает его.
+
+    Args:
+        async_engine (AsyncEngine): Движок SQLAlchemy.
+        timeout (float): Максимальное время ожидания в секундах.
+    """
+    pool = async_engine.pool
+    deadline = time.monotonic() + timeout
+    while pool.checkedout() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if pool.checkedout():
+        logger.warning(
+            "Postgres pool disposed with connections in use",
+            extra={"url": async_engine.url.render_as_string(hide_password=True), "checked_out": pool.checkedout()},
+        )
+    await async_engine.dispose()
+
+
+def instrument_engine(async_engine: AsyncEngine, pool_metrics: bool = True) -> None:
+    """
+    Подключает метрики к движку: время выполнения SQL запросов по типу операции
+    и состояние пула соединений, которое читается только при сборе метрик.
+
+    Args:
+        async_engine (AsyncEngine): Движок SQLAlchemy.
+        pool_metrics (bool): Отдавать метрики пула этого движка (только для основного сервера).
+    """
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _observe_statement(conn, statement, parameters)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None:
+            _observe_statement(conn, exception_context.statement or "", exception_context.parameters)
+
+    if not pool_metrics:
+        return
+    pool = sync_engine.pool
+    db_pool_size.set_function(lambda: getattr(pool, "size", lambda: 0)())
+    db_pool_checked_out.set_function(lambda: getattr(pool, "checkedout", lambda: 0)())
+    db_pool_overflow.set_function(lambda: max(getattr(pool, "overflow", lambda: 0)(), 0))
+
+
+def _observe_statement(conn, statement: str, parameters) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    db_statement_duration_seconds.labels(operation).observe(duration)
+    # Профиль есть только у запросов, выбранных QueryProfilerMiddleware
+    profile = current_profile()
+    if profile is not None:
+        profile.record(statement, parameters, duration)
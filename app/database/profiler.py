@@ -0,0 +1,382 @@
+"""
+Профилирование SQL запросов в рамках HTTP запроса
+"""
+
+import asyncio
+import contextvars
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+
+# Метка метода для запросов, выполненных не через методы BaseDAO
+NO_DAO_METHOD = "-"
+
+_profile: ContextVar["QueryProfile | None"] = ContextVar("query_profile", default=None)
+_dao_method: ContextVar[str] = ContextVar("query_profile_dao_method", default=NO_DAO_METHOD)
+
+_WHITESPACE = re.compile(r"\s+")
+# Параметры запроса и литералы: $1 (asyncpg), %(name)s, ?, строки и числа
+_VALUES = re.compile(r"\$\d+|%\(\w+\)s|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Списки значений IN (...) и VALUES (...) разной длины дают одну форму
+_VALUE_LIST = re.compile(r"\(\?(?:, \?)+\)")
+# Блокировки строк и функции с побочными эффектами, которые не отменяет откат транзакции.
+# Такие запросы не повторяются в EXPLAIN ANALYZE: он выполняет запрос по-настоящему
+_LOCKING = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+_SIDE_EFFECTS = re.compile(
+    r"\b(?:nextval|setval|pg_advisory\w*|pg_try_advisory\w*|pg_notify|pg_cancel_backend|pg_terminate_backend"
+    r"|set_config|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE,
+)
+
+query_profiler_n_plus_one_total = registry.counter(
+    "query_profiler_n_plus_one_total", "Profiled requests with repeated statements of the same shape.", ("route",)
+)
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """
+    Приводит запрос к форме без значений, чтобы одинаковые по структуре запросы совпадали.
+
+    Args:
+        statement (str): Текст SQL запроса.
+
+    Returns:
+        str: Форма запроса.
+    """
+    shape = _VALUES.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return _VALUE_LIST.sub("(?)", shape)
+
+
+def explainable(statement: str) -> bool:
+    """
+    Проверяет, можно ли повторить запрос в `EXPLAIN ANALYZE` без последствий.
+
+    Args:
+        statement (str): Текст SQL запроса.
+
+    Returns:
+        bool: True для SELECT без блокировок строк и без вызовов функций с побочными эффектами.
+    """
+    return (
+        statement.lstrip().upper().startswith("SELECT")
+        and _LOCKING.search(statement) is None
+        and _SIDE_EFFECTS.search(statement) is None
+    )
+
+
+@dataclass
+class StatementStats:
+    """Статистика запросов одной формы в рамках HTTP запроса."""
+    shape: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    methods: set[str] = field(default_factory=set)
+
+
+@dataclass
+class SlowStatement:
+    """Медленный запрос, выбранный для EXPLAIN."""
+    statement: str
+    parameters: Any
+    duration: float
+    method: str
+    plan: Any = None
+    error: str | None = None
+
+
+class QueryProfile:
+    """Запросы к базе, выполненные во время одного HTTP запроса."""
+
+    def __init__(self, method: str, path: str):
+        """
+        Args:
+            method (str): HTTP метод запроса.
+            path (str): Путь запроса.
+        """
+        self.id = uuid4().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.count = 0
+        self.total = 0.0
+        self.statements: dict[str, StatementStats] = {}
+        self.methods: dict[str, list] = {}
+        self.slow: list[SlowStatement] = []
+
+    def record(self, statement: str, parameters: Any, duration: float) -> None:
+        """
+        Учитывает выполненный запрос.
+
+        Args:
+            statement (str): Текст SQL запроса.
+            parameters (Any): Параметры запроса.
+            duration (float): Время выполнения в секундах.
+        """
+        method = _dao_method.get()
+        self.count += 1
+        self.total += duration
+
+        shape = statement_shape(statement)
+        stats = self.statements.get(shape)
+        if stats is None:
+            stats = self.statements[shape] = StatementStats(shape)
+        stats.count += 1
+        stats.total += duration
+        stats.max = max(stats.max, duration)
+        stats.methods.add(method)
+
+        totals = self.methods.setdefault(method, [0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+
+        if (
+            duration * 1000 >= settings.PROFILER_SLOW_QUERY_MS
+            and len(self.slow) < settings.PROFILER_EXPLAIN_MAX_PER_REQUEST
+            and explainable(statement)
+            and random.random() < settings.PROFILER_EXPLAIN_SAMPLE_RATE
+        ):
+            self.slow.append(SlowStatement(statement, parameters, duration, method))
+
+    def n_plus_one(self, threshold: int | None = None) -> list[StatementStats]:
+        """
+        Args:
+            threshold (int | None): Количество повторов одной формы, начиная с которого запросы считаются N+1.
+                По умолчанию `settings.PROFILER_N_PLUS_ONE_THRESHOLD`.
+
+        Returns:
+            list[StatementStats]: Формы SELECT запросов, повторенные в запросе не меньше `threshold` раз.
+        """
+        if threshold is None:
+            threshold = settings.PROFILER_N_PLUS_ONE_THRESHOLD
+        return [
+            stats for stats in self.statements.values()
+            if stats.count >= threshold and stats.shape.upper().startswith("SELECT")
+        ]
+
+    def server_timing(self) -> str:
+        """
+        Returns:
+            str: Значение заголовка Server-Timing: время в базе и количество запросов на текущий момент.
+        """
+        elapsed = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.total * 1000:.1f};desc="{self.count} queries", app;dur={elapsed:.1f}'
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: Профиль для отладочного эндпоинта, формы запросов по убыванию общего времени.
+        """
+        statements = sorted(self.statements.values(), key=lambda stats: stats.total, reverse=True)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration * 1000, 3),
+            "queries": self.count,
+            "db_time_ms": round(self.total * 1000, 3),
+            "n_plus_one": [stats.shape for stats in self.n_plus_one()],
+            "methods": {
+                name: {"queries": count, "db_time_ms": round(total * 1000, 3)}
+                for name, (count, total) in self.methods.items()
+            },
+            "statements": [
+                {
+                    "shape": stats.shape,
+                    "count": stats.count,
+                    "total_ms": round(stats.total * 1000, 3),
+                    "max_ms": round(stats.max * 1000, 3),
+                    "methods": sorted(stats.methods),
+                }
+                for stats in statements
+            ],
+            "explain": [
+                {
+                    "statement": slow.statement,
+                    "duration_ms": round(slow.duration * 1000, 3),
+                    "method": slow.method,
+                    "plan": slow.plan,
+                    "error": slow.error,
+                }
+                for slow in self.slow
+            ],
+        }
+
+
+def current_profile() -> QueryProfile | None:
+    """
+    Returns:
+        QueryProfile | None: Профиль текущего запроса или None, если запрос не профилируется.
+    """
+    return _profile.get()
+
+
+@contextmanager
+def profiled_method(name: str) -> Iterator[None]:
+    """
+    Относит запросы внутри блока к методу DAO.
+
+    Args:
+        name (str): Имя метода, например, "TestDAO.find_all".
+    """
+    token = _dao_method.set(name)
+    try:
+        yield
+    finally:
+        _dao_method.reset(token)
+
+
+class QueryProfiler:
+    """
+    Сбор профилей запросов к базе: какие запросы выполнил HTTP запрос, сколько их
+    и сколько времени они заняли, в том числе по методам `BaseDAO`.
+
+    Запросы учитываются обработчиками событий движка (см. `app.database.postgres.instrument_engine`)
+    только внутри `profile()`; вне его обработчик ограничивается чтением ContextVar, поэтому
+    выключенное профилирование почти ничего не стоит. Готовые профили хранятся в памяти процесса
+    (последние `history_size`). Для части медленных SELECT после ответа клиенту выполняется
+    `EXPLAIN (ANALYZE, BUFFERS)` в отдельном соединении: запрос выполняется повторно, но не
+    в транзакции и не во время HTTP запроса. Несколько EXPLAIN одновременно не выполняются.
+    EXPLAIN выполняется на реплике, если она есть, и всегда в read only транзакции, которая затем
+    откатывается; SELECT с блокировками строк и функциями с побочными эффектами не повторяются.
+    """
+
+    def __init__(self, history_size: int | None = None):
+        """
+        Args:
+            history_size (int | None): Количество последних профилей, которые хранятся в памяти.
+                По умолчанию `settings.PROFILER_HISTORY_SIZE`.
+        """
+        if history_size is None:
+            history_size = settings.PROFILER_HISTORY_SIZE
+        self.history: deque[QueryProfile] = deque(maxlen=history_size)
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+    @contextmanager
+    def profile(self, method: str, path: str) -> Iterator[QueryProfile]:
+        """
+        Профилирует запросы к базе внутри блока.
+
+        Args:
+            method (str): HTTP метод запроса.
+            path (str): Путь запроса.
+
+        Yields:
+            QueryProfile: Профиль, который заполняется по мере выполнения запросов.
+        """
+        profile = QueryProfile(method, path)
+        token = _profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _profile.reset(token)
+            self.finish(profile)
+
+    def finish(self, profile: QueryProfile) -> None:
+        """
+        Сохраняет профиль, сообщает о вероятных N+1 и запускает EXPLAIN медленных запросов.
+
+        Args:
+            profile (QueryProfile): Завершенный профиль.
+        """
+        profile.duration = time.perf_counter() - profile.started
+        self.history.append(profile)
+        for stats in profile.n_plus_one():
+            query_profiler_n_plus_one_total.labels(profile.path).inc()
+            logger.warning(
+                "Possible N+1 queries",
+                extra={
+                    "path": profile.path,
+                    "profile_id": profile.id,
+                    "count": stats.count,
+                    "statement": stats.shape,
+                    "methods": sorted(stats.methods),
+                },
+            )
+        if profile.slow and not self._explaining:
+            self._explaining = True
+            # Пустой контекст: EXPLAIN не профилируется и не ограничен дедлайном запроса
+            task = asyncio.create_task(self._explain(profile), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def recent(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """
+        Args:
+            limit (int | None): Максимальное количество профилей. None - все сохраненные.
+
+        Returns:
+            list[dict[str, Any]]: Последние профили, новые первыми.
+        """
+        profiles = list(reversed(self.history))
+        return [profile.to_dict() for profile in profiles[:limit]]
+
+    def get(self, profile_id: str) -> dict[str, Any] | None:
+        """
+        Args:
+            profile_id (str): Идентификатор профиля.
+
+        Returns:
+            dict[str, Any] | None: Профиль или None, если он уже вытеснен из истории.
+        """
+        for profile in self.history:
+            if profile.id == profile_id:
+                return profile.to_dict()
+        return None
+
+    async def _explain(self, profile: QueryProfile) -> None:
+        # Импорт здесь: модуль подключается к движку в app.database.postgres
+        from app.database import postgres
+        from app.database.replicas import replica_router
+
+        try:
+            for slow in profile.slow:
+                replica = replica_router.choose()
+                engine = replica.engine if replica is not None else postgres.engine
+                if engine is None:
+                    return
+                try:
+                    async with engine.connect() as connection:
+                        timeout_ms = int(settings.PROFILER_EXPLAIN_TIMEOUT * 1000)
+                        await connection.execute(text("SET TRANSACTION READ ONLY"))
+                        await connection.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+                        result = await connection.exec_driver_sql(
+                            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {slow.statement}", slow.parameters
+                        )
+                        slow.plan = result.scalar()
+                        await connection.rollback()
+                except Exception as e:
+                    slow.error = repr(e)
+                    logger.warning("Cannot EXPLAIN slow query", extra={"statement": slow.statement}, exc_info=True)
+                    continue
+                logger.warning(
+                    "Slow query",
+                    extra={
+                        "path": profile.path,
+                        "profile_id": profile.id,
+                        "duration_ms": round(slow.duration * 1000, 3),
+                        "method": slow.method,
+                        "statement": slow.statement,
+                    },
+                )
+        finally:
+            self._explaining = False
+
+
+query_profiler = QueryProfiler()
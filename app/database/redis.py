@@ -1,77 +1,496 @@
 """
 Инициализация подключения к Redis и базовых методов
 """
-#
-# import json
-#
-# import redis.asyncio as aioredis
-#
-# import redis
-# from app.core.config import settings
-# from app.core.logger import logger
-#
-#
-# # Создаем синхронного клиента Redis для выполнения синхронных операций
-# sync_redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
-#
-#
-# class RedisCache:
-#     """Класс для работы с Redis кешем асинхронно."""
-#
-#     def __init__(self):
-#         """Инициализация асинхронного клиента Redis с использованием настроек из конфигурации."""
-#         self.redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
-#
-#     async def get(self, key: str):
-#         """
-#         Получает значение из Redis по ключу асинхронно.
-#
-#         Args:
-#             key (str): Ключ для поиска в Redis.
-#
-#         Returns:
-#             Any: Десериализованное значение из Redis или None, если ключ не найден.
-#         """
-#         value = await self.redis.get(key)  # Получаем значение по ключу
-#         if value:  # Если значение найдено
-#             return json.loads(value)  # Возвращаем десериализованное значение
-#         return None  # Возвращаем None, если значение не найдено
-#
-#     async def set(self, key: str, value: any, expire: int = None):
-#         """
-#         Сохраняет значение в Redis по ключу асинхронно с опциональным временем жизни.
-#
-#         Args:
-#             key (str): Ключ для сохранения в Redis.
-#             value (Any): Значение для сохранения в Redis.
-#             expire (int, optional): Время жизни ключа в секундах. Если не указано, ключ будет сохраняться без срока действия.
-#
-#         """
-#         if expire is not None:
-#             # Сохраняем значение в Redis с временем жизни
-#             await self.redis.set(key, json.dumps(value), ex=expire)
-#         else:
-#             # Сохраняем значение в Redis без времени жизни
-#             await self.redis.set(key, json.dumps(value))
-#
-#     async def delete(self, key: str):
-#         """
-#         Удаляет ключ из Redis асинхронно.
-#
-#         Args:
-#             key (str): Ключ для удаления из Redis.
-#
-#         """
-#         await self.redis.delete(key)  # Удаляем ключ из Redis
-#
-#     async def close(self):
-#         """
-#         Закрывает соединение с Redis асинхронно.
-#
-#         """
-#         await self.redis.close()  # Закрываем соединение с Redis
-#         logger.info("Redis connection close")  # Логируем закрытие соединения
-#
-#
-# # Создаем экземпляр класса RedisCache для использования в приложении
-# redis_cache = RedisCache()
+
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+from uuid import uuid4
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError, ResponseError, WatchError
+
+from app.core.config import settings
+from app.core.deadline import check_deadline, detached
+from app.core.logger import logger
+from app.exceptions.deadline import DeadlineExceededError
+from app.utils.serializers import Serializer, get_serializer
+
+# Снимает блокировку, только если она все еще принадлежит владельцу токена
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class Uncached:
+    """
+    Результат вычисления `get_or_compute`, который возвращается вызывающему, но не сохраняется
+    в кеш, например, значение, устаревшее из-за инвалидации во время вычисления.
+    """
+    value: Any
+
+
+def deadline_bound(func):
+    """
+    Декоратор команды Redis: ожидание ограничено остатком времени до дедлайна запроса
+    (см. `app.core.deadline`), по истечении выбрасывается `DeadlineExceededError`.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        left = check_deadline()
+        if left is None:
+            return await func(*args, **kwargs)
+        timer = asyncio.timeout(left)
+        try:
+            async with timer:
+                return await func(*args, **kwargs)
+        except TimeoutError as e:
+            if not timer.expired():
+                raise
+            raise DeadlineExceededError("Request deadline exceeded") from e
+
+    return wrapper
+
+
+class RedisCache:
+    """Класс для работы с Redis кешем асинхронно."""
+
+    def __init__(self, client: aioredis.Redis | None = None, serializer: Serializer | None = None):
+        """
+        Инициализация кеша. Пул соединений создается в `connect` (в lifespan приложения),
+        а вне приложения - лениво при первой команде.
+
+        Args:
+            client (aioredis.Redis, optional): Готовый клиент, например fakeredis в тестах.
+                Клиент должен возвращать байты (decode_responses=False).
+            serializer (Serializer, optional): Сериализатор значений. По умолчанию
+                `settings.REDIS_SERIALIZER` со сжатием от `settings.REDIS_COMPRESSION_THRESHOLD` байт.
+        """
+        self._client = client
+        self._release_lock_script = None
+        # Сервер без Lua (EVAL отключен или не поддерживается): блокировка снимается через WATCH/MULTI
+        self._lua_unavailable = False
+        self.serializer = serializer or get_serializer(
+            settings.REDIS_SERIALIZER, compression_threshold=settings.REDIS_COMPRESSION_THRESHOLD
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshing: set[str] = set()
+        self._background: set[asyncio.Task] = set()
+        # Момент по time.monotonic(), до которого get_or_compute не обращается к Redis после ошибки
+        self._unavailable_until = 0.0
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Клиент Redis поверх общего пула соединений."""
+        if self._client is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_POOL_SIZE,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+        return self._client
+
+    async def connect(self) -> None:
+        """
+        Создает пул соединений и проверяет доступность Redis. Недоступность Redis не мешает
+        старту приложения: кеш деградирует до чтения из источника.
+        """
+        try:
+            await self.redis.ping()
+            logger.info("Redis connection open")
+        except (RedisError, OSError):
+            self._log_error("connect")
+
+    @deadline_bound
+    async def get(self, key: str) -> Any:
+        """
+        Получает значение из Redis по ключу асинхронно.
+
+        Args:
+            key (str): Ключ для поиска в Redis.
+
+        Returns:
+            Any: Десериализованное значение из Redis или None, если ключ не найден.
+        """
+        value = await self.redis.get(key)
+        if value is not None:
+            return self.serializer.loads(value)
+        return None
+
+    @deadline_bound
+    async def set(self, key: str, value: Any, expire: int | None = None) -> None:
+        """
+        Сохраняет значение в Redis по ключу асинхронно с опциональным временем жизни.
+
+        Args:
+            key (str): Ключ для сохранения в Redis.
+            value (Any): Значение для сохранения в Redis.
+            expire (int, optional): Время жизни ключа в секундах.
+                Если не указано, ключ будет сохраняться без срока действия.
+        """
+        await self.redis.set(key, self.serializer.dumps(value), ex=expire)
+
+    @deadline_bound
+    async def delete(self, key: str) -> None:
+        """
+        Удаляет ключ из Redis асинхронно.
+
+        Args:
+            key (str): Ключ для удаления из Redis.
+        """
+        await self.redis.delete(key)
+
+    @deadline_bound
+    async def mget(self, keys: Iterable[str]) -> list[Any]:
+        """
+        Получает значения нескольких ключей за один запрос (MGET).
+
+        Args:
+            keys (Iterable[str]): Ключи для поиска в Redis.
+
+        Returns:
+            list[Any]: Десериализованные значения в порядке ключей, None для отсутствующих ключей.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        values = await self.redis.mget(keys)
+        return [self.serializer.loads(value) if value is not None else None for value in values]
+
+    @deadline_bound
+    async def mset(self, mapping: Mapping[str, Any], expire: int | Mapping[str, int] | None = None) -> None:
+        """
+        Сохраняет несколько значений за один запрос: команды SET отправляются одним pipeline.
+
+        Args:
+            mapping (Mapping[str, Any]): Ключи и значения для сохранения.
+            expire (int | Mapping[str, int] | None): Время жизни в секундах для всех ключей
+                или отдельно для каждого ключа. Ключи без времени жизни хранятся бессрочно.
+        """
+        if not mapping:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                ttl = expire.get(key) if isinstance(expire, Mapping) else expire
+                pipe.set(key, self.serializer.dumps(value), ex=ttl)
+            await pipe.execute()
+
+    @deadline_bound
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """
+        Удаляет несколько ключей одной командой UNLINK (память освобождается в фоне).
+
+        Args:
+            keys (Iterable[str]): Ключи для удаления из Redis.
+        """
+        keys = list(keys)
+        if keys:
+            await self.redis.unlink(*keys)
+
+    @deadline_bound
+    async def publish(self, channel: str, message: Any) -> None:
+        """
+        Публикует сообщение в канал pub/sub.
+
+        Args:
+            channel (str): Имя канала.
+            message (Any): Сообщение, сериализуемое в JSON.
+        """
+        await self.redis.publish(channel, json.dumps(message))
+
+    def pubsub(self) -> PubSub:
+        """
+        Создает объект подписки pub/sub на отдельном соединении.
+
+        Returns:
+            PubSub: Объект подписки Redis.
+        """
+        return self.redis.pubsub(ignore_subscribe_messages=True)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        beta: float = 1.0,
+        lock_timeout: float = 5.0,
+        negative_expire: int | None = None,
+    ) -> Any:
+        """
+        Возвращает значение из кеша, при промахе вычисляет его с защитой от cache stampede.
+
+        - Single-flight в процессе: одновременные промахи по ключу ждут одно вычисление.
+        - Блокировка в Redis с коротким сроком аренды: между воркерами значение вычисляет один,
+          остальные ждут его появления в кеше, пока блокировка не снята (владелец получил None
+          или ошибку), но не дольше `lock_timeout`, после чего вычисляют сами.
+        - Вероятностное раннее обновление (XFetch): чем ближе истечение и чем дольше вычисление,
+          тем выше шанс, что очередное чтение запустит фоновое обновление до истечения ключа.
+
+        Значение хранится в конверте с длительностью вычисления и временем истечения, поэтому
+        ключи `get_or_compute` нужно читать только через этот метод. None кешируется только
+        с `negative_expire` (например, отсутствующая строка), иначе не кешируется. Результат,
+        обернутый `compute` в `Uncached`, возвращается без сохранения в кеш.
+        Ошибки Redis не прерывают вызов: значение вычисляется напрямую, а следующие
+        `settings.REDIS_CIRCUIT_COOLDOWN` секунд метод не обращается к Redis, чтобы промахи
+        не ждали таймаутов недоступного сервера.
+
+        Args:
+            key (str): Ключ в Redis.
+            compute (Callable[[], Awaitable[Any]]): Корутина-функция, вычисляющая значение.
+            expire (int): Время жизни значения в секундах.
+            beta (float): Коэффициент раннего обновления. 0 отключает раннее обновление, больше 1 - обновляет раньше.
+            lock_timeout (float): Срок аренды блокировки вычисления в секундах.
+            negative_expire (int | None): Время жизни результата None в секундах. None - не кешировать.
+
+        Returns:
+            Any: Значение из кеша или вычисленное значение.
+        """
+        envelope = await self._get_envelope(key)
+        if envelope is not None:
+            if key not in self._refreshing and self._should_refresh_early(envelope, beta):
+                self._spawn_refresh(key, compute, expire, lock_timeout, negative_expire)
+            return envelope["v"]
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._compute_locked(key, compute, expire, lock_timeout, negative_expire, wait=True)
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget_inflight(key, done))
+        return await asyncio.shield(future)
+
+    def discard_inflight(self, key: str) -> None:
+        """
+        Следующие вызовы `get_or_compute` по ключу не присоединяются к уже идущему вычислению,
+        а начинают новое. Вызывается при инвалидации: идущее вычисление могло прочитать старые данные.
+
+        Args:
+            key (str): Ключ в Redis.
+        """
+        self._inflight.pop(key, None)
+
+    def _forget_inflight(self, key: str, future: asyncio.Future) -> None:
+        """Убирает завершенное вычисление из single-flight, если его еще не заменило новое."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    @staticmethod
+    def _should_refresh_early(envelope: dict, beta: float) -> bool:
+        """
+        Решает, обновлять ли значение заранее, по алгоритму XFetch.
+
+        Args:
+            envelope (dict): Конверт значения с длительностью вычисления `d` и временем истечения `x`.
+            beta (float): Коэффициент раннего обновления.
+
+        Returns:
+            bool: True, если пора обновить значение.
+        """
+        if beta <= 0:
+            return False
+        return time.time() - envelope["d"] * beta * math.log(1.0 - random.random()) >= envelope["x"]
+
+    def _spawn_refresh(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        lock_timeout: float,
+        negative_expire: int | None,
+    ) -> None:
+        """Запускает фоновое обновление ключа, если его еще не обновляет этот процесс."""
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                # Обновление переживает запрос, который его запустил, и не ограничено его дедлайном
+                with detached():
+                    await self._compute_locked(key, compute, expire, lock_timeout, negative_expire, wait=False)
+            except Exception:
+                logger.warning("Cannot refresh cache key in background", extra={"key": key}, exc_info=True)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _compute_locked(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        lock_timeout: float,
+        negative_expire: int | None,
+        wait: bool,
+    ) -> Any:
+        """
+        Вычисляет значение под блокировкой в Redis и сохраняет его в кеш.
+
+        Args:
+            key (str): Ключ в Redis.
+            compute (Callable[[], Awaitable[Any]]): Корутина-функция, вычисляющая значение.
+            expire (int): Время жизни значения в секундах.
+            lock_timeout (float): Срок аренды блокировки в секундах.
+            negative_expire (int | None): Время жизни результата None в секундах. None - не кешировать.
+            wait (bool): Ждать значение от владельца блокировки. Если False и блокировка занята,
+                вычисление пропускается (используется для фонового обновления).
+
+        Returns:
+            Any: Вычисленное значение, значение владельца блокировки или None, если вычисление пропущено.
+        """
+        lock_key = f"lock:{key}"
+        token = uuid4().hex
+        acquired = True
+        if self._available():
+            try:
+                acquired = bool(await self.redis.set(lock_key, token, nx=True, px=int(lock_timeout * 1000)))
+            except (RedisError, OSError):
+                self._trip("acquire lock")
+                token = None
+        else:
+            token = None
+
+        if not acquired:
+            if not wait:
+                return None
+            envelope = await self._wait_for_envelope(key, lock_key, lock_timeout)
+            if envelope is not None:
+                return envelope["v"]
+
+        try:
+            started = time.monotonic()
+            value = await compute()
+            if isinstance(value, Uncached):
+                return value.value
+            if value is not None:
+                await self._set_envelope(key, value, time.monotonic() - started, expire)
+            elif negative_expire:
+                await self._set_envelope(key, None, time.monotonic() - started, negative_expire)
+            return value
+        finally:
+            if acquired and token is not None:
+                try:
+                    await self._release_lock(lock_key, token)
+                except (RedisError, OSError):
+                    self._trip("release lock")
+
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        """
+        Снимает блокировку вычисления, если она все еще принадлежит этому вызову.
+
+        Атомарность проверки и удаления обеспечивает Lua скрипт. Если сервер не выполняет
+        скрипты (ошибка команды, а не соединения), используется оптимистичная транзакция.
+        """
+        if not self._lua_unavailable:
+            if self._release_lock_script is None:
+                self._release_lock_script = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+            try:
+                await self._release_lock_script(keys=[lock_key], args=[token])
+                return
+            except ResponseError:
+                logger.warning("Redis Exc: Lua scripts unavailable, releasing locks with WATCH", exc_info=True)
+                self._lua_unavailable = True
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock_key)
+                if await pipe.get(lock_key) != token.encode():
+                    return
+                pipe.multi()
+                pipe.delete(lock_key)
+                await pipe.execute()
+            except WatchError:
+                # Блокировка изменилась между проверкой и удалением: ее уже взял другой владелец
+                pass
+
+    async def _wait_for_envelope(self, key: str, lock_key: str, timeout: float) -> dict | None:
+        """
+        Ждет, пока владелец блокировки сохранит значение, не дольше `timeout` секунд.
+        Ожидание заканчивается раньше, если блокировка снята без значения.
+        """
+        left = check_deadline()
+        if left is not None:
+            timeout = min(timeout, left)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            try:
+                envelope, locked = await self._poll_envelope(key, lock_key)
+            except (RedisError, OSError):
+                self._trip("wait for value")
+                return None
+            if envelope is not None or not locked:
+                return envelope
+        return None
+
+    @deadline_bound
+    async def _poll_envelope(self, key: str, lock_key: str) -> tuple[dict | None, bool]:
+        """Читает конверт значения и проверяет блокировку вычисления за один запрос."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(lock_key)
+            value, locked = await pipe.execute()
+        return (self.serializer.loads(value) if value is not None else None), bool(locked)
+
+    async def _get_envelope(self, key: str) -> dict | None:
+        if not self._available():
+            return None
+        try:
+            return await self.get(key)
+        except (RedisError, OSError):
+            self._trip("get")
+            return None
+
+    async def _set_envelope(self, key: str, value: Any, delta: float, expire: int) -> None:
+        if not self._available():
+            return
+        envelope = {"v": value, "d": delta, "x": time.time() + expire}
+        try:
+            await self.set(key, envelope, expire=expire)
+        except (RedisError, OSError):
+            self._trip("set")
+
+    def _available(self) -> bool:
+        """False, пока после ошибки Redis не прошло `settings.REDIS_CIRCUIT_COOLDOWN` секунд."""
+        return time.monotonic() >= self._unavailable_until
+
+    def _trip(self, operation: str) -> None:
+        """Записывает ошибку Redis и отключает обращения get_or_compute к Redis на время охлаждения."""
+        self._log_error(operation)
+        self._unavailable_until = time.monotonic() + settings.REDIS_CIRCUIT_COOLDOWN
+
+    @staticmethod
+    def _log_error(operation: str) -> None:
+        logger.warning(f"Redis Exc: Cannot {operation}", exc_info=True)
+
+    async def close(self) -> None:
+        """
+        Закрывает соединение с Redis асинхронно и отменяет фоновые обновления кеша.
+        """
+        for task in list(self._background):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose(close_connection_pool=True)
+            self._client = None
+            self._release_lock_script = None
+        logger.info("Redis connection close")
+
+
+# Создаем экземпляр класса RedisCache для использования в приложении
+redis_cache = RedisCache()
@@ -0,0 +1,188 @@
+"""
+Маршрутизация чтения на реплики Postgres
+"""
+
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+from app.database.postgres import database_params, drain_engine, instrument_engine
+
+# Чтение с основного сервера в текущем контексте (запросе): после записи, чтобы реплика
+# с задержкой репликации не вернула старые данные
+_read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+db_replicas_healthy = registry.gauge("db_replicas_healthy", "Read replicas currently accepting queries.")
+
+
+def pin_primary() -> None:
+    """
+    Направляет все последующие чтения текущего запроса на основной сервер (read-your-writes).
+
+    Вызывается автоматически после каждой записи через DAO и при открытии unit of work.
+    Закрепление действует до конца текущей задачи asyncio, то есть до конца HTTP запроса.
+    """
+    _read_from_primary.set(True)
+
+
+def is_primary_pinned() -> bool:
+    """
+    Returns:
+        bool: True, если чтения текущего запроса закреплены за основным сервером.
+    """
+    return _read_from_primary.get()
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Временно направляет чтения внутри блока на основной сервер."""
+    token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(token)
+
+
+class Replica:
+    """Реплика со своим движком и пулом соединений."""
+
+    def __init__(self, url: str):
+        """
+        Args:
+            url (str): URL подключения к реплике.
+        """
+        self.engine: AsyncEngine = create_async_engine(url, **database_params())
+        instrument_engine(self.engine, pool_metrics=False)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = True
+
+    def in_use(self) -> int:
+        """
+        Returns:
+            int: Количество соединений реплики, выданных из пула.
+        """
+        return self.engine.pool.checkedout()
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения.
+
+    Чтение уходит на исправную реплику с наименьшим числом занятых соединений
+    (least connections). Реплика, на которой не удалось получить соединение, исключается
+    из выбора; фоновая проверка раз в `health_interval` секунд возвращает ее после
+    успешного `SELECT 1`. Если исправных реплик нет или чтения закреплены за основным
+    сервером, выбор возвращает None и чтение идет на основной сервер.
+    """
+
+    def __init__(self, health_interval: float = 5.0, health_timeout: float = 2.0):
+        """
+        Args:
+            health_interval (float): Интервал проверки реплик в секундах.
+            health_timeout (float): Таймаут одной проверки в секундах.
+        """
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.replicas: list[Replica] = []
+        self._task: asyncio.Task | None = None
+        db_replicas_healthy.set_function(lambda: sum(replica.healthy for replica in self.replicas))
+
+    def init(self, urls: list[str]) -> None:
+        """
+        Создает движки реплик. Повторный вызов ничего не делает.
+
+        Args:
+            urls (list[str]): URL подключения к репликам.
+        """
+        if not self.replicas:
+            self.replicas = [Replica(url) for url in urls]
+
+    def choose(self) -> Replica | None:
+        """
+        Возвращает реплику для чтения.
+
+        Returns:
+            Replica | None: Исправная реплика с наименьшим числом занятых соединений
+                или None, если чтение нужно выполнить на основном сервере.
+        """
+        if _read_from_primary.get():
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        # Случайный второй ключ распределяет запросы между одинаково загруженными репликами
+        return min(healthy, key=lambda replica: (replica.in_use(), random.random()))
+
+    def eject(self, replica: Replica, error: BaseException) -> None:
+        """
+        Исключает реплику из выбора до следующей успешной проверки.
+
+        Args:
+            replica (Replica): Реплика.
+            error (BaseException): Ошибка, из-за которой реплика исключена.
+        """
+        if replica.healthy:
+            replica.healthy = False
+            logger.warning("Postgres replica ejected", extra={"replica": replica.name, "error": repr(error)})
+
+    async def start(self) -> None:
+        """Запускает фоновую проверку реплик, если они настроены."""
+        if self._task is None and self.replicas:
+            self._task = asyncio.create_task(self._run(), name="postgres-replica-health")
+
+    async def close(self, timeout: float | None = None) -> None:
+        """
+        Останавливает проверку и закрывает пулы реплик, дождавшись выполняющихся запросов.
+
+        Args:
+            timeout (float | None): Максимальное время ожидания в секундах. По умолчанию `settings.PG_DRAIN_TIMEOUT`.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if timeout is None:
+            timeout = settings.PG_DRAIN_TIMEOUT
+        await asyncio.gather(*(drain_engine(replica.engine, timeout) for replica in self.replicas))
+        self.replicas = []
+
+    async def check(self, replica: Replica) -> None:
+        """
+        Проверяет реплику и обновляет ее состояние.
+
+        Args:
+            replica (Replica): Реплика.
+        """
+        try:
+            async with asyncio.timeout(self.health_timeout):
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+        except Exception as e:
+            self.eject(replica, e)
+            return
+        if not replica.healthy:
+            replica.healthy = True
+            logger.info("Postgres replica re-admitted", extra={"replica": replica.name})
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.health_interval)
+
+
+replica_router = ReplicaRouter(
+    health_interval=settings.PG_REPLICA_HEALTH_INTERVAL,
+    health_timeout=settings.PG_REPLICA_HEALTH_TIMEOUT,
+)
@@ -0,0 +1,105 @@
+"""
+Unit of work: одна сессия и одна транзакция на запрос
+"""
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.postgres import async_session_maker
+from app.database.replicas import pin_primary, replica_router
+
+_current_session: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
+
+AFTER_COMMIT_KEY = "after_commit"
+
+
+def get_current_session() -> AsyncSession | None:
+    """
+    Возвращает сессию активного unit of work.
+
+    Returns:
+        AsyncSession | None: Сессия текущего unit of work или None, если он не открыт.
+    """
+    return _current_session.get()
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """
+    Открывает сессию и транзакцию, к которым присоединяются все методы DAO внутри блока.
+
+    Транзакция фиксируется при выходе из блока и откатывается при исключении. Вложенный вызов
+    переиспользует уже открытую сессию, фиксацией управляет внешний блок. Unit of work всегда
+    работает с основным сервером и закрепляет за ним чтения до конца запроса.
+
+    Yields:
+        AsyncSession: Сессия unit of work.
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    pin_primary()
+    async with async_session_maker() as session:
+        token = _current_session.set(session)
+        try:
+            async with session.begin():
+                yield session
+        finally:
+            _current_session.reset(token)
+        await run_after_commit(session)
+
+
+@asynccontextmanager
+async def current_or_new_session(read_only: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Возвращает сессию unit of work, а если он не открыт - новую сессию на время блока.
+
+    Новая сессия закрывается при выходе из блока без коммита, поэтому блок подходит
+    для чтения, которое не укладывается в `transaction_handler` (например, потоковой выборки).
+
+    Args:
+        read_only (bool): Блок только читает данные, новую сессию можно открыть на реплике.
+
+    Yields:
+        AsyncSession: Сессия для выполнения запросов.
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    replica = replica_router.choose() if read_only else None
+    session_maker = replica.session_maker if replica is not None else async_session_maker
+    async with session_maker() as session:
+        yield session
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    Регистрирует действие, которое выполнится после фиксации транзакции сессии.
+
+    Используется для побочных эффектов, которые нельзя выполнять до коммита, например
+    для инвалидации кеша: иначе параллельный запрос успеет закешировать старые данные.
+    При откате транзакции действия не выполняются.
+
+    Args:
+        session (AsyncSession): Сессия, после коммита которой выполняется действие.
+        callback (Callable[[], Awaitable[None]]): Корутина-функция без аргументов.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """
+    Выполняет действия, зарегистрированные через `after_commit`, и очищает их список.
+
+    Args:
+        session (AsyncSession): Зафиксированная сессия.
+    """
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        await callback()
@@ -0,0 +1,43 @@
+from typing import AsyncIterator
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.data_layer.loader import request_cache
+from app.database.unit_of_work import unit_of_work
+
+
+async def get_unit_of_work() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость, открывающая одну сессию и транзакцию на весь запрос.
+
+    Методы DAO, вызванные внутри эндпоинта, присоединяются к этой сессии вместо открытия своей.
+    Транзакция фиксируется после выполнения эндпоинта и до отправки ответа, при исключении откатывается.
+
+    Yields:
+        AsyncSession: Сессия запроса.
+    """
+    async with unit_of_work() as session:
+        yield session
+
+
+# Подключение к эндпоинту или роутеру: dependencies=[UnitOfWork]
+UnitOfWork = Depends(get_unit_of_work, scope="function")
+
+
+async def get_request_cache() -> AsyncIterator[dict]:
+    """
+    Зависимость, включающая кеш загруженных по первичному ключу записей на время запроса.
+
+    Повторные вызовы `find_one_or_none` по одному ключу в DAO с `batch_loading` внутри
+    эндпоинта не обращаются к базе. Изменения через DAO очищают кеш своей таблицы.
+
+    Yields:
+        dict: Кеш запроса.
+    """
+    with request_cache() as cache:
+        yield cache
+
+
+# Подключение к эндпоинту или роутеру: dependencies=[RequestCache]
+RequestCache = Depends(get_request_cache, scope="function")
@@ -0,0 +1,23 @@
+"""
+Исключения слоя доступа к данным
+"""
+
+
+class DatabaseError(Exception):
+    """Базовое исключение слоя доступа к данным."""
+
+
+class InvalidCursorError(DatabaseError, ValueError):
+    """Курсор keyset-пагинации поврежден или выдан для другой сортировки."""
+
+
+class PoolExhaustedError(DatabaseError):
+    """В пуле нет свободного соединения: ожидание превысило `PG_POOL_TIMEOUT`."""
+
+
+class QueryTimeoutError(DatabaseError):
+    """Запрос отменен сервером по statement_timeout."""
+
+
+class QueryFailedError(DatabaseError):
+    """Запрос завершился ошибкой, которую `transaction_handler` записал в лог и скрыл, вернув None."""
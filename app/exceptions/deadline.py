@@ -0,0 +1,7 @@
+"""
+Исключения дедлайна запроса
+"""
+
+
+class DeadlineExceededError(Exception):
+    """Время, отведенное на запрос, истекло: работа прервана, а не выполнена частично."""
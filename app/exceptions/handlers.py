@@ -0,0 +1,50 @@
+"""
+Обработчики исключений приложения
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.exceptions.database import PoolExhaustedError, QueryFailedError, QueryTimeoutError
+from app.exceptions.deadline import DeadlineExceededError
+from app.exceptions.services import ExternalServiceError
+from app.exceptions.tasks import TaskQueueFullError
+
+# Через сколько секунд клиенту стоит повторить запрос при перегрузке
+RETRY_AFTER_SECONDS = 1
+
+
+async def overload_handler(request: Request, exc: PoolExhaustedError | TaskQueueFullError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+async def external_service_handler(request: Request, exc: ExternalServiceError) -> JSONResponse:
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
+
+async def query_failed_handler(request: Request, exc: QueryFailedError) -> JSONResponse:
+    # Подробности ошибки уже записаны в лог `transaction_handler`, клиенту они не отдаются
+    return JSONResponse(status_code=503, content={"detail": "Database query failed"})
+
+
+async def timeout_handler(request: Request, exc: DeadlineExceededError | QueryTimeoutError) -> JSONResponse:
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """
+    Подключает обработчики исключений к приложению.
+
+    Args:
+        app (FastAPI): Приложение.
+    """
+    app.add_exception_handler(PoolExhaustedError, overload_handler)
+    app.add_exception_handler(TaskQueueFullError, overload_handler)
+    app.add_exception_handler(ExternalServiceError, external_service_handler)
+    app.add_exception_handler(DeadlineExceededError, timeout_handler)
+    app.add_exception_handler(QueryTimeoutError, timeout_handler)
+    app.add_exception_handler(QueryFailedError, query_failed_handler)
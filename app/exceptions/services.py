@@ -0,0 +1,7 @@
+"""
+Исключения взаимодействия с внешними сервисами
+"""
+
+
+class ExternalServiceError(Exception):
+    """Внешний сервис недоступен: соединение или таймаут не прошли после всех повторов."""
@@ -0,0 +1,15 @@
+"""
+Исключения фоновых задач
+"""
+
+
+class TaskError(Exception):
+    """Базовое исключение фоновых задач."""
+
+
+class UnknownTaskError(TaskError, KeyError):
+    """Задача с таким именем не зарегистрирована."""
+
+
+class TaskQueueFullError(TaskError):
+    """Очередь задач заполнена: место не освободилось за `TASKS_SUBMIT_TIMEOUT`."""
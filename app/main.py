@@ -1,45 +1,178 @@
+import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import IMPORT_STARTED
+from app.api.debug import router as debug_router
+from app.api.metrics import router as metrics_router
+from app.api.v1.export import create_export_router
 from app.api.v1.test_routers import router as test_router
-from app.core.logger import logger
+from app.core.config import settings
+from app.core.logger import configure_logging, logger, start_log_listener, stop_log_listener
+from app.core.metrics import registry
+from app.database.data_layer.cache import invalidation_listener
+from app.database.data_layer.mongo_dao import ensure_all_indexes
+from app.database.data_layer.test_dao import TestDAO
+from app.database.mongo import close_mongo, init_mongo
+from app.database.postgres import dispose_engine, init_engine, warm_up_engine
+from app.database.redis import redis_cache
+from app.database.replicas import replica_router
+from app.exceptions.handlers import register_exception_handlers
+from app.middlewares.admission import AdmissionControlMiddleware
+from app.middlewares.compression import CompressionMiddleware
+from app.middlewares.conditional import ConditionalGetMiddleware
+from app.middlewares.deadline import DeadlineMiddleware
 from app.middlewares.log_requests import LogRequestsMiddleware
+from app.middlewares.metrics import MetricsMiddleware
+from app.middlewares.profiler import QueryProfilerMiddleware
+from app.schemas.tests import TestDTO
+from app.services.rate_limiter import TokenBucketRateLimiter
+from app.services.request_service import request_service
+from app.tasks.runner import task_runner
+from app.tasks.write_behind import WriteBehindBuffer
+from app.utils.cpu_pool import cpu_pool
 
-app = FastAPI(
-    title='FastAPI Template',
-    description='FastAPI Template for OtherCode',
-    debug=True
-)
 
-origins = [
-    "*"
-]
-
-# Подключение роутера
-app.include_router(test_router)
-
-# Добавление CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS", "DELETE", "PATCH", "PUT"],
-    allow_headers=[
-        "Content-Type",
-        "Set-Cookie",
-        "Access-Control-Allow-Headers",
-        "Access-Control-Allow-Origin",
-        "Authorization",
-    ],
+app_import_seconds = registry.gauge(
+    "app_import_seconds", "Time to import the application modules in the worker process."
+)
+app_startup_seconds = registry.gauge(
+    "app_startup_seconds", "Time from import start until the worker was ready to serve requests."
 )
 
-# Добавление вашего кастомного Middleware
-# app.add_middleware(LogRequestsMiddleware)
 
-@app.on_event("startup")
-async def startup_event():
-    pass
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ресурсы приложения: создаются при старте и закрываются при остановке каждого воркера.
+
+    Пулы соединений, фоновые задачи и пул процессов не создаются при импорте, поэтому каждый
+    процесс-воркер (см. `app.__main__`) открывает собственные соединения после запуска.
+    Закрытие каждого ресурса регистрируется до его запуска, поэтому при ошибке на любом шаге
+    старта уже запущенные ресурсы закрываются в обратном порядке.
+    """
+    async with AsyncExitStack() as stack:
+        start_log_listener()
+        stack.callback(stop_log_listener)
+        started = time.perf_counter()
+        stack.push_async_callback(dispose_engine)
+        init_engine()
+        await warm_up_engine()
+        stack.push_async_callback(replica_router.close)
+        replica_router.init(settings.POSTGRES_REPLICA_URLS)
+        await replica_router.start()
+        stack.callback(close_mongo)
+        init_mongo()
+        if settings.MONGO_ENSURE_INDEXES:
+            await ensure_all_indexes()
+        stack.push_async_callback(redis_cache.close)
+        await redis_cache.connect()
+        stack.push_async_callback(invalidation_listener.stop)
+        await invalidation_listener.start()
+        stack.push_async_callback(request_service.close)
+        await request_service.start()
+        # Задания могут использовать пул процессов и буферы записи: они закрываются после остановки воркеров
+        stack.push_async_callback(cpu_pool.close)
+        cpu_pool.start()
+        stack.push_async_callback(WriteBehindBuffer.stop_all)
+        stack.push_async_callback(task_runner.stop)
+        await task_runner.start()
+        ready = time.perf_counter()
+        app_startup_seconds.labels().set(ready - IMPORT_STARTED)
+        logger.info(
+            "Application started",
+            extra={
+                "pid": os.getpid(),
+                "import_seconds": round(app.state.import_seconds, 3),
+                "resources_seconds": round(ready - started, 3),
+                "startup_seconds": round(ready - IMPORT_STARTED, 3),
+            },
+        )
+        yield
+
+
+def create_app() -> FastAPI:
+    """
+    Создает приложение: роутеры, обработчики исключений и middleware.
+
+    Внешние ресурсы здесь не открываются, это делает `lifespan` при старте воркера.
+    Точка входа для `uvicorn app.main:create_app --factory` и `python -m app`.
+
+    Returns:
+        FastAPI: Приложение.
+    """
+    configure_logging()
+    app = FastAPI(
+        title='FastAPI Template',
+        description='FastAPI Template for OtherCode',
+        debug=True,
+        lifespan=lifespan
+    )
+    app.state.import_seconds = time.perf_counter() - IMPORT_STARTED
+    app_import_seconds.labels().set(app.state.import_seconds)
+
+    register_exception_handlers(app)
+
+    origins = [
+        "*"
+    ]
+
+    # Подключение роутера
+    app.include_router(test_router)
+    app.include_router(create_export_router(TestDAO, TestDTO, prefix="/test", tags=["Test"]))
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
+    if settings.PROFILER_ENABLED:
+        app.include_router(debug_router)
+
+    # Middleware, добавленный раньше, оказывается ближе к приложению. ETag вычисляется по телу
+    # до сжатия, а сжатие выполняется внутри контроля нагрузки и учитывается в его лимитах
+    app.add_middleware(ConditionalGetMiddleware)
+    if settings.PROFILER_ENABLED:
+        app.add_middleware(QueryProfilerMiddleware)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    # Контроль нагрузки и дедлайн добавляются раньше CORS, чтобы ответы 429, 503 и 504 получали
+    # CORS заголовки. Дедлайн снаружи контроля нагрузки: ожидание в очереди входит во время запроса
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            rate_limiter=TokenBucketRateLimiter() if settings.RATE_LIMIT_ENABLED else None,
+            client_header=settings.RATE_LIMIT_CLIENT_HEADER,
+        )
+    app.add_middleware(DeadlineMiddleware, default=settings.DEADLINE_DEFAULT)
+
+    # Добавление CORS Middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "OPTIONS", "DELETE", "PATCH", "PUT"],
+        allow_headers=[
+            "Content-Type",
+            "Set-Cookie",
+            "Access-Control-Allow-Headers",
+            "Access-Control-Allow-Origin",
+            "Authorization",
+        ],
+    )
+
+    # Добавление вашего кастомного Middleware
+    app.add_middleware(LogRequestsMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    return app
+
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    pass
\ No newline at end of file
+def __getattr__(name: str):
+    # `app.main:app` для прежних команд запуска: приложение создается при первом обращении, а не при импорте
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,219 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Iterable, Mapping
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.exceptions.handlers import RETRY_AFTER_SECONDS
+from app.middlewares.routing import RouteMatcher
+from app.services.rate_limiter import TokenBucketRateLimiter
+
+# Метка общего лимита в метриках, в отличие от лимитов отдельных роутов
+GLOBAL_LIMIT = "*"
+
+admission_in_flight = registry.gauge(
+    "admission_in_flight", "Requests admitted and currently running per limit.", ("limit",)
+)
+admission_queued = registry.gauge(
+    "admission_queued", "Requests waiting for admission per limit.", ("limit",)
+)
+admission_queue_wait_seconds = registry.histogram(
+    "admission_queue_wait_seconds", "Time requests spent waiting for admission in seconds.", ("limit",)
+)
+admission_shed_total = registry.counter(
+    "admission_shed_total", "Requests rejected by admission control.", ("limit", "reason")
+)
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничение одновременно выполняемых запросов с ограниченной очередью ожидания.
+
+    Если свободного места нет, запрос ждет в очереди FIFO не дольше `queue_timeout` секунд.
+    Если очередь заполнена или ожидание истекло, запрос отклоняется сразу, а не копится:
+    время ответа под перегрузкой остается ограниченным. Освободившееся место передается
+    первому ожидающему напрямую, без гонки с новыми запросами.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        """
+        Args:
+            name (str): Имя лимита в метриках.
+            limit (int): Максимальное количество одновременных запросов.
+            queue_size (int): Максимальное количество ожидающих запросов.
+            queue_timeout (float): Максимальное время ожидания в секундах.
+        """
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._in_flight = admission_in_flight.labels(name)
+        self._queued = admission_queued.labels(name)
+        self._wait = admission_queue_wait_seconds.labels(name)
+
+    async def acquire(self) -> str | None:
+        """
+        Занимает место для запроса.
+
+        Returns:
+            str | None: None, если место получено, иначе причина отказа: "queue_full" или "queue_timeout".
+        """
+        if self.active < self.limit and not self._waiters:
+            self._take()
+            return None
+        if len(self._waiters) >= self.queue_size:
+            admission_shed_total.labels(self.name, "queue_full").inc()
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._queued.inc()
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await future
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Место уже передано этому запросу, но он его не дождался: отдаем следующему
+                self.release()
+            else:
+                future.cancel()
+                self._waiters.remove(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            admission_shed_total.labels(self.name, "queue_timeout").inc()
+            return "queue_timeout"
+        finally:
+            self._queued.dec()
+            self._wait.observe(time.perf_counter() - started)
+        return None
+
+    def release(self) -> None:
+        """Освобождает место: передает его первому ожидающему или уменьшает счетчик."""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                # Место переходит ожидающему: счетчик занятых мест не меняется
+                future.set_result(None)
+                return
+        self.active -= 1
+        self._in_flight.dec()
+
+    def _take(self) -> None:
+        self.active += 1
+        self._in_flight.inc()
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware контроля нагрузки.
+
+    По порядку для каждого запроса:
+    1. Ограничение частоты запросов клиента (token bucket в Redis), при превышении - 429.
+    2. Лимит одновременных запросов роута из `route_limits`, если он задан.
+    3. Общий лимит одновременных запросов процесса.
+    Лимиты 2 и 3 ждут места в ограниченной очереди; при переполнении очереди или истечении
+    ожидания запрос сразу получает 503 с Retry-After. Место роута занимается раньше общего,
+    чтобы запросы к медленному роуту в очереди не держали места остальных роутов.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int | None = None,
+        queue_size: int | None = None,
+        queue_timeout: float | None = None,
+        route_limits: Mapping[str, int] | None = None,
+        exempt_paths: Iterable[str] | None = None,
+        rate_limiter: TokenBucketRateLimiter | None = None,
+        client_header: str | None = None,
+    ):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            max_concurrency (int | None): Общий лимит одновременных запросов.
+                По умолчанию `settings.ADMISSION_MAX_CONCURRENCY`.
+            queue_size (int | None): Размер очереди ожидания каждого лимита.
+                По умолчанию `settings.ADMISSION_QUEUE_SIZE`.
+            queue_timeout (float | None): Максимальное время ожидания места в секундах.
+                По умолчанию `settings.ADMISSION_QUEUE_TIMEOUT`.
+            route_limits (Mapping[str, int] | None): Лимиты одновременных запросов по шаблону пути роута.
+                По умолчанию `settings.ADMISSION_ROUTE_LIMITS`.
+            exempt_paths (Iterable[str] | None): Пути, на которые ограничения не действуют.
+                По умолчанию `settings.ADMISSION_EXEMPT_PATHS`.
+            rate_limiter (TokenBucketRateLimiter | None): Ограничение частоты запросов клиента. None - выключено.
+            client_header (str | None): Заголовок с идентификатором клиента. None - IP адрес клиента.
+        """
+        max_concurrency = settings.ADMISSION_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        queue_size = settings.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        route_limits = settings.ADMISSION_ROUTE_LIMITS if route_limits is None else route_limits
+        self.app = app
+        self.limiter = ConcurrencyLimiter(GLOBAL_LIMIT, max_concurrency, queue_size, queue_timeout)
+        self.route_limiters = {
+            path: ConcurrencyLimiter(path, limit, queue_size, queue_timeout) for path, limit in route_limits.items()
+        }
+        self.exempt_paths = frozenset(settings.ADMISSION_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+        self.rate_limiter = rate_limiter
+        self.client_header = client_header.lower().encode() if client_header else None
+        self._routes = RouteMatcher(lambda route: getattr(route, "path", None) in self.route_limiters)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter is not None:
+            result = await self.rate_limiter.hit(self._client_id(scope))
+            if not result.allowed:
+                admission_shed_total.labels(GLOBAL_LIMIT, "rate_limited").inc()
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+                )
+                await response(scope, receive, send)
+                return
+
+        limiters = [limiter for limiter in (self._route_limiter(scope), self.limiter) if limiter is not None]
+        acquired = []
+        try:
+            for limiter in limiters:
+                if await limiter.acquire() is not None:
+                    await self._reject(scope, receive, send)
+                    return
+                acquired.append(limiter)
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def _route_limiter(self, scope: Scope) -> ConcurrencyLimiter | None:
+        if not self.route_limiters:
+            return None
+        route = self._routes.match(scope)
+        return self.route_limiters[route.path] if route is not None else None
+
+    def _client_id(self, scope: Scope) -> str:
+        if self.client_header is not None:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            {"detail": "Service overloaded, try again later"},
+            status_code=503,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+        await response(scope, receive, send)
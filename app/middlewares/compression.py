@@ -0,0 +1,208 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Типы содержимого, которые имеет смысл сжимать. text/event-stream не сжимается:
+# буферизация до порога задержала бы события
+COMPRESSIBLE_TYPES = frozenset((
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+))
+
+# Ответы с полным телом. Тело 206 - часть представления: сжатие сделало бы Content-Range неверным
+COMPRESSIBLE_STATUSES = frozenset((200, 201, 202, 203))
+
+http_compression_bytes_total = registry.counter(
+    "http_compression_bytes_total", "Response body bytes before and after compression.", ("encoding", "stage")
+)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Z_SYNC_FLUSH отдает клиенту все сжатые данные части, не дожидаясь следующей
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware сжатия ответов gzip или brotli (если установлен пакет `brotli`)
+    по заголовку Accept-Encoding клиента.
+
+    Сжимаются ответы текстовых и JSON типов с полным телом (200-203, без Content-Range),
+    тело которых не меньше `minimum_size` байт.
+    Потоковые ответы (`StreamingResponse`) сжимаются по частям: начало тела копится до порога,
+    после чего каждая часть сжимается и сразу отправляется, так что память не зависит от размера
+    ответа. Если поток закончился раньше порога, он отправляется без сжатия.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int | None = None,
+        gzip_level: int | None = None,
+        brotli_quality: int | None = None,
+    ):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            minimum_size (int | None): Минимальный размер тела ответа для сжатия в байтах.
+                По умолчанию `settings.COMPRESSION_MIN_SIZE`.
+            gzip_level (int | None): Уровень сжатия gzip от 1 до 9. По умолчанию `settings.COMPRESSION_GZIP_LEVEL`.
+            brotli_quality (int | None): Качество сжатия brotli от 0 до 11.
+                По умолчанию `settings.COMPRESSION_BROTLI_QUALITY`.
+        """
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._choose_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        buffer: list[bytes] = []
+        buffered = 0
+        compressor: _GzipCompressor | _BrotliCompressor | None = None
+        passthrough = False
+        bytes_in = http_compression_bytes_total.labels(encoding, "in")
+        bytes_out = http_compression_bytes_total.labels(encoding, "out")
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, buffered, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] == 304:
+                    # 304 без тела заменяет сжатый ответ 200 и должен нести его Vary (RFC 9110, 15.4.5),
+                    # иначе кеш сопоставит ответ с клиентом, не поддерживающим сжатие
+                    MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                    passthrough = True
+                    await send(message)
+                elif (
+                    message["status"] not in COMPRESSIBLE_STATUSES
+                    or "content-range" in headers
+                    or "content-encoding" in headers
+                    or not self._compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                buffer.append(body)
+                buffered += len(body)
+                if buffered < self.minimum_size:
+                    if more_body:
+                        return
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": b"".join(buffer)})
+                    return
+
+                compressor = self._compressor(encoding)
+                body = b"".join(buffer)
+                buffer.clear()
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # Сжатое тело отличается от исходного побайтно
+                    headers["ETag"] = "W/" + headers["etag"]
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    compressed = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(compressed))
+                    bytes_in.inc(len(body))
+                    bytes_out.inc(len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start)
+
+            compressed = compressor.compress(body, final=not more_body)
+            bytes_in.inc(len(body))
+            bytes_out.inc(len(compressed))
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _choose_encoding(self, scope: Scope) -> str | None:
+        """
+        Args:
+            scope (Scope): ASGI scope запроса.
+
+        Returns:
+            str | None: "br" или "gzip" по Accept-Encoding клиента или None, если сжатие не принимается.
+        """
+        accept = Headers(scope=scope).get("accept-encoding")
+        if not accept:
+            return None
+        weights = {}
+        for item in accept.split(","):
+            coding, _, params = item.partition(";")
+            weight = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    weight = float(params[2:])
+                except ValueError:
+                    weight = 0.0
+            weights[coding.strip().lower()] = weight
+        fallback = weights.get("*", 0.0)
+        if brotli is not None and weights.get("br", fallback) > 0:
+            return "br"
+        if weights.get("gzip", fallback) > 0:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding: str) -> _GzipCompressor | _BrotliCompressor:
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    @staticmethod
+    def _compressible(content_type: str) -> bool:
+        media_type = content_type.partition(";")[0].strip().lower()
+        if media_type.startswith("text/"):
+            return media_type != "text/event-stream"
+        return media_type in COMPRESSIBLE_TYPES or media_type.endswith(("+json", "+xml"))
@@ -0,0 +1,102 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.http_cache import HTTP_CACHE_ATTR, NOT_MODIFIED_HEADERS, CachePolicy, body_etag, etag_matches
+from app.core.metrics import registry
+
+http_not_modified_total = registry.counter(
+    "http_not_modified_total", "Responses replaced with 304 Not Modified.", ("stage",)
+)
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI middleware условных GET запросов.
+
+    Для роутов с `http_cache` (см. `app.core.http_cache`) добавляет Cache-Control и, если эндпоинт
+    не задал ETag, вычисляет его по телу ответа. Ответ 200 с ETag, совпадающим с If-None-Match,
+    заменяется на 304 без тела: клиент не скачивает данные заново. Потоковые ответы (тело из
+    нескольких частей) передаются без изменений, ETag для них не вычисляется.
+
+    Ответ 304, который эндпоинт вернул сам через `not_modified`, экономит еще и чтение данных
+    и сериализацию; в метриках он учитывается со stage="endpoint".
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Message | None = None
+        passthrough = False
+        skip_body = False
+
+        async def send_not_modified(message: Message) -> None:
+            headers = [(name, value) for name, value in message["headers"] if name in NOT_MODIFIED_HEADERS]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough, skip_body
+            if passthrough:
+                await send(message)
+                return
+            if skip_body:
+                return
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                policy = self._policy(scope)
+                headers = MutableHeaders(scope=message)
+                if status in (200, 304) and policy is not None and policy.cache_control:
+                    headers.setdefault("Cache-Control", policy.cache_control)
+                if status == 304:
+                    http_not_modified_total.labels("endpoint").inc()
+                if status != 200:
+                    passthrough = True
+                    await send(message)
+                elif "etag" in headers:
+                    if etag_matches(if_none_match, headers["etag"]):
+                        http_not_modified_total.labels("response").inc()
+                        skip_body = True
+                        await send_not_modified(message)
+                    else:
+                        passthrough = True
+                        await send(message)
+                elif policy is not None and policy.etag and scope["method"] == "GET":
+                    # Заголовки ждут тела ответа, по которому вычисляется ETag
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            passthrough = True
+            if message["type"] != "http.response.body" or message.get("more_body", False):
+                await send(start)
+                await send(message)
+                return
+            etag = body_etag(message.get("body", b""))
+            MutableHeaders(scope=start)["ETag"] = etag
+            if etag_matches(if_none_match, etag):
+                http_not_modified_total.labels("response").inc()
+                await send_not_modified(start)
+                return
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _policy(scope: Scope) -> CachePolicy | None:
+        # Роут уже найден маршрутизацией к моменту начала ответа
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        return getattr(endpoint, HTTP_CACHE_ATTR, None)
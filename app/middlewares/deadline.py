@@ -0,0 +1,143 @@
+import asyncio
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.deadline import DEADLINE_ATTR, clear_deadline, deadline_scope
+from app.core.logger import logger
+from app.core.metrics import registry
+from app.middlewares.routing import RouteMatcher
+
+requests_aborted_total = registry.counter(
+    "http_requests_aborted_total", "Requests cancelled before completion.", ("reason",)
+)
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware дедлайна запроса.
+
+    Время на запрос берется из заголовка `header` (секунды), из `request_deadline` на роуте
+    или из `default`; заголовок может только сократить время роута, и оно не больше `max_timeout`.
+    Дедлайн доступен коду запроса через `app.core.deadline`: по нему DAO ставит
+    statement_timeout, а Redis ограничивает ожидание команд.
+
+    Обработка запроса с дедлайном отменяется, когда дедлайн истек (клиент получает 504, если ответ
+    еще не начат) или клиент отключился до конца ответа. Для этого сообщения клиента читает фоновая
+    задача и передает их приложению (включая http.disconnect) через очередь на одно сообщение,
+    так что тело запроса не накапливается в памяти. Работа после отправки ответа (BackgroundTasks)
+    дедлайном и отключением клиента не прерывается. Запросы без дедлайна проходят без изменений.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        header: str | None = None,
+        default: float | None = None,
+        max_timeout: float | None = None,
+    ):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            header (str | None): Заголовок с временем на запрос в секундах. По умолчанию `settings.DEADLINE_HEADER`.
+            default (float | None): Время на запрос по умолчанию в секундах. None - без дедлайна.
+            max_timeout (float | None): Максимальное время на запрос в секундах. По умолчанию `settings.DEADLINE_MAX`.
+        """
+        self.app = app
+        self.header = (header or settings.DEADLINE_HEADER).lower().encode()
+        self.default = default
+        self.max_timeout = settings.DEADLINE_MAX if max_timeout is None else max_timeout
+        self._routes = RouteMatcher(lambda route: hasattr(getattr(route, "endpoint", None), DEADLINE_ATTR))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout = self._timeout(scope)
+        if timeout is None:
+            # Без дедлайна запрос обрабатывается как обычно, без фоновой задачи и очереди
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        messages: asyncio.Queue[Message] = asyncio.Queue(maxsize=1)
+        disconnected = False
+        finished = False
+        response_started = False
+        timer: asyncio.Timeout | None = None
+
+        async def pump() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected = True
+                    # После отправки ответа отключение штатное: работа после ответа
+                    # (BackgroundTasks) не отменяется
+                    if not finished:
+                        task.cancel()
+                    await messages.put(message)
+                    return
+                await messages.put(message)
+
+        async def receive_wrapper() -> Message:
+            # После отключения клиента приложение получает http.disconnect при каждом чтении
+            if disconnected and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, finished
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Ответ отправлен: дедлайн больше не ограничивает работу после ответа
+                finished = True
+                clear_deadline()
+                if timer is not None:
+                    timer.reschedule(None)
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            with deadline_scope(timeout) as deadline:
+                # Дедлайн по time.monotonic() совпадает со временем event loop
+                async with asyncio.timeout_at(deadline) as timer:
+                    await self.app(scope, receive_wrapper, send_wrapper)
+            finished = True
+        except TimeoutError:
+            if timer is None or not timer.expired():
+                raise
+            finished = True
+            requests_aborted_total.labels("deadline").inc()
+            logger.warning("Request deadline exceeded", extra={"path": scope["path"], "timeout": timeout})
+            if not response_started:
+                response = JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+                await response(scope, receive, send)
+        except asyncio.CancelledError:
+            # Отмена из-за отключения клиента не ошибка сервера: отвечать уже некому
+            if not disconnected or task.uncancel() > 0:
+                raise
+            requests_aborted_total.labels("client_disconnected").inc()
+        finally:
+            finished = True
+            pump_task.cancel()
+
+    def _timeout(self, scope: Scope) -> float | None:
+        timeout = self.default
+        route = self._routes.match(scope)
+        if route is not None:
+            timeout = getattr(route.endpoint, DEADLINE_ATTR)
+        for name, value in scope["headers"]:
+            if name == self.header:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    timeout = requested if timeout is None else min(timeout, requested)
+                break
+        if timeout is None:
+            return None
+        return min(timeout, self.max_timeout)
@@ -1,19 +1,118 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+import random
+import time
+from typing import Iterable
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
 from app.core.logger import logger
 
+REDACTED = "[REDACTED]"
+DEFAULT_REDACTED_HEADERS = (
+    "authorization",
+    "proxy-authorization",
+    "cookie",
+    "set-cookie",
+    "x-api-key",
+    "x-auth-token",
+)
+
+
+class LogRequestsMiddleware:
+    """
+    ASGI middleware логирования запросов без буферизации тела.
+
+    Для каждого запроса логируются метод, путь, статус, длительность и размеры тела запроса
+    и ответа. Тело считается по мере того, как его читает приложение, поэтому загрузки и
+    потоковые ответы не накапливаются в памяти. Заголовки и начало тела запроса логируются
+    только для выборки запросов (`body_sample_rate`), если включен `capture_body`;
+    чувствительные заголовки маскируются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        capture_body: bool | None = None,
+        body_sample_rate: float | None = None,
+        max_body_bytes: int | None = None,
+        redact_headers: Iterable[str] = DEFAULT_REDACTED_HEADERS,
+    ):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            capture_body (bool | None): Логировать заголовки и начало тела запроса для выборки запросов.
+                По умолчанию `settings.LOG_REQUEST_BODY`.
+            body_sample_rate (float | None): Доля запросов (от 0 до 1), для которых сохраняется тело.
+                По умолчанию `settings.LOG_BODY_SAMPLE_RATE`.
+            max_body_bytes (int | None): Максимальное количество байт тела в логе.
+                По умолчанию `settings.LOG_BODY_MAX_BYTES`.
+            redact_headers (Iterable[str]): Заголовки, значения которых маскируются.
+        """
+        self.app = app
+        self.capture_body = settings.LOG_REQUEST_BODY if capture_body is None else capture_body
+        self.body_sample_rate = settings.LOG_BODY_SAMPLE_RATE if body_sample_rate is None else body_sample_rate
+        self.max_body_bytes = settings.LOG_BODY_MAX_BYTES if max_body_bytes is None else max_body_bytes
+        self.redact_headers = {header.lower().encode() for header in redact_headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        sampled = self.capture_body and random.random() < self.body_sample_rate
+        captured = bytearray()
+        status = None
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                request_bytes += len(body)
+                if sampled and len(captured) < self.max_body_bytes:
+                    captured.extend(body[:self.max_body_bytes - len(captured)])
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
 
-class LogRequestsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        body = await request.body()
-        form = await request.form()
-        message = f"[{request.method}]: {request.url} body: {body} headers: {request.headers} form: {form}"
-        logger.info(message)
         try:
-            response = await call_next(request)
-        except Exception as e:
-            logger.error(f"[{e}]: {message}")
-            raise e
-        return response
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except Exception:
+            extra = self._build_extra(scope, status or 500, started, request_bytes, response_bytes)
+            logger.error("HTTP request failed", extra=extra, exc_info=True)
+            raise
+
+        extra = self._build_extra(scope, status, started, request_bytes, response_bytes)
+        if sampled:
+            extra["headers"] = self._redacted_headers(scope)
+            extra["body"] = captured.decode("utf-8", errors="replace")
+            extra["body_truncated"] = request_bytes > len(captured)
+        logger.info("HTTP request", extra=extra)
+
+    @staticmethod
+    def _build_extra(scope: Scope, status: int | None, started: float, request_bytes: int, response_bytes: int) -> dict:
+        client = scope.get("client")
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "client": client[0] if client else None,
+        }
+
+    def _redacted_headers(self, scope: Scope) -> dict[str, str]:
+        return {
+            name.decode("latin-1"): REDACTED if name in self.redact_headers else value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
@@ -0,0 +1,51 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import http_request_duration_seconds, http_requests_in_flight, http_requests_total
+
+# Метка для запросов, не попавших ни в один роут: путь не используется как метка,
+# чтобы случайные URL не порождали неограниченное количество временных рядов
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware метрик запросов: количество по роуту и статусу, гистограмма длительности
+    и количество запросов в обработке.
+
+    Роут берется из шаблона пути (`/items/{item_id}`), а не из фактического URL.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+        """
+        self.app = app
+        self.in_flight = http_requests_in_flight.labels()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_request_duration_seconds.labels(method, path).observe(time.perf_counter() - started)
+            http_requests_total.labels(method, path, str(status)).inc()
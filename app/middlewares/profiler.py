@@ -0,0 +1,71 @@
+import random
+from typing import Iterable
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.database.profiler import QueryProfiler, query_profiler
+
+
+class QueryProfilerMiddleware:
+    """
+    ASGI middleware профилирования запросов к базе (см. `app.database.profiler`).
+
+    Профилируется доля `sample_rate` запросов и каждый запрос с заголовком `header`.
+    В ответ профилируемого запроса добавляются заголовки Server-Timing (время в базе
+    и количество SQL запросов к началу ответа) и X-Query-Profile с идентификатором профиля
+    для отладочного эндпоинта `/debug/queries/{profile_id}`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: QueryProfiler = query_profiler,
+        sample_rate: float | None = None,
+        header: str | None = None,
+        exempt_paths: Iterable[str] | None = None,
+    ):
+        """
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            profiler (QueryProfiler): Хранилище профилей.
+            sample_rate (float | None): Доля профилируемых запросов от 0 до 1.
+                По умолчанию `settings.PROFILER_SAMPLE_RATE`.
+            header (str | None): Заголовок запроса, включающий профилирование независимо от `sample_rate`.
+                По умолчанию `settings.PROFILER_HEADER`.
+            exempt_paths (Iterable[str] | None): Пути, которые не профилируются.
+                По умолчанию `settings.PROFILER_EXEMPT_PATHS`.
+        """
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.header = (header or settings.PROFILER_HEADER).lower().encode()
+        self.exempt_paths = tuple(settings.PROFILER_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.profile(scope["method"], scope["path"]) as profile:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", profile.server_timing())
+                    headers["X-Query-Profile"] = profile.id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Шаблон пути известен после маршрутизации: профили одного роута группируются
+                profile.path = getattr(scope.get("route"), "path", scope["path"])
+
+    def _sampled(self, scope: Scope) -> bool:
+        if scope["path"].startswith(self.exempt_paths):
+            return False
+        if any(name == self.header for name, _ in scope["headers"]):
+            return True
+        return random.random() < self.sample_rate
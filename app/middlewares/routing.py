@@ -0,0 +1,74 @@
+from typing import Callable, Iterable, Iterator
+
+from starlette.routing import BaseRoute, Match, Mount, Route
+from starlette.types import Scope
+
+
+def flatten_routes(routes: Iterable[BaseRoute], prefix: str = "") -> Iterator[BaseRoute]:
+    """
+    Разворачивает вложенные роутеры в плоский список HTTP роутов с полными путями.
+
+    В FastAPI до 0.143 `include_router` копирует роуты в приложение, и они уже лежат
+    на верхнем уровне. Начиная с 0.143 подключенный роутер остается одним вложенным элементом,
+    а роуты с префиксами отдает `effective_candidates()`; роуты внутри `Mount` тоже вложены.
+
+    Args:
+        routes (Iterable[BaseRoute]): Роуты приложения или роутера.
+        prefix (str): Префикс пути родительского `Mount`.
+
+    Yields:
+        BaseRoute: Роут, у которого `path` - полный путь, а `endpoint` - исходный эндпоинт.
+    """
+    for route in routes:
+        # FastAPI >= 0.143: подключенный роутер (_IncludedRouter), элементы - вложенные роутеры
+        # или описания роутов с полным путем
+        candidates = getattr(route, "effective_candidates", None)
+        if candidates is not None:
+            for candidate in candidates():
+                if hasattr(candidate, "effective_candidates"):
+                    yield from flatten_routes([candidate], prefix)
+                elif candidate.starlette_route is not None:
+                    yield from flatten_routes([candidate.starlette_route], prefix)
+                elif candidate.methods:
+                    yield Route(prefix + candidate.path, candidate.endpoint, methods=list(candidate.methods))
+        elif isinstance(route, Mount):
+            yield from flatten_routes(route.routes, prefix + route.path)
+        elif prefix and isinstance(route, Route):
+            yield Route(prefix + route.path, route.endpoint, methods=list(route.methods or []), name=route.name)
+        else:
+            yield route
+
+
+class RouteMatcher:
+    """
+    Поиск роута запроса в middleware, то есть до маршрутизации, когда `scope["route"]` еще не задан.
+
+    Проверяются только роуты, подходящие под `predicate` (например, роуты с лимитом), поэтому
+    для остальных запросов поиск стоит перебора короткого списка. Список роутов строится
+    при первом запросе: к этому моменту все роутеры уже подключены к приложению. Роуты
+    подключенных роутеров и `Mount` учитываются с полными путями (см. `flatten_routes`).
+    """
+
+    def __init__(self, predicate: Callable[[BaseRoute], bool]):
+        """
+        Args:
+            predicate (Callable[[BaseRoute], bool]): Отбор роутов, среди которых ведется поиск.
+        """
+        self.predicate = predicate
+        self._routes: list[BaseRoute] | None = None
+
+    def match(self, scope: Scope) -> BaseRoute | None:
+        """
+        Args:
+            scope (Scope): ASGI scope запроса.
+
+        Returns:
+            BaseRoute | None: Отобранный роут, полностью подходящий под запрос (путь и метод), или None.
+        """
+        if self._routes is None:
+            self._routes = [route for route in flatten_routes(scope["app"].routes) if self.predicate(route)]
+        for route in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
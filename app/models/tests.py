@@ -1,10 +1,10 @@
 from uuid import UUID, uuid4
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.database.postgres import Base
+from app.database.postgres import Base, VersionedMixin
 
 
-class TestModel(Base):
+class TestModel(VersionedMixin, Base):
     __tablename__ = "test-models"
     test_id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     info: Mapped[str]
@@ -0,0 +1,39 @@
+"""
+TypeAdapter схем, создаваемые один раз на тип
+"""
+
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(type_: Any) -> TypeAdapter:
+    """
+    Возвращает TypeAdapter для типа, создавая его при первом обращении.
+
+    Построение TypeAdapter компилирует схему pydantic-core и стоит дороже самой сериализации,
+    поэтому адаптер нельзя создавать на каждый запрос.
+
+    Args:
+        type_ (Any): Тип, например `TestDTO` или `list[TestDTO]`.
+
+    Returns:
+        TypeAdapter: Адаптер типа.
+    """
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, value: Any) -> bytes:
+    """
+    Сериализует значение в JSON средствами pydantic-core без промежуточных словарей.
+
+    Args:
+        type_ (Any): Тип значения, например `list[TestDTO]`.
+        value (Any): Значение: экземпляры схем, а не ORM объекты.
+
+    Returns:
+        bytes: JSON.
+    """
+    return get_adapter(type_).dump_json(value)
@@ -0,0 +1,11 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+
+ITEM = TypeVar("ITEM")
+
+
+class CursorPageDTO(BaseModel, Generic[ITEM]):
+    items: list[ITEM]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
@@ -1,9 +1,14 @@
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, SecretStr
 
 
 class TestDTO(BaseModel):
     test_id: UUID
-    info: Optional[str] = None
\ No newline at end of file
+    info: Optional[str] = None
+
+
+class TestHashDTO(BaseModel):
+    # Пароль передается в теле запроса: query параметры попадают в логи и историю браузера
+    password: SecretStr
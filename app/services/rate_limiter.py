@@ -0,0 +1,126 @@
+"""
+Ограничение частоты запросов клиента по алгоритму token bucket
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.database.redis import RedisCache, redis_cache
+
+# Корзина хранится в hash {tokens, ts}. Время берется из Redis, чтобы часы воркеров
+# не влияли на результат. Дробные числа возвращаются строками: Lua отбрасывает дробную часть
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Результат проверки лимита."""
+    allowed: bool
+    # Через сколько секунд в корзине появится нужное количество токенов
+    retry_after: float = 0.0
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket на клиента: корзина на `burst` токенов пополняется со скоростью `rate` в секунду,
+    каждый запрос забирает `cost` токенов.
+
+    Состояние корзин хранится в Redis и общее для всех воркеров, проверка - один вызов Lua
+    скрипта. Если Redis недоступен, лимит считается по корзинам в памяти процесса (то есть
+    на каждый воркер отдельно), а Redis не опрашивается `retry_interval` секунд, чтобы
+    запросы не ждали таймаута соединения.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int | None = None,
+        redis: RedisCache = redis_cache,
+        prefix: str = "ratelimit",
+        local_max_size: int = 10000,
+        retry_interval: float = 5.0,
+    ):
+        """
+        Args:
+            rate (float | None): Скорость пополнения корзины в токенах в секунду.
+                По умолчанию `settings.RATE_LIMIT_RATE`.
+            burst (int | None): Емкость корзины - сколько запросов можно сделать подряд.
+                По умолчанию `settings.RATE_LIMIT_BURST`.
+            redis (RedisCache): Клиент Redis.
+            prefix (str): Префикс ключей корзин в Redis.
+            local_max_size (int): Максимальное количество корзин в памяти процесса.
+            retry_interval (float): Пауза перед повторным обращением к Redis после ошибки в секундах.
+        """
+        self.rate = settings.RATE_LIMIT_RATE if rate is None else rate
+        self.burst = settings.RATE_LIMIT_BURST if burst is None else burst
+        self.redis = redis
+        self.prefix = prefix
+        self.local_max_size = local_max_size
+        self.retry_interval = retry_interval
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, client: str, cost: float = 1.0) -> RateLimitResult:
+        """
+        Забирает токены из корзины клиента.
+
+        Args:
+            client (str): Идентификатор клиента.
+            cost (float): Стоимость запроса в токенах.
+
+        Returns:
+            RateLimitResult: Разрешен ли запрос.
+        """
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                if self._script is None:
+                    self._script = self.redis.redis.register_script(TOKEN_BUCKET_SCRIPT)
+                allowed, retry_after = await self._script(
+                    keys=[f"{self.prefix}:{client}"], args=[self.rate, self.burst, cost]
+                )
+                return RateLimitResult(bool(allowed), float(retry_after))
+            except (RedisError, OSError):
+                self._redis_down_until = time.monotonic() + self.retry_interval
+                logger.warning("Redis Exc: rate limiter falls back to in-process buckets", exc_info=True)
+        return self._hit_local(client, cost)
+
+    def _hit_local(self, client: str, cost: float) -> RateLimitResult:
+        now = time.monotonic()
+        tokens, updated = self._local.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        result = RateLimitResult(True)
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            result = RateLimitResult(False, (cost - tokens) / self.rate)
+        self._local[client] = (tokens, now)
+        if len(self._local) > self.local_max_size:
+            self._local.popitem(last=False)
+        return result
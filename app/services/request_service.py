@@ -0,0 +1,428 @@
+"""
+Общий HTTP клиент для запросов к внешним сервисам
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable, Mapping
+from urllib.parse import urlencode
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+from app.exceptions.services import ExternalServiceError
+from app.utils.lru_cache import LRUCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Методы, которые безопасно повторять: повтор не меняет результат на сервере
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Заголовки, с которыми ответ относится к конкретному пользователю: такие запросы не кешируются,
+# иначе ответ одного пользователя получил бы другой
+PRIVATE_REQUEST_HEADERS = ("Authorization", "Proxy-Authorization", "Cookie")
+
+http_client_requests_total = registry.counter(
+    "http_client_requests_total", "Outbound HTTP requests by host and status.", ("host", "status")
+)
+http_client_request_duration_seconds = registry.histogram(
+    "http_client_request_duration_seconds", "Outbound HTTP request latency in seconds.", ("host",)
+)
+http_client_cache_total = registry.counter(
+    "http_client_cache_total", "Outbound HTTP response cache lookups by result.", ("result",)
+)
+
+
+@dataclass
+class HttpResponse:
+    """Прочитанный ответ внешнего сервиса. Соединение уже возвращено в пул."""
+    status: int
+    headers: CIMultiDictProxy[str]
+    body: bytes
+    url: str
+    # Ответ взят из кеша без запроса или подтвержден сервером через 304
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    def json(self) -> Any:
+        if orjson is not None:
+            return orjson.loads(self.body)
+        return json.loads(self.body)
+
+    def raise_for_status(self) -> None:
+        """
+        Raises:
+            ExternalServiceError: Сервис ответил кодом ошибки.
+        """
+        if not self.ok:
+            raise ExternalServiceError(f"{self.url} responded with {self.status}")
+
+
+@dataclass
+class _CacheEntry:
+    response: HttpResponse
+    fresh_until: float
+    etag: str | None = None
+    last_modified: str | None = None
+    # Значения заголовков запроса, перечисленных в Vary ответа
+    vary: dict[str, str | None] = field(default_factory=dict)
+
+    def matches(self, headers: CIMultiDict) -> bool:
+        """Ответ подходит запросу, если заголовки из Vary совпадают с заголовками исходного запроса."""
+        return all(headers.get(name) == value for name, value in self.vary.items())
+
+
+@dataclass
+class HostLimits:
+    """Ограничения запросов к одному хосту."""
+    concurrency: asyncio.Semaphore | None = None
+    timeout: aiohttp.ClientTimeout | None = None
+
+
+class RequestService:
+    """
+    HTTP клиент поверх одной `aiohttp.ClientSession` на процесс.
+
+    Сессия держит пул keep-alive соединений, поэтому повторные запросы к хосту не тратят
+    время на TCP и TLS рукопожатия. Сессия создается в `start` (в lifespan приложения),
+    а вне приложения - лениво при первом запросе, и закрывается в `close`.
+
+    Запросы идемпотентными методами повторяются при ошибке соединения, таймауте и ответах
+    429/502/503/504 с экспоненциальной паузой и случайным разбросом (учитывается Retry-After).
+    Если повторы не помогли, ошибка соединения превращается в `ExternalServiceError`,
+    а ответ с кодом ошибки возвращается как есть.
+
+    GET запросы с `cache_ttl` кешируются в памяти процесса. Устаревший ответ с ETag или
+    Last-Modified перепроверяется условным запросом: ответ 304 продлевает его без передачи тела.
+    Кеш общий для всех вызывающих, поэтому запросы с Authorization или Cookie и ответы
+    с Cache-Control private, no-store или Vary: * не кешируются, а ответ с Vary отдается
+    только запросам с теми же значениями перечисленных заголовков.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        limit_per_host: int | None = None,
+        timeout: float | None = None,
+        connect_timeout: float | None = None,
+        keepalive_timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+        backoff_max: float | None = None,
+        cache_max_size: int | None = None,
+        cache_stale_ttl: float | None = None,
+    ):
+        """
+        Args:
+            limit (int | None): Максимальное количество соединений пула. По умолчанию `settings.HTTP_CLIENT_LIMIT`.
+            limit_per_host (int | None): Максимальное количество соединений с одним хостом.
+                По умолчанию `settings.HTTP_CLIENT_LIMIT_PER_HOST`.
+            timeout (float | None): Общий таймаут запроса в секундах. По умолчанию `settings.HTTP_CLIENT_TIMEOUT`.
+            connect_timeout (float | None): Таймаут получения соединения и подключения в секундах.
+                По умолчанию `settings.HTTP_CLIENT_CONNECT_TIMEOUT`.
+            keepalive_timeout (float | None): Сколько секунд держать простаивающее соединение открытым.
+                По умолчанию `settings.HTTP_CLIENT_KEEPALIVE_TIMEOUT`.
+            max_retries (int | None): Количество повторов идемпотентного запроса.
+                По умолчанию `settings.HTTP_CLIENT_MAX_RETRIES`.
+            backoff (float | None): Пауза перед первым повтором в секундах, далее удваивается.
+                По умолчанию `settings.HTTP_CLIENT_RETRY_BACKOFF`.
+            backoff_max (float | None): Максимальная пауза между повторами в секундах.
+                По умолчанию `settings.HTTP_CLIENT_RETRY_BACKOFF_MAX`.
+            cache_max_size (int | None): Максимальное количество ответов в кеше.
+                По умолчанию `settings.HTTP_CLIENT_CACHE_MAX_SIZE`.
+            cache_stale_ttl (float | None): Сколько секунд хранить ответ для условной перепроверки.
+                По умолчанию `settings.HTTP_CLIENT_CACHE_STALE_TTL`.
+        """
+        self.limit = settings.HTTP_CLIENT_LIMIT if limit is None else limit
+        self.limit_per_host = settings.HTTP_CLIENT_LIMIT_PER_HOST if limit_per_host is None else limit_per_host
+        self.timeout = settings.HTTP_CLIENT_TIMEOUT if timeout is None else timeout
+        self.connect_timeout = settings.HTTP_CLIENT_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        self.keepalive_timeout = (
+            settings.HTTP_CLIENT_KEEPALIVE_TIMEOUT if keepalive_timeout is None else keepalive_timeout
+        )
+        self.max_retries = settings.HTTP_CLIENT_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.HTTP_CLIENT_RETRY_BACKOFF if backoff is None else backoff
+        self.backoff_max = settings.HTTP_CLIENT_RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+        self._session: aiohttp.ClientSession | None = None
+        self._hosts: dict[str, HostLimits] = {}
+        self._cache = LRUCache(
+            max_size=settings.HTTP_CLIENT_CACHE_MAX_SIZE if cache_max_size is None else cache_max_size,
+            ttl=settings.HTTP_CLIENT_CACHE_STALE_TTL if cache_stale_ttl is None else cache_stale_ttl,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Общая сессия с пулом соединений."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+                raise_for_status=False,
+            )
+        return self._session
+
+    async def start(self) -> None:
+        """Создает сессию и пул соединений."""
+        _ = self.session
+        logger.info("HTTP client session open")
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def configure_host(self, host: str, concurrency: int | None = None, timeout: float | None = None) -> None:
+        """
+        Задает ограничения для отдельного хоста поверх общих.
+
+        Args:
+            host (str): Имя хоста, например "api.example.com".
+            concurrency (int | None): Максимальное количество одновременных запросов к хосту.
+            timeout (float | None): Общий таймаут запроса к хосту в секундах.
+        """
+        self._hosts[host] = HostLimits(
+            concurrency=asyncio.Semaphore(concurrency) if concurrency else None,
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout) if timeout else None,
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Mapping[str, Any] | None = None,
+        json: Any = None,
+        data: Any = None,
+        headers: Mapping[str, str] | None = None,
+        timeout: float | None = None,
+        retries: int | None = None,
+        cache_ttl: float | None = None,
+    ) -> HttpResponse:
+        """
+        Выполняет запрос и читает тело ответа.
+
+        Args:
+            method (str): HTTP метод.
+            url (str): URL.
+            params (Mapping[str, Any] | None): Параметры строки запроса.
+            json (Any): Тело запроса в JSON.
+            data (Any): Тело запроса как есть.
+            headers (Mapping[str, str] | None): Заголовки запроса.
+            timeout (float | None): Общий таймаут запроса в секундах. По умолчанию - таймаут хоста или общий.
+            retries (int | None): Количество повторов. По умолчанию `max_retries` для идемпотентных
+                методов и 0 для остальных.
+            cache_ttl (float | None): Время, в течение которого ответ на GET берется из кеша без запроса.
+                Запросы с Authorization или Cookie не кешируются.
+
+        Returns:
+            HttpResponse: Ответ.
+
+        Raises:
+            ExternalServiceError: Ошибка соединения или таймаут после всех повторов.
+        """
+        method = method.upper()
+        target = URL(url)
+        if params:
+            target = target.with_query(urlencode(sorted(params.items()), doseq=True))
+        headers = CIMultiDict(headers or {})
+
+        cacheable = cache_ttl and method == "GET" and not any(name in headers for name in PRIVATE_REQUEST_HEADERS)
+        cache_key = str(target) if cacheable else None
+        entry: _CacheEntry | None = self._cache.get(cache_key) if cache_key else None
+        if entry is not None and not entry.matches(headers):
+            entry = None
+        if entry is not None:
+            if entry.fresh_until > time.monotonic():
+                http_client_cache_total.labels("hit").inc()
+                return entry.response
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        if retries is None:
+            retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+        response = await self._send(
+            method, target, json=json, data=data, headers=headers, timeout=timeout, retries=retries
+        )
+
+        if cache_key is None:
+            return response
+        if response.status == 304 and entry is not None:
+            http_client_cache_total.labels("revalidated").inc()
+            entry.fresh_until = time.monotonic() + cache_ttl
+            self._cache.set(cache_key, entry)
+            return entry.response
+        http_client_cache_total.labels("miss").inc()
+        vary = self._vary(response, headers)
+        if response.status == 200 and vary is not None:
+            self._cache.set(cache_key, _CacheEntry(
+                response=HttpResponse(response.status, response.headers, response.body, response.url, from_cache=True),
+                fresh_until=time.monotonic() + cache_ttl,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                vary=vary,
+            ))
+        return response
+
+    @staticmethod
+    def _vary(response: HttpResponse, headers: CIMultiDict) -> dict[str, str | None] | None:
+        """
+        Returns:
+            dict[str, str | None] | None: Значения заголовков запроса из Vary ответа
+                или None, если ответ нельзя кешировать в общем кеше.
+        """
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control or "private" in cache_control:
+            return None
+        names = {name.strip().lower() for name in response.headers.get("Vary", "").split(",") if name.strip()}
+        if "*" in names:
+            return None
+        return {name: headers.get(name) for name in names}
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def gather(
+        self,
+        requests: Iterable[Mapping[str, Any]],
+        concurrency: int | None = None,
+        return_exceptions: bool = True,
+    ) -> list[HttpResponse | BaseException]:
+        """
+        Выполняет много запросов одновременно, но не больше `concurrency` за раз.
+
+        Запросы берутся из итератора по мере освобождения мест, поэтому большой список
+        не создает тысячи задач сразу.
+
+        Args:
+            requests (Iterable[Mapping[str, Any]]): Аргументы `request` для каждого запроса,
+                например {"method": "GET", "url": "...", "cache_ttl": 60}.
+            concurrency (int | None): Максимальное количество одновременных запросов.
+                По умолчанию `settings.HTTP_CLIENT_CONCURRENCY`.
+            return_exceptions (bool): Вернуть исключение на месте упавшего запроса. Иначе первое
+                исключение отменяет остальные запросы и выбрасывается.
+
+        Returns:
+            list[HttpResponse | BaseException]: Ответы в порядке запросов.
+        """
+        pending = enumerate(requests)
+        results: dict[int, HttpResponse | BaseException] = {}
+
+        async def worker() -> None:
+            for index, kwargs in pending:
+                try:
+                    results[index] = await self.request(**kwargs)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return [results[index] for index in range(len(results))]
+
+    async def _send(
+        self,
+        method: str,
+        url: URL,
+        *,
+        json: Any,
+        data: Any,
+        headers: CIMultiDict,
+        timeout: float | None,
+        retries: int,
+    ) -> HttpResponse:
+        host = url.host or ""
+        limits = self._hosts.get(host) or HostLimits()
+        client_timeout = limits.timeout
+        if timeout:
+            client_timeout = aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout)
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                if limits.concurrency is not None:
+                    await limits.concurrency.acquire()
+                try:
+                    async with self.session.request(
+                        method, url, json=json, data=data, headers=headers, timeout=client_timeout
+                    ) as raw:
+                        response = HttpResponse(raw.status, raw.headers, await raw.read(), str(raw.url))
+                finally:
+                    if limits.concurrency is not None:
+                        limits.concurrency.release()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                http_client_request_duration_seconds.labels(host).observe(time.perf_counter() - started)
+                http_client_requests_total.labels(host, "error").inc()
+                if attempt >= retries:
+                    raise ExternalServiceError(f"{method} {url} failed: {e!r}") from e
+                delay = self._retry_delay(attempt)
+                logger.warning(
+                    "HTTP request failed, retrying",
+                    extra={"method": method, "host": host, "attempt": attempt + 1, "delay": delay, "error": repr(e)},
+                )
+            else:
+                http_client_request_duration_seconds.labels(host).observe(time.perf_counter() - started)
+                http_client_requests_total.labels(host, str(response.status)).inc()
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    "HTTP request retried",
+                    extra={
+                        "method": method,
+                        "host": host,
+                        "attempt": attempt + 1,
+                        "delay": delay,
+                        "status": response.status,
+                    },
+                )
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                try:
+                    return min(self.backoff_max, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+        # Разброс в верхней половине паузы, чтобы повторы разных клиентов не приходили волной
+        return min(self.backoff_max, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+request_service = RequestService()
@@ -0,0 +1,23 @@
+# Фоновые задачи: пул воркеров (runner.py) и отложенная пакетная запись (write_behind.py)
+
+
+# Задача регистрируется декоратором при импорте модуля и ставится в очередь по имени или функции
+#
+# from app.tasks.runner import task_runner
+#
+#
+# @task_runner.task("<model>.<action>")
+# async def <action>(<model>_id: str) -> None:
+#     ...
+#
+#
+# job_id = await task_runner.submit("<model>.<action>", <model>_id=str(<model>_id))
+
+
+# Аргументы задач должны сериализоваться в JSON: с TASKS_BACKEND=redis задания хранятся в Redis Stream
+
+
+# Вставки, которые не нужно читать обратно в том же запросе, можно копить и писать пачками
+#
+# <model>_buffer = WriteBehindBuffer(<Model>DAO)
+# await <model>_buffer.add(**data)
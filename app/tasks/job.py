@@ -0,0 +1,38 @@
+"""
+Задание фоновой задачи
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4
+
+
+@dataclass
+class Job:
+    """Задание: вызов зарегистрированной задачи с аргументами."""
+    name: str
+    args: tuple = ()
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    attempt: int = 0
+    id: str = field(default_factory=lambda: uuid4().hex)
+    # Идентификатор записи в Redis Stream, если задание пришло из надежной очереди
+    message_id: bytes | None = None
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {"id": self.id, "name": self.name, "args": self.args, "kwargs": self.kwargs, "attempt": self.attempt},
+            default=str,
+        )
+
+    @classmethod
+    def loads(cls, data: bytes | str, message_id: bytes | None = None) -> "Job":
+        payload = json.loads(data)
+        return cls(
+            name=payload["name"],
+            args=tuple(payload.get("args", ())),
+            kwargs=payload.get("kwargs", {}),
+            attempt=payload.get("attempt", 0),
+            id=payload["id"],
+            message_id=message_id,
+        )
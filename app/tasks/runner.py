@@ -0,0 +1,306 @@
+"""
+Пул воркеров для фоновых задач внутри процесса приложения
+"""
+
+import asyncio
+import contextvars
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+from app.exceptions.tasks import TaskQueueFullError, UnknownTaskError
+from app.tasks.job import Job
+from app.tasks.streams import RedisStreamBackend
+
+TaskFunc = Callable[..., Awaitable[Any]]
+
+tasks_total = registry.counter(
+    "tasks_total", "Background task executions by outcome.", ("task", "status")
+)
+task_duration_seconds = registry.histogram(
+    "task_duration_seconds", "Background task execution time in seconds.", ("task",)
+)
+tasks_queued = registry.gauge("tasks_queued", "Background jobs waiting in the in-process queue.")
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """Зарегистрированная задача."""
+    func: TaskFunc
+    max_retries: int
+
+
+class TaskRunner:
+    """
+    Ограниченный пул воркеров asyncio для фоновых задач.
+
+    Задачи регистрируются декоратором `task` под именем и ставятся в очередь через `submit`.
+    Очередь ограничена: если она заполнена, `submit` ждет место не дольше `submit_timeout`
+    и затем выбрасывает `TaskQueueFullError` (503), так что перегрузка не копится в памяти.
+    Упавшее задание повторяется с экспоненциальной паузой и случайным разбросом, не занимая
+    воркер на время паузы. Каждое задание выполняется в собственном контексте, поэтому
+    ContextVar одного задания (закрепление чтений за основным сервером, кеш запроса)
+    не влияют на следующие.
+
+    С надежной очередью (`backend`) задания пишутся в Redis Stream и подтверждаются только
+    после выполнения, поэтому переживают перезапуск процесса. Если Redis недоступен,
+    `submit` кладет задание в очередь в памяти.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 1000,
+        submit_timeout: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        backoff_max: float = 30.0,
+        backend: RedisStreamBackend | None = None,
+        stream_block: float = 0.5,
+    ):
+        """
+        Args:
+            workers (int): Количество воркеров.
+            queue_size (int): Размер очереди заданий в памяти.
+            submit_timeout (float): Максимальное ожидание места в очереди в секундах.
+            max_retries (int): Количество повторов упавшего задания по умолчанию.
+            backoff (float): Пауза перед первым повтором в секундах, далее удваивается.
+            backoff_max (float): Максимальная пауза между повторами в секундах.
+            backend (RedisStreamBackend | None): Надежная очередь. None - только очередь в памяти.
+            stream_block (float): Время ожидания новых заданий из потока в секундах.
+        """
+        self.workers = workers
+        self.submit_timeout = submit_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.backend = backend
+        self.stream_block = stream_block
+        self.tasks: dict[str, TaskSpec] = {}
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(queue_size)
+        self._workers: list[asyncio.Task] = []
+        self._consumer: asyncio.Task | None = None
+        self._retries: set[asyncio.Task] = set()
+        tasks_queued.set_function(self._queue.qsize)
+
+    def task(self, name: str | None = None, *, max_retries: int | None = None) -> Callable[[TaskFunc], TaskFunc]:
+        """
+        Декоратор регистрации задачи.
+
+        Задача должна быть зарегистрирована при импорте модуля, чтобы любой процесс,
+        читающий надежную очередь, мог ее выполнить.
+
+        Args:
+            name (str | None): Имя задачи. По умолчанию `<модуль>.<имя функции>`.
+            max_retries (int | None): Количество повторов. По умолчанию `self.max_retries`.
+
+        Returns:
+            Callable: Декоратор, возвращающий функцию без изменений.
+        """
+        def decorator(func: TaskFunc) -> TaskFunc:
+            task_name = name or f"{func.__module__}.{func.__qualname__}"
+            retries = self.max_retries if max_retries is None else max_retries
+            self.tasks[task_name] = TaskSpec(func, retries)
+            return func
+
+        return decorator
+
+    async def submit(self, task: str | TaskFunc, /, *args, **kwargs) -> str:
+        """
+        Ставит задание в очередь.
+
+        Args:
+            task (str | TaskFunc): Имя зарегистрированной задачи или сама функция задачи.
+            *args: Позиционные аргументы задачи.
+            **kwargs: Именованные аргументы задачи.
+
+        Returns:
+            str: Идентификатор задания.
+
+        Raises:
+            UnknownTaskError: Задача не зарегистрирована.
+            TaskQueueFullError: В очереди нет места дольше `submit_timeout`.
+        """
+        name = task if isinstance(task, str) else self._name_of(task)
+        if name not in self.tasks:
+            raise UnknownTaskError(name)
+        job = Job(name=name, args=args, kwargs=kwargs)
+        if self.backend is not None:
+            try:
+                await self.backend.add(job)
+                return job.id
+            except (RedisError, OSError):
+                logger.warning("Redis Exc: cannot enqueue task, using in-memory queue", extra={"task": name})
+        try:
+            async with asyncio.timeout(self.submit_timeout):
+                await self._queue.put(job)
+        except TimeoutError:
+            tasks_total.labels(name, "rejected").inc()
+            raise TaskQueueFullError("Background task queue is full, try again later") from None
+        return job.id
+
+    async def start(self) -> None:
+        """Запускает воркеры и чтение надежной очереди."""
+        if self._workers:
+            return
+        # Пустой контекст: задания не должны видеть ContextVar запроса, из которого запущен пул
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"task-worker-{i}", context=contextvars.Context())
+            for i in range(self.workers)
+        ]
+        if self.backend is not None:
+            self._consumer = asyncio.create_task(self._consume(), name="task-stream-consumer")
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """
+        Прекращает чтение надежной очереди и дожидается выполнения заданий из памяти,
+        включая ожидающие повтора, затем останавливает воркеры.
+
+        Задания, не выполненные за `timeout`, при надежной очереди будут выполнены после
+        перезапуска, а при очереди в памяти теряются (их количество пишется в лог).
+
+        Args:
+            timeout (float | None): Максимальное время ожидания в секундах. По умолчанию `settings.TASKS_DRAIN_TIMEOUT`.
+        """
+        if not self._workers:
+            return
+        if timeout is None:
+            timeout = settings.TASKS_DRAIN_TIMEOUT
+        if self._consumer is not None:
+            await self._cancel([self._consumer])
+            self._consumer = None
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    await self._queue.join()
+                    if not self._retries:
+                        break
+                    # Повтор снова кладет задание в очередь, поэтому после него нужен еще один join
+                    await asyncio.wait(list(self._retries))
+        except TimeoutError:
+            logger.warning(
+                "Background tasks not drained before shutdown",
+                extra={
+                    "queued": self._queue.qsize(),
+                    "retrying": len(self._retries),
+                    "durable": self.backend is not None,
+                },
+            )
+        await self._cancel([*self._workers, *self._retries])
+        self._workers = []
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                # Отдельная задача asyncio - отдельная копия контекста для каждого задания
+                await asyncio.create_task(self._execute(job), context=contextvars.Context())
+            except Exception:
+                logger.exception("Background task runner failed", extra={"task": job.name, "job_id": job.id})
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        spec = self.tasks.get(job.name)
+        if spec is None:
+            logger.error("Unknown background task", extra={"task": job.name, "job_id": job.id})
+            await self._finish(job, UnknownTaskError(job.name))
+            return
+
+        started = time.perf_counter()
+        try:
+            await spec.func(*job.args, **job.kwargs)
+        except Exception as e:
+            task_duration_seconds.labels(job.name).observe(time.perf_counter() - started)
+            if job.attempt < spec.max_retries:
+                self._schedule_retry(job, e)
+                return
+            tasks_total.labels(job.name, "failed").inc()
+            logger.exception(
+                "Background task failed", extra={"task": job.name, "job_id": job.id, "attempts": job.attempt + 1}
+            )
+            await self._finish(job, e)
+            return
+        task_duration_seconds.labels(job.name).observe(time.perf_counter() - started)
+        tasks_total.labels(job.name, "succeeded").inc()
+        await self._finish(job)
+
+    def _schedule_retry(self, job: Job, error: Exception) -> None:
+        job.attempt += 1
+        # Случайный разброс в верхней половине паузы, чтобы повторы разных заданий не приходили волной
+        delay = min(self.backoff_max, self.backoff * 2 ** (job.attempt - 1)) * random.uniform(0.5, 1.0)
+        tasks_total.labels(job.name, "retried").inc()
+        logger.warning(
+            "Background task failed, retrying",
+            extra={"task": job.name, "job_id": job.id, "attempt": job.attempt, "delay": delay, "error": repr(error)},
+        )
+        retry = asyncio.create_task(self._retry(job, delay))
+        self._retries.add(retry)
+        retry.add_done_callback(self._retries.discard)
+
+    async def _retry(self, job: Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(job)
+
+    async def _finish(self, job: Job, error: BaseException | None = None) -> None:
+        if job.message_id is None:
+            return
+        try:
+            if error is None:
+                await self.backend.ack(job)
+            else:
+                await self.backend.dead_letter(job, error)
+        except (RedisError, OSError):
+            # Неподтвержденное задание будет выполнено повторно после `claim_idle`
+            logger.warning("Redis Exc: cannot acknowledge task", extra={"task": job.name, "job_id": job.id})
+
+    async def _consume(self) -> None:
+        backoff = 1.0
+        claimed_at = 0.0
+        while True:
+            try:
+                await self.backend.ensure_group()
+                while True:
+                    jobs = []
+                    if time.monotonic() - claimed_at >= self.backend.claim_idle:
+                        claimed_at = time.monotonic()
+                        jobs = await self.backend.claim_stale()
+                    jobs += await self.backend.read(count=self.workers, block=self.stream_block)
+                    backoff = 1.0
+                    # Заполненная очередь задерживает чтение следующих заданий из потока
+                    for job in jobs:
+                        await self._queue.put(job)
+            except (RedisError, OSError):
+                logger.warning("Redis Exc: task stream unavailable", exc_info=True)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+
+    @staticmethod
+    async def _cancel(tasks: list[asyncio.Task]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _name_of(self, func: TaskFunc) -> str:
+        for name, spec in self.tasks.items():
+            if spec.func is func:
+                return name
+        raise UnknownTaskError(func.__qualname__)
+
+
+task_runner = TaskRunner(
+    workers=settings.TASKS_WORKERS,
+    queue_size=settings.TASKS_QUEUE_SIZE,
+    submit_timeout=settings.TASKS_SUBMIT_TIMEOUT,
+    max_retries=settings.TASKS_MAX_RETRIES,
+    backoff=settings.TASKS_RETRY_BACKOFF,
+    backoff_max=settings.TASKS_RETRY_BACKOFF_MAX,
+    backend=RedisStreamBackend() if settings.TASKS_BACKEND == "redis" else None,
+    stream_block=settings.TASKS_STREAM_BLOCK,
+)
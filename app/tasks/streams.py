@@ -0,0 +1,148 @@
+"""
+Надежная очередь фоновых задач на Redis Streams
+"""
+
+import os
+import socket
+
+from redis.exceptions import ResponseError
+
+from app.core.config import settings
+from app.database.redis import RedisCache, redis_cache
+from app.tasks.job import Job
+
+
+class RedisStreamBackend:
+    """
+    Очередь заданий в Redis Stream с группой потребителей.
+
+    Задание подтверждается (XACK) и удаляется из потока только после выполнения или
+    окончательной ошибки, поэтому задания, взятые воркером, который упал или был
+    перезапущен, остаются в списке ожидания группы. При старте и периодически их забирает
+    XAUTOCLAIM, если они не подтверждены дольше `claim_idle` секунд. Задания, исчерпавшие
+    попытки, переносятся в поток `<stream>:dead`.
+
+    Аргументы заданий сериализуются в JSON: значения, которых нет в JSON (UUID, datetime),
+    приходят в задачу строками.
+    """
+
+    def __init__(
+        self,
+        redis: RedisCache = redis_cache,
+        stream: str | None = None,
+        group: str | None = None,
+        consumer: str | None = None,
+        claim_idle: float | None = None,
+    ):
+        """
+        Args:
+            redis (RedisCache): Клиент Redis.
+            stream (str | None): Имя потока. По умолчанию `settings.TASKS_STREAM`.
+            group (str | None): Имя группы потребителей. По умолчанию `settings.TASKS_STREAM_GROUP`.
+            consumer (str | None): Имя потребителя. По умолчанию `<hostname>-<pid>`.
+            claim_idle (float | None): Через сколько секунд без подтверждения задание считается брошенным.
+                По умолчанию `settings.TASKS_STREAM_CLAIM_IDLE`.
+        """
+        self.redis = redis
+        self.stream = stream or settings.TASKS_STREAM
+        self.dead_letter_stream = f"{self.stream}:dead"
+        self.group = group or settings.TASKS_STREAM_GROUP
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.claim_idle = settings.TASKS_STREAM_CLAIM_IDLE if claim_idle is None else claim_idle
+
+    async def ensure_group(self) -> None:
+        """Создает поток и группу потребителей, если их еще нет."""
+        try:
+            await self.redis.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def add(self, job: Job) -> bytes:
+        """
+        Добавляет задание в поток.
+
+        Args:
+            job (Job): Задание.
+
+        Returns:
+            bytes: Идентификатор записи в потоке.
+        """
+        return await self.redis.redis.xadd(self.stream, {"job": job.dumps()})
+
+    async def read(self, count: int, block: float) -> list[Job]:
+        """
+        Получает новые задания группы для этого потребителя.
+
+        Args:
+            count (int): Максимальное количество заданий.
+            block (float): Время ожидания новых заданий в секундах.
+
+        Returns:
+            list[Job]: Задания.
+        """
+        response = await self.redis.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=count, block=int(block * 1000)
+        )
+        return [job for _, messages in response or [] for job in self._parse(messages)]
+
+    async def claim_stale(self, count: int = 100) -> list[Job]:
+        """
+        Забирает задания, которые другие потребители взяли, но не подтвердили дольше `claim_idle`.
+
+        Args:
+            count (int): Количество заданий, проверяемых за одну команду XAUTOCLAIM.
+
+        Returns:
+            list[Job]: Задания.
+        """
+        jobs = []
+        start = "0-0"
+        while True:
+            response = await self.redis.redis.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=int(self.claim_idle * 1000),
+                start_id=start,
+                count=count,
+            )
+            start, messages = response[0], response[1]
+            jobs.extend(self._parse(messages))
+            if start in (b"0-0", "0-0"):
+                return jobs
+
+    async def ack(self, job: Job) -> None:
+        """
+        Подтверждает задание и удаляет его из потока.
+
+        Args:
+            job (Job): Задание из потока.
+        """
+        async with self.redis.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, job.message_id)
+            pipe.xdel(self.stream, job.message_id)
+            await pipe.execute()
+
+    async def dead_letter(self, job: Job, error: BaseException) -> None:
+        """
+        Переносит задание, исчерпавшее попытки, в поток `<stream>:dead` и подтверждает его.
+
+        Args:
+            job (Job): Задание из потока.
+            error (BaseException): Последняя ошибка задания.
+        """
+        async with self.redis.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_stream, {"job": job.dumps(), "error": repr(error)})
+            pipe.xack(self.stream, self.group, job.message_id)
+            pipe.xdel(self.stream, job.message_id)
+            await pipe.execute()
+
+    @staticmethod
+    def _parse(messages: list) -> list[Job]:
+        # Удаленные записи XAUTOCLAIM возвращает с пустыми полями
+        return [
+            Job.loads(fields[b"job"], message_id=message_id)
+            for message_id, fields in messages
+            if fields and b"job" in fields
+        ]
@@ -0,0 +1,13 @@
+from app.database.data_layer.test_dao import TestDAO
+from app.exceptions.tasks import TaskError
+from app.tasks.runner import task_runner
+from app.tasks.write_behind import WriteBehindBuffer
+
+# Вставки тестовых записей, которые не нужно читать обратно в том же запросе
+test_items_buffer = WriteBehindBuffer(TestDAO)
+
+
+@task_runner.task("test.create_item")
+async def create_test_item(info: str) -> None:
+    if await TestDAO.create(info=info) is None:
+        raise TaskError("Cannot create test item")
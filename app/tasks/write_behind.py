@@ -0,0 +1,205 @@
+"""
+Отложенная пакетная запись (write-behind) через BaseDAO
+"""
+
+import asyncio
+import contextvars
+import random
+from typing import Any, Sequence, Type
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+from app.database.data_layer.base_dao import BaseDAO
+from app.exceptions.database import PoolExhaustedError, QueryTimeoutError
+
+write_behind_rows_total = registry.counter(
+    "write_behind_rows_total", "Rows passed through write-behind buffers by outcome.", ("dao", "status")
+)
+write_behind_flushes_total = registry.counter(
+    "write_behind_flushes_total", "Write-behind flushes.", ("dao",)
+)
+write_behind_pending = registry.gauge(
+    "write_behind_pending", "Rows buffered or being written by write-behind buffers.", ("dao",)
+)
+
+
+class WriteBehindBuffer:
+    """
+    Буфер вставок, который пишет строки в базу пачками вместо одного INSERT на вызов.
+
+    `add` только кладет строку в буфер и сразу возвращает управление. Фоновая задача
+    сбрасывает буфер одним `bulk_create` (или `bulk_upsert`, если заданы `conflict_keys` -
+    тогда строки с одинаковым ключом схлопываются), как только набирается `batch_size`
+    строк или проходит `flush_interval` секунд с первой строки пачки. Буфер ограничен
+    `max_pending` строками, включая записываемые: при переполнении `add` ждет, пока
+    запись освободит место. Неудачная запись пачки повторяется с паузой, после
+    `max_retries` повторов пачка отбрасывается с ошибкой в логе.
+
+    Строки, добавленные через буфер, не видны в текущем запросе и не откатываются вместе
+    с его транзакцией: буфер подходит для аудита, событий и статистики, а не для данных,
+    которые сразу читаются обратно.
+    """
+
+    registry: list["WriteBehindBuffer"] = []
+
+    def __init__(
+        self,
+        dao: Type[BaseDAO],
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_pending: int | None = None,
+        conflict_keys: Sequence[str] | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+    ):
+        """
+        Args:
+            dao (Type[BaseDAO]): DAO, через который записываются строки.
+            batch_size (int | None): Количество строк, при котором буфер сбрасывается сразу.
+                По умолчанию `settings.WRITE_BEHIND_BATCH_SIZE`.
+            flush_interval (float | None): Максимальное время ожидания пачки в секундах.
+                По умолчанию `settings.WRITE_BEHIND_FLUSH_INTERVAL`.
+            max_pending (int | None): Максимальное количество строк в буфере.
+                По умолчанию `settings.WRITE_BEHIND_MAX_PENDING`.
+            conflict_keys (Sequence[str] | None): Ключи для `bulk_upsert`. None - вставка через `bulk_create`.
+            max_retries (int | None): Количество повторов неудачной записи пачки.
+                По умолчанию `settings.TASKS_MAX_RETRIES`.
+            backoff (float | None): Пауза перед первым повтором в секундах, далее удваивается.
+                По умолчанию `settings.TASKS_RETRY_BACKOFF`.
+        """
+        self.dao = dao
+        self.batch_size = settings.WRITE_BEHIND_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_interval = settings.WRITE_BEHIND_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.conflict_keys = conflict_keys
+        self.max_retries = settings.TASKS_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.TASKS_RETRY_BACKOFF if backoff is None else backoff
+        self._rows: list[dict[str, Any]] = []
+        self._space = asyncio.Semaphore(settings.WRITE_BEHIND_MAX_PENDING if max_pending is None else max_pending)
+        self._has_rows = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._flushing = asyncio.Lock()
+        self._pending = write_behind_pending.labels(dao.__name__)
+        WriteBehindBuffer.registry.append(self)
+
+    async def add(self, **row) -> None:
+        """
+        Добавляет строку в буфер.
+
+        Args:
+            **row: Значения полей модели, как в `BaseDAO.create`.
+        """
+        await self._space.acquire()
+        self._rows.append(row)
+        self._pending.inc()
+        self._has_rows.set()
+        if len(self._rows) >= self.batch_size:
+            self._full.set()
+        self.start()
+
+    def start(self) -> None:
+        """Запускает фоновую запись, если она еще не запущена."""
+        if self._task is None:
+            # Пустой контекст: запись не должна попасть в сессию unit of work запроса,
+            # из которого добавлена первая строка
+            self._task = asyncio.create_task(
+                self._run(), name=f"write-behind-{self.dao.__name__}", context=contextvars.Context()
+            )
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """
+        Останавливает фоновую запись и записывает оставшиеся строки.
+
+        Args:
+            timeout (float | None): Максимальное время записи оставшихся строк в секундах.
+                По умолчанию `settings.TASKS_DRAIN_TIMEOUT`.
+        """
+        if timeout is None:
+            timeout = settings.TASKS_DRAIN_TIMEOUT
+        try:
+            async with asyncio.timeout(timeout):
+                if self._task is not None:
+                    # Под блокировкой фоновая задача не может быть отменена посреди записи пачки
+                    async with self._flushing:
+                        self._task.cancel()
+                    await asyncio.gather(self._task, return_exceptions=True)
+                    self._task = None
+                while self._rows:
+                    await self.flush()
+        except TimeoutError:
+            write_behind_rows_total.labels(self.dao.__name__, "dropped").inc(len(self._rows))
+            logger.error(
+                "Write-behind buffer not flushed before shutdown",
+                extra={"dao": self.dao.__name__, "rows": len(self._rows)},
+            )
+
+    async def flush(self) -> None:
+        """Записывает в базу одну пачку из буфера."""
+        async with self._flushing:
+            batch, self._rows = self._rows[:self.batch_size], self._rows[self.batch_size:]
+            if not self._rows:
+                self._has_rows.clear()
+            if len(self._rows) < self.batch_size:
+                self._full.clear()
+            if not batch:
+                return
+            try:
+                await self._write(batch)
+            except Exception:
+                # Непредвиденная ошибка (не ошибка базы, ее обрабатывает `_write`), например, в данных
+                # строки: повтор не поможет, пачка отбрасывается, запись следующих продолжается
+                write_behind_rows_total.labels(self.dao.__name__, "dropped").inc(len(batch))
+                logger.exception("Write-behind batch failed", extra={"dao": self.dao.__name__, "rows": len(batch)})
+            finally:
+                self._pending.dec(len(batch))
+                for _ in batch:
+                    self._space.release()
+
+    @classmethod
+    async def stop_all(cls, timeout: float | None = None) -> None:
+        """
+        Останавливает все буферы приложения, записав оставшиеся строки.
+
+        Args:
+            timeout (float | None): Максимальное время записи каждого буфера в секундах.
+                По умолчанию `settings.TASKS_DRAIN_TIMEOUT`.
+        """
+        await asyncio.gather(*(buffer.stop(timeout) for buffer in cls.registry))
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_rows.wait()
+            if not self._full.is_set():
+                try:
+                    async with asyncio.timeout(self.flush_interval):
+                        await self._full.wait()
+                except TimeoutError:
+                    pass
+            try:
+                await self.flush()
+            except Exception:
+                # Фоновая задача не перезапускается: после любой ошибки запись должна продолжаться
+                logger.exception("Write-behind flush failed", extra={"dao": self.dao.__name__})
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        name = self.dao.__name__
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self.conflict_keys:
+                    result = await self.dao.bulk_upsert(
+                        rows=batch, conflict_keys=self.conflict_keys, batch_size=self.batch_size
+                    )
+                else:
+                    result = await self.dao.bulk_create(rows=batch, batch_size=self.batch_size)
+            except (PoolExhaustedError, QueryTimeoutError):
+                result = None
+            # Ошибку базы BaseDAO уже записал в лог и вернул None
+            if result is not None:
+                write_behind_flushes_total.labels(name).inc()
+                write_behind_rows_total.labels(name, "written").inc(len(batch))
+                return
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+        write_behind_rows_total.labels(name, "dropped").inc(len(batch))
+        logger.error("Write-behind batch dropped", extra={"dao": name, "rows": len(batch)})
@@ -0,0 +1,116 @@
+"""
+Выполнение CPU-нагруженной работы в пуле процессов без блокировки event loop
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+cpu_pool_tasks_total = registry.counter(
+    "cpu_pool_tasks_total", "Functions executed in the CPU process pool by outcome.", ("function", "status")
+)
+cpu_pool_task_duration_seconds = registry.histogram(
+    "cpu_pool_task_duration_seconds", "Time from submission to result in the CPU process pool.", ("function",)
+)
+cpu_pool_pending = registry.gauge(
+    "cpu_pool_pending", "Functions submitted to the CPU process pool and not finished yet."
+)
+
+
+class CpuPool:
+    """
+    Пул процессов для CPU-нагруженных функций: хеширования, сжатия, сериализации больших объемов.
+
+    Функция выполняется в другом процессе, поэтому не держит GIL и event loop воркера, но ее
+    аргументы и результат передаются через pickle: функция должна быть объявлена на уровне модуля,
+    а выигрыш есть, только если вычисление заметно дороже передачи данных. Одновременно в пул
+    передается не больше `max_pending` функций, остальные вызовы ждут: очередь пула не растет
+    без ограничений. Если процесс пула аварийно завершился, пул пересоздается.
+
+    Процессы запускаются методом spawn (без копирования состояния воркера, в том числе
+    соединений) и создаются по мере необходимости. Пул создается в каждом воркере приложения,
+    поэтому `workers` лучше выбирать с учетом количества воркеров и CPU.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None):
+        """
+        Args:
+            workers (int | None): Количество процессов в пуле. По умолчанию `settings.CPU_POOL_WORKERS`.
+            max_pending (int | None): Максимальное количество функций, одновременно переданных в пул.
+                По умолчанию `settings.CPU_POOL_MAX_PENDING`.
+        """
+        self.workers = settings.CPU_POOL_WORKERS if workers is None else workers
+        self.max_pending = settings.CPU_POOL_MAX_PENDING if max_pending is None else max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = cpu_pool_pending.labels()
+
+    def start(self) -> None:
+        """Создает пул процессов, если он еще не создан. Процессы запускаются при первых вызовах."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """
+        Выполняет функцию в пуле процессов.
+
+        Args:
+            func (Callable[..., T]): Функция уровня модуля.
+            *args (Any): Позиционные аргументы функции.
+            **kwargs (Any): Именованные аргументы функции.
+
+        Returns:
+            T: Результат функции.
+
+        Raises:
+            BrokenProcessPool: Процесс пула аварийно завершился во время выполнения.
+        """
+        name = getattr(func, "__qualname__", repr(func))
+        async with self._slots:
+            self.start()
+            executor = self._executor
+            self._pending.inc()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+            except BrokenProcessPool:
+                cpu_pool_tasks_total.labels(name, "error").inc()
+                self._restart(executor)
+                raise
+            except Exception:
+                cpu_pool_tasks_total.labels(name, "error").inc()
+                raise
+            finally:
+                self._pending.dec()
+                cpu_pool_task_duration_seconds.labels(name).observe(time.perf_counter() - started)
+        cpu_pool_tasks_total.labels(name, "success").inc()
+        return result
+
+    async def close(self) -> None:
+        """Дожидается выполняющихся функций и завершает процессы пула."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # shutdown блокирует поток до завершения процессов: ждем его вне event loop
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        # Несколько вызовов могут упасть на одном сломанном пуле: пересоздается он один раз
+        if self._executor is executor:
+            logger.error("CPU process pool is broken, restarting", extra={"workers": self.workers})
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+cpu_pool = CpuPool()
@@ -0,0 +1,77 @@
+"""
+Ограниченный по размеру in-process кеш с вытеснением LRU и временем жизни записей
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    LRU кеш с TTL для одного процесса.
+
+    Кеш не потокобезопасен и рассчитан на использование из одного event loop.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Args:
+            max_size (int): Максимальное количество записей, при превышении вытесняется самая старая.
+            ttl (float): Время жизни записи в секундах.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу, если оно есть и не истекло.
+
+        Args:
+            key (Hashable): Ключ записи.
+            default (Any): Значение, возвращаемое при промахе.
+
+        Returns:
+            Any: Значение записи или `default`.
+        """
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение и вытесняет самые давно использованные записи при переполнении.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение записи.
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Удаляет запись, если она есть.
+
+        Args:
+            key (Hashable): Ключ записи.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,131 @@
+"""
+Сериализаторы значений для хранилищ (Redis и т.п.) с опциональным сжатием
+"""
+
+import json
+import zlib
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Serializer(Protocol):
+    """Интерфейс сериализатора: значение в байты и обратно."""
+
+    def dumps(self, value: Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes) -> Any:
+        ...
+
+
+class JsonSerializer:
+    """Сериализация стандартным модулем json."""
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """Сериализация orjson: тот же JSON, но в несколько раз быстрее."""
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is required for OrjsonSerializer: pip install orjson")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer:
+    """Бинарная сериализация msgpack: компактнее JSON, особенно для чисел и коротких строк."""
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is required for MsgpackSerializer: pip install msgpack")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class CompressedSerializer:
+    """
+    Обертка, сжимающая zlib значения больше порога.
+
+    Первый байт результата - признак сжатия, поэтому сжатые и несжатые значения
+    можно читать одним и тем же сериализатором.
+    """
+
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+
+    def __init__(self, inner: Serializer, threshold: int, level: int = 6):
+        """
+        Args:
+            inner (Serializer): Сериализатор значений.
+            threshold (int): Минимальный размер сериализованного значения в байтах для сжатия.
+            level (int): Уровень сжатия zlib.
+        """
+        self.inner = inner
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.inner.dumps(value)
+        if len(data) >= self.threshold:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return self.ZLIB + compressed
+        return self.RAW + data
+
+    def loads(self, data: bytes) -> Any:
+        marker, payload = data[:1], data[1:]
+        if marker == self.ZLIB:
+            payload = zlib.decompress(payload)
+        return self.inner.loads(payload)
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def get_serializer(name: str = "json", compression_threshold: int | None = None) -> Serializer:
+    """
+    Создает сериализатор по имени.
+
+    Args:
+        name (str): Имя сериализатора: "json", "orjson" или "msgpack".
+        compression_threshold (int | None): Порог сжатия в байтах. None отключает сжатие.
+
+    Returns:
+        Serializer: Сериализатор.
+
+    Raises:
+        ValueError: Если сериализатор с таким именем не существует.
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer {name}, available: {', '.join(SERIALIZERS)}")
+    serializer = SERIALIZERS[name]()
+    if compression_threshold is not None:
+        return CompressedSerializer(serializer, threshold=compression_threshold)
+    return serializer
@@ -0,0 +1,158 @@
+"""
+Сводная статистика измерений и сравнение результатов бенчмарков с сохраненной базовой линией
+
+Результаты хранятся в JSON: {"meta": {...}, "results": {"<случай>": {"<метрика>": число}}}.
+Метрики с суффиксом `_ms` - задержки (меньше - лучше), `rps` и `ops_per_sec` - пропускная
+способность (больше - лучше). Остальные метрики (например, количество строк) не сравниваются.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+THROUGHPUT_METRICS = ("rps", "ops_per_sec")
+DEFAULT_THRESHOLD = 0.15
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> dict[str, float]:
+    """
+    Сводит задержки отдельных операций в метрики случая.
+
+    Args:
+        latencies (Sequence[float]): Задержки операций в секундах.
+        elapsed (float): Общее время выполнения всех операций в секундах.
+
+    Returns:
+        dict[str, float]: Количество операций, операции в секунду и задержки p50/p95/p99/mean в мс.
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(q: float) -> float:
+        # Ближайший ранг: значение, не меньше которого q доля измерений
+        return ordered[min(count - 1, max(0, round(q * count) - 1))] * 1000
+
+    return {
+        "count": count,
+        "ops_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет в парсер аргументы сохранения и сравнения базовой линии."""
+    parser.add_argument("--save", type=Path, help="сохранить результаты как базовую линию в JSON файл")
+    parser.add_argument("--compare", type=Path, help="сравнить результаты с базовой линией из JSON файла")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="допустимое ухудшение метрики относительно базовой линии, доля (0.15 = 15%%)",
+    )
+
+
+def handle_results(args: argparse.Namespace, results: dict[str, dict[str, float]], meta: dict) -> int:
+    """
+    Сохраняет результаты и (или) сравнивает их с базовой линией по аргументам командной строки.
+
+    Args:
+        args (argparse.Namespace): Аргументы из `add_arguments`.
+        results (dict[str, dict[str, float]]): Метрики по случаям.
+        meta (dict): Параметры запуска, сохраняются вместе с результатами.
+
+    Returns:
+        int: Код завершения процесса: 1, если найдена регрессия, иначе 0.
+    """
+    exit_code = 0
+    if args.compare is not None:
+        if args.compare.exists():
+            baseline = json.loads(args.compare.read_text())
+            if baseline.get("meta", {}).get("params") != meta:
+                print(f"warning: baseline {args.compare} was recorded with different parameters", file=sys.stderr)
+            regressions = compare(results, baseline["results"], args.threshold)
+            for line in regressions:
+                print(f"REGRESSION {line}", file=sys.stderr)
+            if regressions:
+                exit_code = 1
+            else:
+                print(f"no regressions against {args.compare} (threshold {args.threshold:.0%})")
+        else:
+            print(f"baseline {args.compare} not found, nothing to compare", file=sys.stderr)
+    if args.save is not None:
+        save(args.save, results, meta)
+        print(f"baseline saved to {args.save}")
+    return exit_code
+
+
+def save(path: Path, results: dict[str, dict[str, float]], params: dict) -> None:
+    """
+    Сохраняет результаты в JSON вместе с параметрами запуска и окружением.
+
+    Args:
+        path (Path): Путь к файлу.
+        results (dict[str, dict[str, float]]): Метрики по случаям.
+        params (dict): Параметры запуска бенчмарка.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "meta": {
+            "params": params,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """
+    Сравнивает результаты с базовой линией.
+
+    Args:
+        results (dict[str, dict[str, float]]): Текущие метрики по случаям.
+        baseline (dict[str, dict[str, float]]): Метрики базовой линии.
+        threshold (float): Допустимое ухудшение метрики, доля от значения базовой линии.
+
+    Returns:
+        list[str]: Описания метрик, ухудшившихся больше чем на `threshold`.
+    """
+    regressions = []
+    for case, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(case, {}).get(name)
+            if not base:
+                continue
+            if name in THROUGHPUT_METRICS:
+                change = (base - value) / base
+            elif name.endswith("_ms"):
+                change = (value - base) / base
+            else:
+                continue
+            if change > threshold:
+                regressions.append(f"{case} {name}: {base:.3f} -> {value:.3f} ({change:+.1%} worse)")
+    return regressions
+
+
+def print_table(results: dict[str, dict[str, float]]) -> None:
+    """Выводит метрики случаев таблицей."""
+    print(f"{'case':<40}{'count':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for case, metrics in results.items():
+        throughput = next(metrics[name] for name in THROUGHPUT_METRICS if name in metrics)
+        print(
+            f"{case:<40}{metrics['count']:>8.0f}{throughput:>12.1f}"
+            f"{metrics['p50_ms']:>10.2f}{metrics['p95_ms']:>10.2f}{metrics['p99_ms']:>10.2f}"
+        )
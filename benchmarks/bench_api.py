@@ -0,0 +1,154 @@
+"""
+Нагрузочный тест API в процессе: запросы подаются напрямую в ASGI приложение из app.main.create_app
+
+Приложение запускается целиком, с lifespan и всеми middleware, но без сети и HTTP сервера,
+поэтому результат отражает стоимость обработки запроса в приложении: middleware, маршрутизации,
+DAO и сериализации. Для каждого эндпоинта `--concurrency` клиентов отправляют запросы подряд,
+пока не будет выполнено `--requests` запросов; выводятся RPS и задержки p50/p95/p99.
+Перед запуском таблица дополняется `--rows` строками (удаляются после запуска), логи запросов
+пишутся в /dev/null.
+
+Запуск (нужны Postgres, MongoDB и Redis из docker-compose и примененные миграции):
+    python -m benchmarks.bench_api --requests 2000 --concurrency 20
+
+Сохранение и сравнение с базовой линией (код завершения 1 при регрессии больше порога):
+    python -m benchmarks.bench_api --save benchmarks/baselines/api.json
+    python -m benchmarks.bench_api --compare benchmarks/baselines/api.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app.core.logger import logHandler
+from app.database.data_layer.test_dao import TestDAO
+from app.database.postgres import async_session_maker
+from app.main import create_app
+from app.models.tests import TestModel
+from benchmarks.baseline import add_arguments, handle_results, print_table, summarize
+
+DEFAULT_PATHS = ["/test", "/test/items", "/test/keyset?limit=50", "/test/items/{test_id}"]
+
+app = create_app()
+
+
+def build_scope(target: str) -> dict:
+    path, _, query = target.partition("?")
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+        "app": app,
+    }
+
+
+async def request(target: str) -> int:
+    """
+    Выполняет один GET запрос к приложению.
+
+    Returns:
+        int: HTTP статус ответа.
+    """
+    status = 0
+    done = asyncio.Event()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Клиент "отключается" только после ответа, как при обычном keep-alive соединении
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            done.set()
+
+    try:
+        await app(build_scope(target), receive, send)
+    finally:
+        done.set()
+    return status
+
+
+async def load(target: str, count: int, concurrency: int) -> dict[str, float]:
+    """
+    Нагружает эндпоинт `concurrency` параллельными клиентами.
+
+    Returns:
+        dict[str, float]: Метрики из `summarize` и доля ответов с ошибкой.
+    """
+    latencies = []
+    errors = 0
+    remaining = count
+
+    async def client() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            status = await request(target)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    metrics = summarize(latencies, time.perf_counter() - started)
+    metrics["rps"] = metrics.pop("ops_per_sec")
+    metrics["error_rate"] = errors / count
+    return metrics
+
+
+async def main(args: argparse.Namespace) -> int:
+    logHandler.setStream(open(os.devnull, "w"))
+    prefix = f"bench-{uuid4().hex[:8]}-"
+    results = {}
+    async with app.router.lifespan_context(app):
+        rows = [{"test_id": uuid4(), "info": f"{prefix}{i}"} for i in range(args.rows)]
+        await TestDAO.bulk_copy(rows=rows)
+        try:
+            for path in args.paths:
+                target = path.format(test_id=rows[0]["test_id"] if rows else uuid4())
+                await load(target, min(args.requests, args.concurrency * 5), args.concurrency)
+                results[f"GET {path}"] = await load(target, args.requests, args.concurrency)
+        finally:
+            async with async_session_maker() as session:
+                await session.execute(delete(TestModel).where(TestModel.info.startswith(prefix)))
+                await session.commit()
+
+    print_table(results)
+    for case, metrics in results.items():
+        if metrics["error_rate"]:
+            print(f"warning: {case} returned errors for {metrics['error_rate']:.1%} of requests", file=sys.stderr)
+    params = {"paths": args.paths, "requests": args.requests, "concurrency": args.concurrency, "rows": args.rows}
+    return handle_results(args, results, params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="пути GET запросов, {test_id} - id строки")
+    parser.add_argument("--requests", type=int, default=2000, help="запросов на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=20, help="параллельных клиентов")
+    parser.add_argument("--rows", type=int, default=100, help="строк в таблице во время теста")
+    add_arguments(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
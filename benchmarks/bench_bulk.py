@@ -0,0 +1,73 @@
+"""
+Бенчмарк массовой вставки: цикл BaseDAO.create против bulk_create и bulk_copy
+
+Запуск (нужен Postgres из docker-compose и примененные миграции):
+    python -m benchmarks.bench_bulk --rows 10000 --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app.database.data_layer.test_dao import TestDAO
+from app.database.postgres import async_session_maker, dispose_engine, init_engine
+from app.models.tests import TestModel
+
+
+async def cleanup(prefix: str) -> None:
+    """Удаляет строки, созданные бенчмарком."""
+    async with async_session_maker() as session:
+        await session.execute(delete(TestModel).where(TestModel.info.startswith(prefix)))
+        await session.commit()
+
+
+async def bench_create_loop(rows: list[dict]) -> int | None:
+    for row in rows:
+        # Методы DAO вне unit of work возвращают None при ошибке базы
+        if await TestDAO.create(**row) is None:
+            return None
+    return len(rows)
+
+
+async def bench_bulk_create(rows: list[dict], batch_size: int) -> int | None:
+    return await TestDAO.bulk_create(rows=rows, batch_size=batch_size)
+
+
+async def bench_bulk_copy(rows: list[dict]) -> int | None:
+    return await TestDAO.bulk_copy(rows=rows)
+
+
+async def main(rows_count: int, loop_rows_count: int, batch_size: int) -> None:
+    init_engine()
+    prefix = f"bench-{uuid4().hex[:8]}-"
+    cases = [
+        ("create loop", loop_rows_count, lambda rows: bench_create_loop(rows)),
+        ("bulk_create", rows_count, lambda rows: bench_bulk_create(rows, batch_size)),
+        ("bulk_copy", rows_count, lambda rows: bench_bulk_copy(rows)),
+    ]
+    try:
+        print(f"{'method':<14}{'rows':>10}{'seconds':>12}{'rows/s':>14}")
+        for name, count, case in cases:
+            rows = [{"info": f"{prefix}{i}"} for i in range(count)]
+            started = time.perf_counter()
+            written = await case(rows)
+            elapsed = time.perf_counter() - started
+            if written is None:
+                print(f"{name:<14}{'failed, see log':>36}")
+                continue
+            print(f"{name:<14}{written:>10}{elapsed:>12.3f}{written / elapsed:>14.0f}")
+    finally:
+        await cleanup(prefix)
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="строк для bulk_create и bulk_copy")
+    parser.add_argument("--loop-rows", type=int, default=1000, help="строк для цикла create (он медленный)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.loop_rows, args.batch_size))
@@ -0,0 +1,147 @@
+"""
+Микробенчмарки операций BaseDAO на таблицах разного размера
+
+Для каждого размера таблица `test-models` дополняется строками бенчмарка до нужного количества
+(через bulk_copy), после чего каждая операция выполняется `--iterations` раз подряд:
+create, find_one_or_none (по первичному ключу), find_all (фильтр по неиндексированной колонке,
+100 строк), get_paginated, update_by_id и delete_by_id (удаляет строки, созданные create).
+Строки бенчмарка удаляются после запуска. Строки, уже лежавшие в таблице, тоже влияют
+на результат, поэтому запускать лучше на пустой базе.
+
+Запуск (нужен Postgres из docker-compose и примененные миграции):
+    python -m benchmarks.bench_dao --sizes 1000 10000 --iterations 200
+
+На одноразовом экземпляре Postgres схему можно создать без миграций:
+    docker run --rm -d -p 5440:5432 -e POSTGRES_PASSWORD=postgres --name bench-pg postgres:15
+    PG_PORT=5440 python -m benchmarks.bench_dao --create-schema
+
+Сохранение и сравнение с базовой линией (код завершения 1 при регрессии больше порога):
+    python -m benchmarks.bench_dao --save benchmarks/baselines/dao.json
+    python -m benchmarks.bench_dao --compare benchmarks/baselines/dao.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app.database.data_layer.test_dao import TestDAO
+from app.database.postgres import Base, async_session_maker, dispose_engine, init_engine
+from app.models.tests import TestModel
+from benchmarks.baseline import add_arguments, handle_results, print_table, summarize
+
+# Количество строк с одинаковым `info`, которые возвращает find_all
+FIND_ALL_GROUP = 100
+
+
+async def cleanup(prefix: str) -> None:
+    """Удаляет строки, созданные бенчмарком."""
+    async with async_session_maker() as session:
+        await session.execute(delete(TestModel).where(TestModel.info.startswith(prefix)))
+        await session.commit()
+
+
+async def measure(operation: Callable[[int], Awaitable], iterations: int, warmup: int) -> dict[str, float]:
+    """
+    Выполняет операцию последовательно и сводит задержки.
+
+    Args:
+        operation (Callable[[int], Awaitable]): Операция, получает номер итерации.
+        iterations (int): Количество измеряемых выполнений.
+        warmup (int): Количество выполнений до измерения (прогрев пула и кешей планов).
+
+    Returns:
+        dict[str, float]: Метрики из `summarize`.
+    """
+    for i in range(warmup):
+        await operation(i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        operation_started = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - operation_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def bench_size(prefix: str, ids: list, size: int, iterations: int, warmup: int) -> dict[str, dict]:
+    """Измеряет все операции на таблице с `size` строками бенчмарка."""
+    created = []
+
+    async def create(i: int) -> None:
+        instance = await TestDAO.create(info=f"{prefix}new-{size}-{i}")
+        created.append(instance.test_id)
+
+    async def find_one_or_none(i: int) -> None:
+        await TestDAO.find_one_or_none(test_id=random.choice(ids))
+
+    async def find_all(i: int) -> None:
+        await TestDAO.find_all(info=f"{prefix}{random.randrange(len(ids) // FIND_ALL_GROUP or 1)}")
+
+    async def get_paginated(i: int) -> None:
+        await TestDAO.get_paginated(offset=random.randrange(max(size - 50, 1)), limit=50)
+
+    async def update_by_id(i: int) -> None:
+        # Значение info не меняется, чтобы не менять группы строк для find_all
+        index = random.randrange(len(ids))
+        await TestDAO.update_by_id(
+            id_field="test_id", id_value=ids[index], update_data={"info": f"{prefix}{index // FIND_ALL_GROUP}"}
+        )
+
+    async def delete_by_id(i: int) -> None:
+        await TestDAO.delete_by_id(id_field="test_id", id_value=created[i])
+
+    operations = [create, find_one_or_none, find_all, get_paginated, update_by_id, delete_by_id]
+    results = {}
+    for operation in operations:
+        results[f"{operation.__name__} @ {size}"] = await measure(operation, iterations, warmup)
+    return results
+
+
+async def seed(prefix: str, ids: list, size: int) -> None:
+    """Дополняет строки бенчмарка до `size`."""
+    rows = [
+        {"test_id": uuid4(), "info": f"{prefix}{i // FIND_ALL_GROUP}"}
+        for i in range(len(ids), size)
+    ]
+    if rows:
+        await TestDAO.bulk_copy(rows=rows)
+        ids.extend(row["test_id"] for row in rows)
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = init_engine()
+    if args.create_schema:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    random.seed(args.seed)
+    prefix = f"bench-{uuid4().hex[:8]}-"
+    ids: list = []
+    results = {}
+    try:
+        for size in sorted(args.sizes):
+            await seed(prefix, ids, size)
+            results.update(await bench_size(prefix, ids, size, args.iterations, args.warmup))
+    finally:
+        await cleanup(prefix)
+        await dispose_engine()
+
+    print_table(results)
+    params = {"sizes": sorted(args.sizes), "iterations": args.iterations, "warmup": args.warmup, "seed": args.seed}
+    return handle_results(args, results, params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="размеры таблицы в строках")
+    parser.add_argument("--iterations", type=int, default=200, help="измеряемых выполнений каждой операции")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42, help="seed выбора случайных ключей")
+    parser.add_argument("--create-schema", action="store_true", help="создать таблицы без миграций")
+    add_arguments(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
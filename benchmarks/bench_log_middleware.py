@@ -0,0 +1,114 @@
+"""
+Бенчмарк пропускной способности LogRequestsMiddleware: прежний BaseHTTPMiddleware против ASGI middleware
+
+Запросы подаются напрямую в ASGI приложение без сети, логи пишутся в /dev/null
+через фоновый поток логирования, поэтому результат отражает накладные расходы самого middleware.
+
+Запуск:
+    python -m benchmarks.bench_log_middleware --requests 5000 --body-size 4096
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.core.logger import logHandler, logger, start_log_listener, stop_log_listener
+from app.middlewares.log_requests import LogRequestsMiddleware
+
+
+class LegacyLogRequestsMiddleware(BaseHTTPMiddleware):
+    """Реализация LogRequestsMiddleware до перехода на ASGI, для сравнения."""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        body = await request.body()
+        form = await request.form()
+        message = f"[{request.method}]: {request.url} body: {body} headers: {request.headers} form: {form}"
+        logger.info(message)
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            logger.error(f"[{e}]: {message}")
+            raise e
+        return response
+
+
+async def endpoint(request: Request) -> Response:
+    body = await request.body()
+    return JSONResponse({"received": len(body)})
+
+
+def build_app(middleware: type | None, **options) -> Starlette:
+    app = Starlette(routes=[Route("/items", endpoint, methods=["POST"])])
+    if middleware is not None:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def run_requests(app: Starlette, count: int, body: bytes) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/items",
+        "raw_path": b"/items",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", b"Bearer secret"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(count):
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {"type": "http.disconnect"}
+
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+async def main(count: int, body_size: int) -> None:
+    logHandler.setStream(open(os.devnull, "w"))
+    start_log_listener()
+
+    body = b'{"payload": "' + b"x" * max(body_size - 15, 0) + b'"}'
+    cases = [
+        ("no middleware", build_app(None)),
+        ("legacy BaseHTTPMiddleware", build_app(LegacyLogRequestsMiddleware)),
+        ("ASGI", build_app(LogRequestsMiddleware)),
+        ("ASGI + 1% body sampling", build_app(LogRequestsMiddleware, capture_body=True, body_sample_rate=0.01)),
+    ]
+    print(f"{'variant':<28}{'seconds':>10}{'req/s':>12}{'us/req':>10}")
+    for name, app in cases:
+        await run_requests(app, min(count, 100), body)
+        elapsed = await run_requests(app, count, body)
+        print(f"{name:<28}{elapsed:>10.3f}{count / elapsed:>12.0f}{elapsed / count * 1e6:>10.1f}")
+    stop_log_listener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--body-size", type=int, default=4096)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.body_size))
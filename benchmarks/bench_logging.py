@@ -0,0 +1,110 @@
+"""
+Микробенчмарк стоимости вызова logger.info для вызывающего потока (event loop)
+
+Сравниваются синхронная запись (форматирование и запись в поток в момент вызова, как было
+до перехода на очередь) и запись через DroppingQueueHandler, где вызывающий поток только
+кладет запись в очередь. Вывод идет в /dev/null и в медленный поток, имитирующий
+заполненный pipe stdout (в этом случае синхронная запись блокирует event loop).
+
+Запуск:
+    python -m benchmarks.bench_logging --records 100000
+"""
+
+import argparse
+import logging
+import os
+import queue
+import time
+from datetime import datetime
+
+from app.core.logger import CustomJsonFormatter, DroppingQueueHandler, LogQueueListener
+
+try:
+    from pythonjsonlogger import jsonlogger
+except ImportError:
+    jsonlogger = None
+
+
+def legacy_formatter() -> logging.Formatter | None:
+    """Форматтер на python-json-logger, использовавшийся до перехода на очередь."""
+    if jsonlogger is None:
+        return None
+
+    class LegacyJsonFormatter(jsonlogger.JsonFormatter):
+        def add_fields(self, log_record, record, message_dict):
+            super().add_fields(log_record, record, message_dict)
+            if not log_record.get("timestamp"):
+                log_record["timestamp"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            log_record["level"] = record.levelname
+
+    return LegacyJsonFormatter("%(message)s %(timestamp)s %(level)s  %(module)s %(funcName)s")
+
+
+def measure(bench_logger: logging.Logger, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        bench_logger.info("HTTP request", extra={"method": "GET", "path": "/test", "status": 200, "n": i})
+    return time.perf_counter() - started
+
+
+class SlowStream:
+    """Поток вывода с задержкой записи: имитирует заполненный pipe stdout под нагрузкой."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        time.sleep(self.latency)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def build_cases(stream, queue_size: int, suffix: str) -> list[tuple]:
+    cases = []
+    legacy = legacy_formatter()
+    if legacy is not None:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(legacy)
+        cases.append((f"sync python-json-logger{suffix}", handler, None))
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(CustomJsonFormatter())
+    cases.append((f"sync CustomJsonFormatter{suffix}", handler, None))
+
+    target = logging.StreamHandler(stream)
+    target.setFormatter(CustomJsonFormatter())
+    queued = DroppingQueueHandler(queue.Queue(maxsize=queue_size), target=target)
+    cases.append((f"queue{suffix}", queued, LogQueueListener(queued.queue, target)))
+    return cases
+
+
+def main(count: int, queue_size: int, sink_latency_us: float) -> None:
+    cases = build_cases(open(os.devnull, "w"), queue_size, "")
+    cases += build_cases(SlowStream(sink_latency_us / 1e6), queue_size, " (slow stdout)")
+
+    print(f"{'variant':<40}{'seconds':>10}{'us/call':>10}{'dropped':>10}")
+    for name, handler, listener in cases:
+        bench_logger = logging.getLogger(f"bench.{name}")
+        bench_logger.propagate = False
+        bench_logger.setLevel(logging.INFO)
+        bench_logger.addHandler(handler)
+        if listener is not None:
+            listener.start()
+            handler.listener = listener
+        elapsed = measure(bench_logger, count)
+        if listener is not None:
+            handler.listener = None
+            listener.stop()
+        dropped = getattr(handler, "dropped", 0)
+        print(f"{name:<40}{elapsed:>10.3f}{elapsed / count * 1e6:>10.2f}{dropped:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--sink-latency-us", type=float, default=50, help="задержка записи медленного stdout")
+    args = parser.parse_args()
+    main(args.records, args.queue_size, args.sink_latency_us)
@@ -0,0 +1,123 @@
+"""
+Бенчмарк MongoDAO: поштучные вызовы против пакетных операций
+
+Варианты записи: цикл insert_one, insert_many (ordered и unordered), цикл upsert через
+update_one против upsert_many. Варианты чтения: цикл find_one по ключу против одного find
+с $in и потокового чтения через stream.
+
+Запуск (нужен MongoDB из docker-compose):
+    python -m benchmarks.bench_mongo --docs 10000 --loop-docs 1000
+
+С флагом --mock используется mongomock-motor (pip install mongomock-motor): это проверка
+работоспособности, а не измерение, так как сетевых задержек нет. Варианты upsert с mongomock
+пропускаются: он не поддерживает операции bulk_write из свежих версий pymongo.
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import aclosing
+from uuid import uuid4
+
+from pymongo import IndexModel
+
+from app.database.data_layer.mongo_dao import MongoDAO
+from app.database.mongo import close_mongo, init_mongo
+
+
+class BenchDAO(MongoDAO):
+    collection_name = f"bench_{uuid4().hex[:8]}"
+    indexes = [IndexModel("sku", unique=True)]
+
+
+def make_documents(start: int, count: int) -> list[dict]:
+    return [{"sku": i, "name": f"item {i}", "price": i / 100, "tags": ["a", "b"]} for i in range(start, start + count)]
+
+
+async def insert_loop(documents: list[dict]) -> None:
+    for document in documents:
+        await BenchDAO.insert_one(document)
+
+
+async def upsert_loop(documents: list[dict]) -> None:
+    collection = BenchDAO.collection()
+    for document in documents:
+        await collection.update_one({"sku": document["sku"]}, {"$set": document}, upsert=True)
+
+
+async def find_loop(skus: list[int]) -> None:
+    for sku in skus:
+        await BenchDAO.find_one({"sku": sku}, projection={"_id": 0})
+
+
+async def find_in(skus: list[int]) -> None:
+    await BenchDAO.find({"sku": {"$in": skus}}, projection={"_id": 0})
+
+
+async def stream_all(batch_size: int) -> None:
+    async with aclosing(BenchDAO.stream(projection={"_id": 0}, batch_size=batch_size)) as chunks:
+        async for _ in chunks:
+            pass
+
+
+async def main(docs: int, loop_docs: int, batch_size: int, mock: bool) -> None:
+    if mock:
+        from mongomock_motor import AsyncMongoMockClient
+
+        init_mongo(AsyncMongoMockClient())
+    else:
+        init_mongo()
+    await BenchDAO.ensure_indexes()
+
+    offset = 0
+
+    def next_documents(count: int) -> list[dict]:
+        nonlocal offset
+        documents = make_documents(offset, count)
+        offset += count
+        return documents
+
+    cases = [
+        ("insert_one loop", loop_docs, lambda d: insert_loop(d)),
+        ("insert_many ordered", docs, lambda d: BenchDAO.insert_many(d, ordered=True, batch_size=batch_size)),
+        ("insert_many unordered", docs, lambda d: BenchDAO.insert_many(d, ordered=False, batch_size=batch_size)),
+    ]
+    if not mock:
+        cases += [
+            ("update_one upsert loop", loop_docs, lambda d: upsert_loop(d)),
+            ("upsert_many", docs, lambda d: BenchDAO.upsert_many(d, key_fields=["sku"], batch_size=batch_size)),
+        ]
+
+    try:
+        print(f"{'operation':<26}{'docs':>10}{'seconds':>12}{'docs/s':>14}")
+        for name, count, case in cases:
+            documents = next_documents(count)
+            started = time.perf_counter()
+            await case(documents)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<26}{count:>10}{elapsed:>12.3f}{count / elapsed:>14.0f}")
+
+        total = await BenchDAO.count()
+        read_cases = [
+            ("find_one loop", loop_docs, lambda: find_loop(list(range(loop_docs)))),
+            ("find $in", loop_docs, lambda: find_in(list(range(loop_docs)))),
+            (f"stream batch={batch_size}", total, lambda: stream_all(batch_size)),
+        ]
+        for name, count, case in read_cases:
+            started = time.perf_counter()
+            await case()
+            elapsed = time.perf_counter() - started
+            print(f"{name:<26}{count:>10}{elapsed:>12.3f}{count / elapsed:>14.0f}")
+    finally:
+        await BenchDAO.collection().drop()
+        close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=10000, help="документов для пакетных операций")
+    parser.add_argument("--loop-docs", type=int, default=1000, help="документов для поштучных вызовов")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--mock", action="store_true", help="использовать mongomock-motor вместо MongoDB")
+    args = parser.parse_args()
+    asyncio.run(main(args.docs, args.loop_docs, args.batch_size, args.mock))
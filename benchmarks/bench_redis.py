@@ -0,0 +1,87 @@
+"""
+Бенчмарк RedisCache: поштучные get/set с JSON против mget/mset с разными сериализаторами
+
+Для каждого варианта записывается и читается `--keys` ключей, замеряется время, количество
+обращений к Redis и объем значений, переданных по сети.
+
+Запуск (нужен Redis из docker-compose):
+    python -m benchmarks.bench_redis --keys 50 --rounds 200
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from app.database.redis import RedisCache
+from app.utils.serializers import CompressedSerializer, JsonSerializer, MsgpackSerializer, OrjsonSerializer
+
+
+def make_values(count: int) -> dict[str, dict]:
+    """Создает значения, похожие на кешируемые записи DAO."""
+    prefix = f"bench:{uuid4().hex[:8]}"
+    return {
+        f"{prefix}:{i}": {
+            "test_id": str(uuid4()),
+            "info": "lorem ipsum dolor sit amet " * 8,
+            "counter": i,
+            "ratio": i / 7,
+            "tags": ["alpha", "beta", "gamma"],
+        }
+        for i in range(count)
+    }
+
+
+async def bench_per_key(cache: RedisCache, values: dict[str, dict], rounds: int) -> int:
+    for _ in range(rounds):
+        for key, value in values.items():
+            await cache.set(key, value, expire=60)
+        for key in values:
+            await cache.get(key)
+    return 2 * len(values) * rounds
+
+
+async def bench_batch(cache: RedisCache, values: dict[str, dict], rounds: int) -> int:
+    for _ in range(rounds):
+        await cache.mset(values, expire=60)
+        await cache.mget(values)
+    return 2 * rounds
+
+
+async def main(keys: int, rounds: int, fake: bool) -> None:
+    client = None
+    if fake:
+        import fakeredis
+
+        client = fakeredis.FakeAsyncRedis()
+
+    values = make_values(keys)
+    cases = [
+        ("per-key json", JsonSerializer(), bench_per_key),
+        ("batch json", JsonSerializer(), bench_batch),
+        ("batch orjson", OrjsonSerializer(), bench_batch),
+        ("batch msgpack", MsgpackSerializer(), bench_batch),
+        ("batch msgpack+zlib", CompressedSerializer(MsgpackSerializer(), threshold=256), bench_batch),
+    ]
+
+    print(f"{'variant':<22}{'seconds':>10}{'round trips':>14}{'value bytes':>14}{'ops/s':>12}")
+    for name, serializer, case in cases:
+        cache = RedisCache(client=client, serializer=serializer)
+        payload = sum(len(serializer.dumps(value)) for value in values.values()) * 2 * rounds
+        started = time.perf_counter()
+        round_trips = await case(cache, values, rounds)
+        elapsed = time.perf_counter() - started
+        await cache.delete_many(values)
+        if client is None:
+            await cache.close()
+        operations = 2 * len(values) * rounds
+        print(f"{name:<22}{elapsed:>10.3f}{round_trips:>14}{payload:>14}{operations / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=50, help="ключей в одном запросе")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--fake", action="store_true", help="использовать fakeredis вместо Redis")
+    args = parser.parse_args()
+    asyncio.run(main(args.keys, args.rounds, args.fake))
@@ -0,0 +1,118 @@
+"""
+Бенчмарк сериализации ответа со списком записей: путь FastAPI с response_model против быстрого пути
+
+Варианты:
+    legacy jsonable_encoder  - валидация ORM объектов, jsonable_encoder и json.dumps (FastAPI до dump_json)
+    response_model           - то, что FastAPI делает сейчас: валидация ORM объектов и dump_json
+    model_construct          - DTO из ORM объектов через model_construct без валидации и dump_json
+    find_all_as + dump_json  - DTO из строк-словарей одним вызовом pydantic-core (BaseDAO.find_all_as)
+    mappings + orjson        - строки-словари сразу в orjson, без DTO (find_all_mappings + OrjsonResponse)
+
+Данные создаются в памяти, база не нужна. С флагом --db дополнительно сравнивается чтение
+из Postgres через find_all и find_all_mappings (нужны docker-compose и данные в таблице).
+
+Запуск:
+    python -m benchmarks.bench_serialization --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.models.tests import TestModel
+from app.schemas.adapters import dump_json, get_adapter
+from app.schemas.tests import TestDTO
+
+
+def legacy_encoder(instances: list[TestModel]) -> bytes:
+    items = get_adapter(list[TestDTO]).validate_python(instances, from_attributes=True)
+    return json.dumps(jsonable_encoder(items)).encode()
+
+
+def response_model(instances: list[TestModel]) -> bytes:
+    adapter = get_adapter(list[TestDTO])
+    return adapter.dump_json(adapter.validate_python(instances, from_attributes=True))
+
+
+def model_construct(instances: list[TestModel]) -> bytes:
+    items = [
+        TestDTO.model_construct(**{name: getattr(instance, name) for name in TestDTO.model_fields})
+        for instance in instances
+    ]
+    return dump_json(list[TestDTO], items)
+
+
+def find_all_as(rows: list[dict]) -> bytes:
+    return dump_json(list[TestDTO], get_adapter(list[TestDTO]).validate_python(rows))
+
+
+def mappings_orjson(rows: list[dict]) -> bytes:
+    return orjson.dumps(rows)
+
+
+def measure(func, data, repeat: int) -> float:
+    """Возвращает лучшее время из `repeat` запусков в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_memory(sizes: list[int], repeat: int) -> None:
+    print(f"{'variant':<30}{'rows':>10}{'ms':>12}{'rows/s':>14}")
+    for size in sizes:
+        rows = [{"test_id": uuid4(), "info": f"item {i}"} for i in range(size)]
+        instances = [TestModel(**row) for row in rows]
+        cases = [
+            ("legacy jsonable_encoder", legacy_encoder, instances),
+            ("response_model", response_model, instances),
+            ("model_construct", model_construct, instances),
+            ("find_all_as + dump_json", find_all_as, rows),
+            ("mappings + orjson", mappings_orjson, rows),
+        ]
+        for name, func, data in cases:
+            elapsed = measure(func, data, repeat)
+            print(f"{name:<30}{size:>10}{elapsed * 1000:>12.2f}{size / elapsed:>14.0f}")
+        print()
+
+
+async def bench_db(repeat: int) -> None:
+    from app.database.data_layer.test_dao import TestDAO
+    from app.database.postgres import dispose_engine, init_engine
+
+    init_engine()
+    try:
+        cases = [
+            ("find_all + response_model", lambda: TestDAO.find_all(), response_model),
+            ("find_all_mappings + orjson", lambda: TestDAO.find_all_mappings(), orjson.dumps),
+        ]
+        print(f"{'variant':<30}{'rows':>10}{'ms':>12}")
+        for name, load, serialize in cases:
+            best, count = float("inf"), 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                items = await load()
+                serialize(items)
+                best = min(best, time.perf_counter() - started)
+                count = len(items)
+            print(f"{name:<30}{count:>10}{best * 1000:>12.2f}")
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true", help="сравнить также чтение из Postgres")
+    args = parser.parse_args()
+    bench_memory(args.sizes, args.repeat)
+    if args.db:
+        asyncio.run(bench_db(args.repeat))
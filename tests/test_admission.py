@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+from fastapi import APIRouter, FastAPI
+
+from app.middlewares.admission import AdmissionControlMiddleware
+
+
+def create_app(**options) -> FastAPI:
+    router = APIRouter(prefix="/items")
+
+    @router.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.1)
+        return {"status": "ok"}
+
+    @router.get("/other")
+    async def other():
+        await asyncio.sleep(0.1)
+        return {"status": "ok"}
+
+    app = FastAPI()
+    app.include_router(router)
+    options = {"queue_timeout": 1.0, "route_limits": {}, "exempt_paths": (), **options}
+    app.add_middleware(AdmissionControlMiddleware, **options)
+    return app
+
+
+async def concurrent_statuses(app: FastAPI, *paths: str) -> list[int]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.get(path) for path in paths))
+    return sorted(response.status_code for response in responses)
+
+
+async def test_global_limit_sheds_when_queue_is_full():
+    app = create_app(max_concurrency=2, queue_size=0)
+    assert await concurrent_statuses(app, *["/items/other"] * 5) == [200, 200, 503, 503, 503]
+
+
+async def test_global_limit_queues_requests():
+    app = create_app(max_concurrency=1, queue_size=4)
+    assert await concurrent_statuses(app, *["/items/other"] * 3) == [200, 200, 200]
+
+
+async def test_route_limit_applies_to_included_router():
+    app = create_app(max_concurrency=100, queue_size=0, route_limits={"/items/slow": 1})
+    assert await concurrent_statuses(app, *["/items/slow"] * 5) == [200, 503, 503, 503, 503]
+
+
+async def test_route_limit_does_not_affect_other_routes():
+    app = create_app(max_concurrency=100, queue_size=0, route_limits={"/items/slow": 1})
+    assert await concurrent_statuses(app, "/items/slow", *["/items/other"] * 4) == [200] * 5
+
+
+async def test_rejected_response_has_retry_after():
+    app = create_app(max_concurrency=1, queue_size=0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = await asyncio.gather(client.get("/items/other"), client.get("/items/other"))
+    rejected = [response for response in responses if response.status_code == 503]
+    assert len(rejected) == 1 and rejected[0].headers["Retry-After"]
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app import main
+from app.core.config import settings
+from app.database.data_layer.test_dao import TestDAO as ItemDAO
+from app.middlewares.compression import CompressionMiddleware
+from app.schemas.tests import TestHashDTO as HashDTO
+from app.utils.cpu_pool import CpuPool, cpu_pool
+
+
+@pytest.fixture
+def events(monkeypatch) -> list[str]:
+    """Заменяет ресурсы lifespan заглушками, которые записывают запуск и закрытие."""
+    events = []
+
+    def sync(name):
+        return lambda *args, **kwargs: events.append(name)
+
+    def coro(name):
+        async def call(*args, **kwargs):
+            events.append(name)
+        return call
+
+    monkeypatch.setattr(main, "start_log_listener", sync("log:start"))
+    monkeypatch.setattr(main, "stop_log_listener", sync("log:stop"))
+    monkeypatch.setattr(main, "init_engine", sync("postgres:start"))
+    monkeypatch.setattr(main, "warm_up_engine", coro("postgres:warm_up"))
+    monkeypatch.setattr(main, "dispose_engine", coro("postgres:stop"))
+    monkeypatch.setattr(main, "init_mongo", sync("mongo:start"))
+    monkeypatch.setattr(main, "ensure_all_indexes", coro("mongo:indexes"))
+    monkeypatch.setattr(main, "close_mongo", sync("mongo:stop"))
+    monkeypatch.setattr(main, "replica_router", SimpleNamespace(
+        init=sync("replicas:init"), start=coro("replicas:start"), close=coro("replicas:stop")
+    ))
+    monkeypatch.setattr(main, "redis_cache", SimpleNamespace(connect=coro("redis:start"), close=coro("redis:stop")))
+    monkeypatch.setattr(main, "invalidation_listener", SimpleNamespace(
+        start=coro("invalidation:start"), stop=coro("invalidation:stop")
+    ))
+    monkeypatch.setattr(main, "request_service", SimpleNamespace(
+        start=coro("http:start"), close=coro("http:stop")
+    ))
+    monkeypatch.setattr(main, "cpu_pool", SimpleNamespace(start=sync("cpu:start"), close=coro("cpu:stop")))
+    monkeypatch.setattr(main, "WriteBehindBuffer", SimpleNamespace(stop_all=coro("write_behind:stop")))
+    monkeypatch.setattr(main, "task_runner", SimpleNamespace(start=coro("tasks:start"), stop=coro("tasks:stop")))
+    return events
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    app.state.import_seconds = 0.0
+    return app
+
+
+async def test_lifespan_stops_tasks_before_their_resources(events):
+    async with main.lifespan(create_app()):
+        events.append("serving")
+    stopped = events[events.index("serving") + 1:]
+    assert stopped == [
+        "tasks:stop", "write_behind:stop", "cpu:stop", "http:stop", "invalidation:stop",
+        "redis:stop", "mongo:stop", "replicas:stop", "postgres:stop", "log:stop",
+    ]
+
+
+async def test_lifespan_skips_mongo_indexes_when_disabled(events, monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_ENSURE_INDEXES", False)
+    async with main.lifespan(create_app()):
+        pass
+    assert "mongo:start" in events
+    assert "mongo:indexes" not in events
+
+
+def test_constructor_defaults_are_read_when_called(monkeypatch):
+    monkeypatch.setattr(settings, "CPU_POOL_WORKERS", 7)
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 10)
+    assert CpuPool().workers == 7
+    assert CompressionMiddleware(FastAPI()).minimum_size == 10
+
+
+async def test_failed_startup_releases_started_resources(events, monkeypatch):
+    async def fail():
+        events.append("redis:start")
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(main.redis_cache, "connect", fail)
+    with pytest.raises(ConnectionError):
+        async with main.lifespan(create_app()):
+            pass
+    stopped = events[events.index("redis:start") + 1:]
+    assert stopped == ["redis:stop", "mongo:stop", "replicas:stop", "postgres:stop", "log:stop"]
+
+
+async def test_hash_takes_password_from_body(monkeypatch):
+    async def run(func, *args):
+        return func(*args)
+
+    monkeypatch.setattr(cpu_pool, "run", run)
+    app = FastAPI()
+    app.include_router(main.test_router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/test/hash", json={"password": "secret"})
+        assert response.status_code == 200
+        assert len(bytes.fromhex(response.json()["hash"])) == 32
+        response = await client.post("/test/hash", params={"password": "secret"})
+        assert response.status_code == 422
+    assert "secret" not in repr(HashDTO(password="secret"))
+
+
+async def test_get_item_deleted_after_version_check_is_not_found(monkeypatch):
+    async def get_version(**kwargs):
+        return 1
+
+    async def find_one_or_none(**kwargs):
+        return None
+
+    monkeypatch.setattr(ItemDAO, "get_version", get_version)
+    monkeypatch.setattr(ItemDAO, "find_one_or_none", find_one_or_none)
+    app = FastAPI()
+    app.include_router(main.test_router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/test/items/{uuid4()}")
+    assert response.status_code == 404
+    assert "etag" not in response.headers
@@ -0,0 +1,81 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.core.http_cache import http_cache, make_etag, not_modified
+from app.middlewares.compression import CompressionMiddleware
+from app.middlewares.conditional import ConditionalGetMiddleware
+
+PAYLOAD = {"info": "x" * 5000}
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/body-etag")
+    @http_cache(max_age=10)
+    async def body_etag():
+        return PAYLOAD
+
+    @app.get("/endpoint-etag")
+    @http_cache(max_age=10, private=True)
+    async def endpoint_etag(request: Request, response: Response):
+        etag = make_etag("item", 1)
+        if (cached := not_modified(request, etag)) is not None:
+            return cached
+        response.headers["ETag"] = etag
+        return PAYLOAD
+
+    # Тот же порядок, что и в create_app приложения
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"])
+    return app
+
+
+async def revalidate(path: str, headers: dict) -> tuple[httpx.Response, httpx.Response]:
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        full = await client.get(path, headers=headers)
+        cached = await client.get(path, headers={**headers, "If-None-Match": full.headers["etag"]})
+    return full, cached
+
+
+@pytest.mark.parametrize("path", ["/body-etag", "/endpoint-etag"])
+async def test_not_modified_keeps_vary_and_cache_control(path):
+    full, cached = await revalidate(path, {"Accept-Encoding": "gzip", "Origin": "http://client"})
+    assert full.status_code == 200 and full.headers["content-encoding"] == "gzip"
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["vary"] == full.headers["vary"]
+    assert cached.headers["cache-control"] == full.headers["cache-control"]
+    assert cached.headers["etag"] == full.headers["etag"]
+
+
+async def test_not_modified_without_compression():
+    full, cached = await revalidate("/body-etag", {"Accept-Encoding": "identity"})
+    assert "content-encoding" not in full.headers
+    assert cached.status_code == 304
+    assert cached.headers["cache-control"] == full.headers["cache-control"]
+
+
+@pytest.mark.parametrize("status, headers", [
+    (206, {"Content-Range": "bytes 0-5006/20000"}),
+    (200, {"Content-Range": "bytes 0-5006/5007"}),
+    (500, {}),
+])
+async def test_partial_and_error_responses_are_not_compressed(status, headers):
+    app = FastAPI()
+
+    @app.get("/part")
+    async def part():
+        return JSONResponse(PAYLOAD, status_code=status, headers=headers)
+
+    app.add_middleware(CompressionMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/part", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == status
+    assert "content-encoding" not in response.headers
+    assert response.json() == PAYLOAD
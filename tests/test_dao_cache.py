@@ -0,0 +1,185 @@
+import asyncio
+from uuid import uuid4
+
+import fakeredis
+import pytest
+
+from app.database.data_layer.base_dao import BaseDAO
+from app.database.data_layer.cache import DAOCache
+from app.database.redis import RedisCache
+from app.database.unit_of_work import AFTER_COMMIT_KEY, _current_session
+from app.exceptions.database import QueryFailedError
+from app.models.tests import TestModel as ItemModel
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+def make_cache(server: fakeredis.FakeServer, negative_ttl: int | None = 5) -> DAOCache:
+    redis = RedisCache(client=fakeredis.FakeAsyncRedis(server=server))
+    return DAOCache("items", ttl=60, max_size=10, negative_ttl=negative_ttl, redis=redis)
+
+
+class Loader:
+    def __init__(self, value=None, error: Exception | None = None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+async def test_missing_row_is_cached_across_workers(server):
+    first, second = make_cache(server), make_cache(server)
+    loader = Loader(None)
+    assert await asyncio.gather(first.get("1", loader), second.get("1", loader)) == [None, None]
+    assert await first.get("1", loader) is None
+    assert loader.calls == 1
+
+
+async def test_invalidate_removes_missing_row_marker(server):
+    cache = make_cache(server)
+    assert await cache.get("1", Loader(None)) is None
+    await cache.invalidate(["1"])
+    assert await cache.get("1", Loader({"id": 1})) == {"id": 1}
+
+
+async def test_missing_row_is_not_cached_without_negative_ttl(server):
+    cache = make_cache(server, negative_ttl=None)
+    loader = Loader(None)
+    await cache.get("1", loader)
+    await cache.get("1", loader)
+    assert loader.calls == 2
+
+
+async def test_load_error_is_not_cached(server):
+    cache = make_cache(server)
+    with pytest.raises(QueryFailedError):
+        await cache.get("1", Loader(error=QueryFailedError("boom")))
+    assert await cache.get("1", Loader({"id": 1})) == {"id": 1}
+
+
+async def test_load_finished_after_invalidate_is_not_cached(server):
+    cache = make_cache(server)
+    stale = asyncio.create_task(cache.get("1", Loader({"info": "old"})))
+    await asyncio.sleep(0.01)
+    await cache.invalidate(["1"])
+    assert await stale == {"info": "old"}
+    assert cache.local.get("1") is None
+    assert await cache.redis.redis.exists(cache._redis_key("1")) == 0
+    assert await cache.get("1", Loader({"info": "new"})) == {"info": "new"}
+
+
+async def test_get_after_invalidate_does_not_join_stale_load(server):
+    cache = make_cache(server)
+    stale = asyncio.create_task(cache.get("1", Loader({"info": "old"})))
+    await asyncio.sleep(0.01)
+    await cache.invalidate(["1"])
+    fresh = await cache.get("1", Loader({"info": "new"}))
+    assert fresh == {"info": "new"}
+    assert await stale == {"info": "old"}
+    assert await cache.get("1", Loader({"info": "other"})) == {"info": "new"}
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Сессия unit of work, которая возвращает заданные строки на любой запрос."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.info = {}
+
+    async def execute(self, query):
+        return FakeResult(self.rows)
+
+
+class CachedTestDAO(BaseDAO):
+    model = ItemModel
+    cache_ttl = 60
+
+
+@pytest.fixture
+def invalidated(monkeypatch) -> list[str]:
+    keys = []
+
+    async def invalidate(invalidated_keys):
+        keys.extend(invalidated_keys)
+
+    monkeypatch.setattr(CachedTestDAO._cache, "invalidate", invalidate)
+    return keys
+
+
+async def run_in_uow(session: FakeSession, call):
+    token = _current_session.set(session)
+    try:
+        result = await call()
+    finally:
+        _current_session.reset(token)
+    for callback in session.info.get(AFTER_COMMIT_KEY, []):
+        await callback()
+    return result
+
+
+async def test_update_by_id_invalidates_every_updated_row(invalidated):
+    rows = [ItemModel(test_id=uuid4(), info="a"), ItemModel(test_id=uuid4(), info="a")]
+    result = await run_in_uow(
+        FakeSession(rows), lambda: CachedTestDAO.update_by_id(id_field="info", id_value="a", update_data={"info": "b"})
+    )
+    assert result is rows[0]
+    assert invalidated == [str(row.test_id) for row in rows]
+
+
+async def test_bulk_create_invalidates_created_rows(invalidated):
+    rows = [ItemModel(test_id=uuid4(), info="a")]
+    await run_in_uow(FakeSession(rows), lambda: CachedTestDAO.bulk_create(rows=[{"info": "a"}], returning=True))
+    assert invalidated == [str(rows[0].test_id)]
+
+
+class CopySession(FakeSession):
+    """Сессия с соединением asyncpg, которое читает записи COPY по одной."""
+
+    def __init__(self):
+        super().__init__([])
+        self.records = None
+        self.copied = []
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    @property
+    def driver_connection(self):
+        return self
+
+    async def copy_records_to_table(self, table_name, records, columns, schema_name=None):
+        self.records = records
+        self.copied = [dict(zip(columns, record)) for record in records]
+
+
+async def test_bulk_copy_streams_records_and_invalidates_keys(invalidated):
+    session = CopySession()
+    rows = ({"info": str(i)} for i in range(3))
+    count = await run_in_uow(session, lambda: CachedTestDAO.bulk_copy(rows=rows))
+    assert count == 3
+    assert not isinstance(session.records, list)
+    assert [row["info"] for row in session.copied] == ["0", "1", "2"]
+    assert invalidated == [str(row["test_id"]) for row in session.copied]
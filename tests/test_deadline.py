@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, BackgroundTasks, FastAPI
+
+from app.core.deadline import remaining, request_deadline
+from app.middlewares.deadline import DeadlineMiddleware
+from app.middlewares.routing import RouteMatcher
+
+
+def create_app(default: float | None = None) -> tuple[FastAPI, dict]:
+    events = {}
+    router = APIRouter(prefix="/items")
+
+    @router.get("/limited")
+    @request_deadline(5.0)
+    async def limited():
+        return {"remaining": remaining()}
+
+    @router.get("/slow")
+    @request_deadline(0.05)
+    async def slow():
+        await asyncio.sleep(1)
+
+    @router.get("/background")
+    async def background(tasks: BackgroundTasks):
+        async def job():
+            try:
+                await asyncio.sleep(0.05)
+                events["background"] = "done"
+            except asyncio.CancelledError:
+                events["background"] = "cancelled"
+                raise
+
+        tasks.add_task(job)
+        return {"status": "accepted"}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(DeadlineMiddleware, default=default)
+    return app, events
+
+
+def http_scope(path: str, headers: list[tuple[bytes, bytes]] | None = None) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def call(app, path: str, headers: list[tuple[bytes, bytes]] | None = None) -> tuple[int, dict | None]:
+    """Выполняет запрос как uvicorn: http.disconnect приходит после отправки ответа."""
+    status, body = 0, b""
+    sent = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, body
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                sent.set()
+
+    await asyncio.wait_for(app(http_scope(path, headers), receive, send), 2)
+    return status, json.loads(body) if body else None
+
+
+def test_route_matcher_resolves_included_router():
+    app, _ = create_app()
+    matcher = RouteMatcher(lambda route: getattr(route, "path", None) == "/items/limited")
+    scope = {**http_scope("/items/limited"), "app": app}
+    route = matcher.match(scope)
+    assert route is not None and route.path == "/items/limited"
+    assert matcher.match({**scope, "path": "/items/slow"}) is None
+
+
+async def test_route_deadline_applies_to_included_router():
+    app, _ = create_app()
+    status, body = await call(app, "/items/limited")
+    assert status == 200
+    assert 4.0 < body["remaining"] <= 5.0
+
+
+async def test_header_shortens_route_deadline():
+    app, _ = create_app()
+    _, body = await call(app, "/items/limited", [(b"x-request-timeout", b"1")])
+    assert body["remaining"] <= 1.0
+
+
+async def test_no_deadline_without_route_default_or_header():
+    app, _ = create_app()
+    status, _ = await call(app, "/items/background")
+    assert status == 200
+
+
+async def test_expired_deadline_returns_504():
+    app, _ = create_app()
+    status, _ = await call(app, "/items/slow")
+    assert status == 504
+
+
+async def test_background_task_completes_after_disconnect():
+    app, events = create_app(default=1.0)
+    status, _ = await call(app, "/items/background")
+    assert status == 200
+    assert events["background"] == "done"
+
+
+async def test_background_task_outlives_deadline():
+    app, events = create_app(default=0.02)
+    status, _ = await call(app, "/items/background")
+    assert status == 200
+    assert events["background"] == "done"
+
+
+async def test_disconnect_is_forwarded_to_app():
+    received = []
+
+    async def app(scope, receive, send):
+        received.append(await receive())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        # После ответа приложение ждет отключения клиента, как Request.is_disconnected()
+        received.append(await receive())
+        received.append(await receive())
+
+    middleware = DeadlineMiddleware(app, default=5.0)
+
+    async def asgi(scope, receive, send):
+        await middleware({**scope, "app": FastAPI()}, receive, send)
+
+    status, _ = await call(asgi, "/")
+    assert status == 200
+    assert [message["type"] for message in received] == ["http.request", "http.disconnect", "http.disconnect"]
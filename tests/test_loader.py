@@ -0,0 +1,78 @@
+import asyncio
+from contextvars import ContextVar
+from uuid import uuid4
+
+import pytest
+
+from app.core.deadline import deadline_scope, get_deadline
+from app.database.data_layer.base_dao import BaseDAO
+from app.database.data_layer.loader import BatchLoader
+from app.database.replicas import primary_reads
+from app.exceptions.deadline import DeadlineExceededError
+from app.models.tests import TestModel as ItemModel
+
+request_var: ContextVar[str | None] = ContextVar("request_var", default=None)
+
+
+class ItemDAO(BaseDAO):
+    model = ItemModel
+    batch_loading = True
+
+
+@pytest.fixture(autouse=True)
+def reset_request_var():
+    token = request_var.set(None)
+    yield
+    request_var.reset(token)
+
+
+async def test_batch_does_not_inherit_caller_context():
+    seen = []
+
+    async def load_many(keys):
+        seen.append((request_var.get(), get_deadline()))
+        return {key: key for key in keys}
+
+    loader = BatchLoader(load_many, namespace="items")
+
+    async def caller(name, key):
+        request_var.set(name)
+        with deadline_scope(10):
+            return await loader.load(key)
+
+    assert await asyncio.gather(caller("first", 1), caller("second", 2)) == [1, 2]
+    assert seen == [(None, None)]
+
+
+async def test_waiter_is_bounded_by_its_own_deadline():
+    async def load_many(keys):
+        await asyncio.sleep(0.1)
+        return {key: key for key in keys}
+
+    loader = BatchLoader(load_many, namespace="items")
+
+    async def hurried():
+        with deadline_scope(0.01):
+            return await loader.load(1)
+
+    results = await asyncio.gather(hurried(), loader.load(1), return_exceptions=True)
+    assert isinstance(results[0], DeadlineExceededError)
+    assert results[1] == 1
+
+
+async def test_primary_pinned_read_skips_batch(monkeypatch):
+    calls = []
+
+    async def find_one_or_none(**filter_by):
+        calls.append("direct")
+
+    async def load(self, key):
+        calls.append("batch")
+
+    monkeypatch.setattr(ItemDAO, "_find_one_or_none", find_one_or_none)
+    monkeypatch.setattr(BatchLoader, "load", load)
+    test_id = uuid4()
+    with primary_reads():
+        await ItemDAO.find_one_or_none(test_id=test_id)
+    await ItemDAO.find_one_or_none(test_id=test_id)
+    assert calls == ["direct", "batch"]
@@ -0,0 +1,146 @@
+import pytest
+from pymongo import DeleteOne, IndexModel, InsertOne
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from app.database import mongo
+from app.database.data_layer.mongo_dao import MongoDAO, ensure_all_indexes
+
+AsyncMongoMockClient = pytest.importorskip("mongomock_motor").AsyncMongoMockClient
+
+
+class ItemsDAO(MongoDAO):
+    collection_name = "test-items"
+    bulk_batch_size = 2
+
+
+@pytest.fixture(autouse=True)
+def mongo_client(monkeypatch):
+    monkeypatch.setattr(mongo, "client", None)
+    client = mongo.init_mongo(mongo_client=AsyncMongoMockClient())
+    yield client
+    mongo.close_mongo()
+
+
+@pytest.fixture
+def fail_batch(monkeypatch):
+    """Ошибка MongoDB (не ошибка документа) на батче с номером `number`, начиная с нуля."""
+    def factory(method: str, number: int):
+        collection = ItemsDAO.collection()
+        original = getattr(type(collection), method)
+        calls = []
+
+        async def patched(self, *args, **kwargs):
+            calls.append(args)
+            if len(calls) - 1 == number:
+                raise AutoReconnect("connection lost")
+            return await original(self, *args, **kwargs)
+
+        monkeypatch.setattr(type(collection), method, patched)
+        return calls
+
+    return factory
+
+
+async def seed(*ids):
+    await ItemsDAO.collection().insert_many([{"_id": i} for i in ids])
+
+
+async def stored_ids() -> list:
+    return sorted(document["_id"] for document in await ItemsDAO.find())
+
+
+async def test_insert_many_ordered_stops_at_first_duplicate():
+    await seed(3)
+    ids = await ItemsDAO.insert_many([{"_id": i} for i in range(1, 7)], ordered=True)
+    # Первый батч [1, 2] записан, во втором [3, 4] дубликат первым - остальное не выполняется
+    assert ids == [1, 2]
+    assert await stored_ids() == [1, 2, 3]
+
+
+async def test_insert_many_unordered_skips_only_duplicates():
+    await seed(3, 6)
+    ids = await ItemsDAO.insert_many([{"_id": i} for i in range(1, 8)], ordered=False)
+    assert ids == [1, 2, 4, 5, 7]
+    assert await stored_ids() == [1, 2, 3, 4, 5, 6, 7]
+
+
+async def test_insert_many_returns_ids_written_before_connection_error(fail_batch):
+    fail_batch("insert_many", 1)
+    ids = await ItemsDAO.insert_many([{"_id": i} for i in range(1, 6)])
+    assert ids == [1, 2]
+
+
+async def test_insert_many_returns_none_when_first_batch_fails(fail_batch):
+    fail_batch("insert_many", 0)
+    assert await ItemsDAO.insert_many([{"_id": i} for i in range(1, 6)]) is None
+
+
+async def test_bulk_write_error_indexes_point_to_input_operations():
+    await seed(4, 7)
+    operations = [InsertOne({"_id": i}) for i in range(1, 9)]
+    result = await ItemsDAO.bulk_write(operations, ordered=False)
+    assert [error["index"] for error in result.errors] == [3, 6]
+    assert result.inserted == 6
+    assert result.failed_at is None
+
+
+async def test_bulk_write_ordered_stops_at_failed_batch():
+    await seed(4)
+    operations = [InsertOne({"_id": i}) for i in range(1, 7)]
+    result = await ItemsDAO.bulk_write(operations, ordered=True)
+    assert [error["index"] for error in result.errors] == [3]
+    assert result.inserted == 3
+    assert await stored_ids() == [1, 2, 3, 4]
+
+
+async def test_bulk_write_counts_deletes():
+    await seed(1, 2, 3)
+    result = await ItemsDAO.bulk_write([DeleteOne({"_id": i}) for i in (1, 2, 3)])
+    assert result.deleted == 3
+
+
+async def test_bulk_write_keeps_partial_result_on_connection_error(fail_batch):
+    calls = fail_batch("bulk_write", 2)
+    operations = [InsertOne({"_id": i}) for i in range(1, 9)]
+    result = await ItemsDAO.bulk_write(operations)
+    assert result is not None
+    assert result.inserted == 4
+    assert result.failed_at == 4
+    assert len(calls) == 3
+    assert await stored_ids() == [1, 2, 3, 4]
+
+
+async def test_bulk_write_returns_none_when_first_batch_fails(fail_batch):
+    fail_batch("bulk_write", 0)
+    assert await ItemsDAO.bulk_write([InsertOne({"_id": 1})]) is None
+
+
+async def test_ensure_all_indexes_logs_errors_and_continues(monkeypatch):
+    class IndexedDAO(MongoDAO):
+        collection_name = "test-indexed"
+        indexes = (IndexModel("name"),)
+
+    class BrokenDAO(MongoDAO):
+        collection_name = "test-broken"
+        indexes = (IndexModel("name"),)
+
+    async def fail(cls):
+        raise OperationFailure("index options conflict")
+
+    monkeypatch.setattr(MongoDAO, "registry", {"test-broken": BrokenDAO, "test-indexed": IndexedDAO})
+    monkeypatch.setattr(BrokenDAO, "ensure_indexes", classmethod(fail))
+    await ensure_all_indexes()
+    assert "name_1" in await IndexedDAO.collection().index_information()
+
+
+async def test_ensure_all_indexes_stops_when_mongo_is_down(monkeypatch):
+    calls = []
+
+    async def fail(cls):
+        calls.append(cls)
+        raise AutoReconnect("connection refused")
+
+    monkeypatch.setattr(MongoDAO, "registry", {"a": ItemsDAO, "b": ItemsDAO})
+    monkeypatch.setattr(ItemsDAO, "ensure_indexes", classmethod(fail))
+    await ensure_all_indexes()
+    assert calls == [ItemsDAO]
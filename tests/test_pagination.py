@@ -0,0 +1,89 @@
+import base64
+import json
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+from app.api.v1.test_routers import router
+from app.database.data_layer.pagination import decode_cursor, encode_cursor, keyset_columns
+from app.database.data_layer.test_dao import TestDAO as ItemDAO
+from app.exceptions.database import InvalidCursorError, QueryFailedError
+from app.exceptions.handlers import register_exception_handlers
+from app.models.tests import TestModel as ItemModel
+
+COLUMNS = keyset_columns(ItemModel.__table__, None)
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    test_id = uuid4()
+    assert decode_cursor(encode_cursor(COLUMNS, (test_id,)), COLUMNS) == (test_id,)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor([1, 2]),
+    raw_cursor({"k": ["test_id"]}),
+    raw_cursor({"k": ["test_id"], "v": 1}),
+    raw_cursor({"k": ["test_id"], "v": {"a": 1}}),
+    raw_cursor({"k": ["test_id"], "v": ["not a uuid"]}),
+    raw_cursor({"k": ["info"], "v": ["x"]}),
+])
+def test_crafted_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, COLUMNS)
+
+
+async def test_iter_chunks_raises_when_chunk_fails(monkeypatch):
+    pages = [[ItemModel(test_id=uuid4(), info="a")] * 2, None]
+
+    async def fetch(**kwargs):
+        return pages.pop(0)
+
+    monkeypatch.setattr(ItemDAO, "_fetch_keyset", fetch)
+    chunks = []
+    with pytest.raises(QueryFailedError):
+        async for chunk in ItemDAO.iter_chunks(chunk_size=2):
+            chunks.append(chunk)
+    assert len(chunks) == 1
+
+
+async def test_iter_chunks_stops_on_empty_page(monkeypatch):
+    pages = [[ItemModel(test_id=uuid4(), info="a")] * 2, []]
+
+    async def fetch(**kwargs):
+        return pages.pop(0)
+
+    monkeypatch.setattr(ItemDAO, "_fetch_keyset", fetch)
+    assert len([chunk async for chunk in ItemDAO.iter_chunks(chunk_size=2)]) == 1
+
+
+def test_nullable_order_column_is_rejected():
+    table = Table(
+        "nullable", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String, index=True, nullable=False),
+        Column("note", String, index=True, nullable=True),
+    )
+    assert [column.name for column in keyset_columns(table, "name")] == ["name", "id"]
+    with pytest.raises(ValueError):
+        keyset_columns(table, "note")
+
+
+async def test_keyset_route_reports_failed_query(monkeypatch):
+    async def get_keyset_page(**kwargs):
+        return None
+
+    monkeypatch.setattr(ItemDAO, "get_keyset_page", get_keyset_page)
+    app = FastAPI()
+    app.include_router(router)
+    register_exception_handlers(app)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/test/keyset")
+    assert response.status_code == 503
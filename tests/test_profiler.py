@@ -0,0 +1,97 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.database import postgres
+from app.database.profiler import QueryProfile, QueryProfiler, SlowStatement, explainable
+from app.database.replicas import replica_router
+
+
+class FakeResult:
+    def scalar(self):
+        return [{"Plan": {}}]
+
+
+class FakeConnection:
+    def __init__(self, engine: "FakeEngine"):
+        self.engine = engine
+
+    async def execute(self, query):
+        self.engine.statements.append(str(query))
+
+    async def exec_driver_sql(self, statement, parameters):
+        self.engine.statements.append(statement)
+        return FakeResult()
+
+    async def rollback(self):
+        self.engine.statements.append("ROLLBACK")
+
+
+class FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    @asynccontextmanager
+    async def connect(self):
+        yield FakeConnection(self)
+
+
+class FakeReplica:
+    def __init__(self):
+        self.engine = FakeEngine()
+        self.healthy = True
+
+    def in_use(self) -> int:
+        return 0
+
+
+@pytest.fixture
+def primary(monkeypatch) -> FakeEngine:
+    engine = FakeEngine()
+    monkeypatch.setattr(postgres, "engine", engine)
+    monkeypatch.setattr(replica_router, "replicas", [])
+    return engine
+
+
+async def explain(statement: str) -> QueryProfile:
+    profile = QueryProfile("GET", "/items")
+    profile.slow.append(SlowStatement(statement, (), 1.0, "ItemDAO.find_all"))
+    await QueryProfiler()._explain(profile)
+    return profile
+
+
+@pytest.mark.parametrize("statement", [
+    "SELECT * FROM items WHERE id = $1",
+    "select count(*) from items",
+])
+def test_plain_select_is_explainable(statement):
+    assert explainable(statement)
+
+
+@pytest.mark.parametrize("statement", [
+    "UPDATE items SET info = $1",
+    "SELECT * FROM items WHERE id = $1 FOR UPDATE",
+    "SELECT * FROM items FOR NO KEY UPDATE SKIP LOCKED",
+    "SELECT * FROM items FOR SHARE",
+    "SELECT * FROM items\nfor key share",
+    "SELECT nextval('items_id_seq')",
+    "SELECT pg_advisory_lock(1)",
+    "SELECT pg_notify('items', 'x')",
+])
+def test_locking_and_side_effects_are_not_explainable(statement):
+    assert not explainable(statement)
+
+
+async def test_explain_runs_read_only_on_primary(primary):
+    profile = await explain("SELECT * FROM items")
+    assert profile.slow[0].plan == [{"Plan": {}}]
+    assert primary.statements[0] == "SET TRANSACTION READ ONLY"
+    assert primary.statements[-1] == "ROLLBACK"
+
+
+async def test_explain_prefers_replica(primary, monkeypatch):
+    replica = FakeReplica()
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    await explain("SELECT * FROM items")
+    assert primary.statements == []
+    assert any(statement.startswith("EXPLAIN") for statement in replica.engine.statements)
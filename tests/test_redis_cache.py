@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError, ResponseError
+
+from app.database.redis import RedisCache
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+def make_cache(server: fakeredis.FakeServer) -> RedisCache:
+    return RedisCache(client=fakeredis.FakeAsyncRedis(server=server))
+
+
+class Source:
+    """Источник значений: считает вызовы и выполняется `delay` секунд."""
+
+    def __init__(self, value=None, delay: float = 0.0, error: Exception | None = None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+async def test_value_is_cached(server):
+    cache = make_cache(server)
+    source = Source({"id": 1})
+    assert await cache.get_or_compute("key", source, expire=60) == {"id": 1}
+    assert await cache.get_or_compute("key", source, expire=60) == {"id": 1}
+    assert source.calls == 1
+
+
+async def test_concurrent_misses_compute_once_in_process(server):
+    cache = make_cache(server)
+    source = Source("value", delay=0.05)
+    results = await asyncio.gather(*(cache.get_or_compute("key", source, expire=60) for _ in range(10)))
+    assert results == ["value"] * 10
+    assert source.calls == 1
+
+
+async def test_concurrent_misses_compute_once_across_workers(server):
+    first, second = make_cache(server), make_cache(server)
+    source = Source("value", delay=0.1)
+    results = await asyncio.gather(
+        first.get_or_compute("key", source, expire=60),
+        second.get_or_compute("key", source, expire=60),
+    )
+    assert results == ["value", "value"]
+    assert source.calls == 1
+
+
+async def test_waiter_stops_when_owner_gets_none(server):
+    first, second = make_cache(server), make_cache(server)
+    source = Source(None, delay=0.1)
+    started = time.monotonic()
+    results = await asyncio.gather(
+        first.get_or_compute("key", source, expire=60),
+        second.get_or_compute("key", source, expire=60, lock_timeout=5.0),
+    )
+    assert results == [None, None]
+    assert time.monotonic() - started < 1.0
+
+
+async def test_waiter_stops_when_owner_fails(server):
+    first, second = make_cache(server), make_cache(server)
+    source = Source(error=ValueError("boom"), delay=0.1)
+    started = time.monotonic()
+    results = await asyncio.gather(
+        first.get_or_compute("key", source, expire=60),
+        second.get_or_compute("key", source, expire=60, lock_timeout=5.0),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert time.monotonic() - started < 1.0
+
+
+async def test_negative_result_is_cached_with_negative_expire(server):
+    first, second = make_cache(server), make_cache(server)
+    source = Source(None, delay=0.1)
+    results = await asyncio.gather(
+        first.get_or_compute("key", source, expire=60, negative_expire=5),
+        second.get_or_compute("key", source, expire=60, negative_expire=5),
+    )
+    assert results == [None, None]
+    assert source.calls == 1
+    assert 0 < await first.redis.ttl("key") <= 5
+
+
+async def test_none_is_not_cached_without_negative_expire(server):
+    cache = make_cache(server)
+    source = Source(None)
+    await cache.get_or_compute("key", source, expire=60)
+    await cache.get_or_compute("key", source, expire=60)
+    assert source.calls == 2
+
+
+class BrokenRedis(fakeredis.FakeAsyncRedis):
+    """Redis, каждая команда которого завершается ошибкой соединения."""
+
+    commands = 0
+
+    async def execute_command(self, *args, **options):
+        BrokenRedis.commands += 1
+        raise ConnectionError("Redis is down")
+
+
+async def test_circuit_breaker_skips_redis_after_error(server):
+    cache = RedisCache(client=BrokenRedis(server=server))
+    BrokenRedis.commands = 0
+    source = Source("value")
+    assert await cache.get_or_compute("key", source, expire=60) == "value"
+    assert BrokenRedis.commands == 1
+    assert await cache.get_or_compute("key", source, expire=60) == "value"
+    assert BrokenRedis.commands == 1
+    assert source.calls == 2
+
+    cache._unavailable_until = 0.0
+    assert await cache.get_or_compute("key", source, expire=60) == "value"
+    assert BrokenRedis.commands == 2
+
+
+class NoLuaRedis(fakeredis.FakeAsyncRedis):
+    """Redis, который не выполняет Lua скрипты, как сервер с отключенным EVAL."""
+
+    async def execute_command(self, *args, **options):
+        if args[0].upper() in ("EVAL", "EVALSHA", "SCRIPT LOAD"):
+            raise ResponseError(f"unknown command '{args[0].lower()}'")
+        return await super().execute_command(*args, **options)
+
+
+async def test_lock_is_released_without_lua(server):
+    cache = RedisCache(client=NoLuaRedis(server=server))
+    source = Source("value")
+    assert await cache.get_or_compute("key", source, expire=60) == "value"
+    assert cache._available()
+    assert await cache.redis.exists("lock:key") == 0
+    assert await cache.get_or_compute("key", source, expire=60) == "value"
+    assert source.calls == 1
+
+
+async def test_lock_of_another_owner_is_kept_without_lua(server):
+    cache = RedisCache(client=NoLuaRedis(server=server))
+    cache._lua_unavailable = True
+    await cache.redis.set("lock:key", "other")
+    await cache._release_lock("lock:key", "mine")
+    assert await cache.redis.get("lock:key") == b"other"
@@ -0,0 +1,167 @@
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import unit_of_work as uow
+from app.database.data_layer import base_dao
+from app.database.data_layer.base_dao import BaseDAO
+from app.database.replicas import _read_from_primary, primary_reads, replica_router
+from app.models.tests import TestModel as ItemModel
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeSession:
+    """Сессия, которая запоминает свой сервер и возвращает заданные строки на любой запрос."""
+
+    def __init__(self, server: "Server"):
+        self.server = server
+        self.info = {}
+
+    async def connection(self):
+        if self.server.error is not None:
+            raise self.server.error
+
+    async def execute(self, query):
+        self.server.queries.append(query)
+        return FakeResult(self.server.rows)
+
+    async def commit(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class Server:
+    """Фабрика сессий одного сервера: основного или реплики."""
+
+    def __init__(self, name: str, rows=None):
+        self.name = name
+        self.rows = rows or []
+        self.queries = []
+        self.error: Exception | None = None
+
+    def __call__(self) -> FakeSession:
+        return FakeSession(self)
+
+
+class FakeReplica:
+    def __init__(self, name: str):
+        self.name = name
+        self.session_maker = Server(name)
+        self.healthy = True
+
+    def in_use(self) -> int:
+        return 0
+
+
+class ItemDAO(BaseDAO):
+    model = ItemModel
+
+
+@pytest.fixture
+def primary(monkeypatch) -> Server:
+    server = Server("primary", rows=[ItemModel(test_id=uuid4(), info="a")])
+    monkeypatch.setattr(base_dao, "async_session_maker", server)
+    monkeypatch.setattr(uow, "async_session_maker", server)
+    return server
+
+
+@pytest.fixture
+def replica(monkeypatch) -> FakeReplica:
+    replica = FakeReplica("replica")
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    # Закрепление чтений не должно переходить из одного теста в другой
+    token = _read_from_primary.set(False)
+    yield replica
+    _read_from_primary.reset(token)
+
+
+async def test_read_goes_to_replica(primary, replica):
+    await ItemDAO.find_all(info="a")
+    assert len(replica.session_maker.queries) == 1
+    assert primary.queries == []
+
+
+async def test_write_goes_to_primary_and_pins_later_reads(primary, replica):
+    assert await ItemDAO.create(info="a") is not None
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 2
+    assert replica.session_maker.queries == []
+
+
+async def test_unit_of_work_reads_and_writes_on_primary(primary, replica):
+    async with uow.unit_of_work():
+        await ItemDAO.find_all(info="a")
+        await ItemDAO.create(info="b")
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 3
+    assert replica.session_maker.queries == []
+
+
+async def test_current_or_new_session_uses_replica_only_for_reads(primary, replica):
+    async with uow.current_or_new_session(read_only=True) as session:
+        assert session.server is replica.session_maker
+    async with uow.current_or_new_session() as session:
+        assert session.server is primary
+
+
+async def test_current_or_new_session_reuses_unit_of_work_session(primary, replica):
+    async with uow.unit_of_work() as outer:
+        async with uow.current_or_new_session(read_only=True) as session:
+            assert session is outer
+            assert session.server is primary
+
+
+async def test_primary_reads_block_reads_from_primary(primary, replica):
+    with primary_reads():
+        await ItemDAO.find_all(info="a")
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 1
+    assert len(replica.session_maker.queries) == 1
+
+
+async def test_unreachable_replica_is_ejected_and_read_falls_back(primary, replica):
+    replica.session_maker.error = OSError("connection refused")
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 1
+    assert not replica.healthy
+
+
+async def test_busy_replica_pool_falls_back_without_ejecting(primary, replica):
+    replica.session_maker.error = PoolTimeoutError("pool is full")
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 1
+    assert replica.healthy
+
+
+async def test_unhealthy_replica_is_skipped(primary, replica):
+    replica.healthy = False
+    await ItemDAO.find_all(info="a")
+    assert len(primary.queries) == 1
+    assert replica.session_maker.queries == []
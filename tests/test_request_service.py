@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.exceptions.services import ExternalServiceError
+from app.services.request_service import RequestService
+
+
+class Upstream:
+    """Локальный HTTP сервер: запоминает запросы и адреса клиентских соединений."""
+
+    def __init__(self):
+        self.hits: dict[str, int] = {}
+        self.peers: set = set()
+        self.failures = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/flaky", self.flaky)
+        app.router.add_get("/slow", self.slow)
+        app.router.add_get("/ok", self.ok)
+        app.router.add_get("/etag", self.etag)
+        app.router.add_get("/whoami", self.whoami)
+        app.router.add_get("/language", self.language)
+        app.router.add_get("/private", self.private)
+        return app
+
+    def hit(self, request: web.Request) -> None:
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+
+    async def flaky(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        if self.hits[request.path] <= self.failures:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        return web.json_response({"status": "ok"})
+
+    async def slow(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    async def ok(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        return web.Response(text="ok")
+
+    async def etag(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text="body", headers={"ETag": '"v1"'})
+
+    async def whoami(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        return web.Response(text=request.headers.get("Authorization", "anonymous"))
+
+    async def language(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        return web.Response(text=request.headers.get("Accept-Language", "en"), headers={"Vary": "Accept-Language"})
+
+    async def private(self, request: web.Request) -> web.Response:
+        self.hit(request)
+        return web.Response(text="mine", headers={"Cache-Control": "private, max-age=60"})
+
+
+@pytest.fixture
+async def upstream():
+    upstream = Upstream()
+    server = TestServer(upstream.app())
+    await server.start_server()
+    upstream.url = str(server.make_url("")).rstrip("/")
+    yield upstream
+    await server.close()
+
+
+@pytest.fixture
+async def service():
+    service = RequestService(max_retries=2, backoff=0.01, backoff_max=0.05, timeout=5.0)
+    yield service
+    await service.close()
+
+
+async def test_idempotent_request_is_retried(upstream, service):
+    upstream.failures = 2
+    response = await service.get(f"{upstream.url}/flaky")
+    assert response.status == 200
+    assert response.json() == {"status": "ok"}
+    assert upstream.hits["/flaky"] == 3
+
+
+async def test_retries_are_limited(upstream, service):
+    upstream.failures = 10
+    response = await service.get(f"{upstream.url}/flaky")
+    assert response.status == 503
+    assert upstream.hits["/flaky"] == 3
+
+
+async def test_post_is_not_retried(upstream, service):
+    upstream.failures = 1
+    response = await service.post(f"{upstream.url}/flaky", json={"a": 1})
+    assert response.status == 503
+    assert upstream.hits["/flaky"] == 1
+
+
+async def test_timeout_is_retried_and_raised(upstream, service):
+    with pytest.raises(ExternalServiceError):
+        await service.get(f"{upstream.url}/slow", timeout=0.1, retries=1)
+    assert upstream.hits["/slow"] == 2
+
+
+async def test_connection_error_is_raised(service):
+    with pytest.raises(ExternalServiceError):
+        await service.get("http://127.0.0.1:1/unreachable", retries=0)
+
+
+async def test_session_and_connection_are_reused(upstream, service):
+    session = service.session
+    for _ in range(5):
+        assert (await service.get(f"{upstream.url}/ok")).text() == "ok"
+    assert service.session is session
+    assert upstream.hits["/ok"] == 5
+    assert len(upstream.peers) == 1
+
+
+async def test_stale_response_is_revalidated(upstream, service):
+    first = await service.get(f"{upstream.url}/etag", cache_ttl=0.01)
+    cached = await service.get(f"{upstream.url}/etag", cache_ttl=0.01)
+    await asyncio.sleep(0.02)
+    revalidated = await service.get(f"{upstream.url}/etag", cache_ttl=0.01)
+    assert first.body == cached.body == revalidated.body == b"body"
+    assert cached.from_cache and revalidated.from_cache
+    assert upstream.hits["/etag"] == 2
+
+
+async def test_requests_with_credentials_are_not_cached(upstream, service):
+    alice = await service.get(f"{upstream.url}/whoami", headers={"Authorization": "alice"}, cache_ttl=60)
+    bob = await service.get(f"{upstream.url}/whoami", headers={"Authorization": "bob"}, cache_ttl=60)
+    anonymous = await service.get(f"{upstream.url}/whoami", cache_ttl=60)
+    assert [alice.text(), bob.text(), anonymous.text()] == ["alice", "bob", "anonymous"]
+    assert upstream.hits["/whoami"] == 3
+
+
+async def test_cached_response_honours_vary(upstream, service):
+    english = await service.get(f"{upstream.url}/language", headers={"Accept-Language": "en"}, cache_ttl=60)
+    german = await service.get(f"{upstream.url}/language", headers={"Accept-Language": "de"}, cache_ttl=60)
+    cached = await service.get(f"{upstream.url}/language", headers={"Accept-Language": "de"}, cache_ttl=60)
+    assert [english.text(), german.text(), cached.text()] == ["en", "de", "de"]
+    assert cached.from_cache
+    assert upstream.hits["/language"] == 2
+
+
+async def test_private_response_is_not_cached(upstream, service):
+    await service.get(f"{upstream.url}/private", cache_ttl=60)
+    await service.get(f"{upstream.url}/private", cache_ttl=60)
+    assert upstream.hits["/private"] == 2
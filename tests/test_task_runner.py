@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from app.exceptions.tasks import TaskQueueFullError, UnknownTaskError
+from app.tasks.runner import TaskRunner
+from app.tasks.write_behind import WriteBehindBuffer
+
+
+class FakeDAO:
+    """DAO, который записывает пачки в память и может падать заданное число раз."""
+    batches: list[list[dict]] = []
+    failures = 0
+
+    @classmethod
+    async def bulk_create(cls, rows, batch_size=None):
+        if cls.failures:
+            cls.failures -= 1
+            return None
+        cls.batches.append(list(rows))
+        return len(rows)
+
+
+@pytest.fixture
+def dao():
+    FakeDAO.batches = []
+    FakeDAO.failures = 0
+    return FakeDAO
+
+
+@pytest.fixture
+def buffers():
+    created = []
+
+    def factory(**kwargs) -> WriteBehindBuffer:
+        buffer = WriteBehindBuffer(FakeDAO, **{"backoff": 0.001, **kwargs})
+        created.append(buffer)
+        return buffer
+
+    yield factory
+    for buffer in created:
+        WriteBehindBuffer.registry.remove(buffer)
+
+
+def create_runner(**kwargs) -> tuple[TaskRunner, list]:
+    runner = TaskRunner(**{"workers": 2, "backoff": 0.001, "backoff_max": 0.01, **kwargs})
+    calls = []
+
+    @runner.task("record")
+    async def record(value):
+        calls.append(value)
+
+    @runner.task("flaky", max_retries=2)
+    async def flaky(value, fail_times):
+        calls.append(value)
+        if calls.count(value) <= fail_times:
+            raise RuntimeError("temporary failure")
+
+    return runner, calls
+
+
+async def test_runner_executes_submitted_jobs():
+    runner, calls = create_runner()
+    await runner.start()
+    await runner.submit("record", 1)
+    await runner.submit(runner.tasks["record"].func, 2)
+    await runner.stop(timeout=1)
+    assert sorted(calls) == [1, 2]
+
+
+async def test_runner_rejects_unknown_task():
+    runner, _ = create_runner()
+    with pytest.raises(UnknownTaskError):
+        await runner.submit("missing")
+
+
+async def test_runner_retries_failed_job_until_success():
+    runner, calls = create_runner()
+    await runner.start()
+    await runner.submit("flaky", "a", fail_times=2)
+    await runner.stop(timeout=1)
+    assert calls == ["a", "a", "a"]
+
+
+async def test_runner_gives_up_after_max_retries():
+    runner, calls = create_runner()
+    await runner.start()
+    await runner.submit("flaky", "a", fail_times=10)
+    await runner.stop(timeout=1)
+    assert calls == ["a", "a", "a"]
+
+
+async def test_submit_rejects_when_queue_is_full():
+    runner, _ = create_runner(queue_size=1, submit_timeout=0.01)
+    await runner.submit("record", 1)
+    with pytest.raises(TaskQueueFullError):
+        await runner.submit("record", 2)
+
+
+async def test_stop_drains_jobs_queued_before_start():
+    runner, calls = create_runner()
+    for value in range(5):
+        await runner.submit("record", value)
+    await runner.start()
+    await runner.stop(timeout=1)
+    assert sorted(calls) == list(range(5))
+    assert runner._workers == []
+
+
+async def test_stop_cancels_jobs_not_drained_in_time():
+    runner, calls = create_runner(workers=1)
+    cancelled = asyncio.Event()
+
+    @runner.task("hang")
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    await runner.start()
+    await runner.submit("hang")
+    await runner.submit("record", 1)
+    await runner.stop(timeout=0.05)
+    assert cancelled.is_set()
+    assert calls == []
+    assert runner._workers == []
+
+
+async def test_jobs_do_not_share_context():
+    runner, _ = create_runner(workers=1)
+    var = contextvars.ContextVar("var", default=None)
+    seen = []
+
+    @runner.task("context")
+    async def context(value):
+        seen.append(var.get())
+        var.set(value)
+
+    var.set("request")
+    await runner.start()
+    await runner.submit("context", 1)
+    await runner.submit("context", 2)
+    await runner.stop(timeout=1)
+    assert seen == [None, None]
+
+
+async def test_buffer_flushes_full_batch_without_waiting(dao, buffers):
+    buffer = buffers(batch_size=3, flush_interval=10)
+    for i in range(3):
+        await buffer.add(info=str(i))
+    await asyncio.sleep(0.01)
+    assert dao.batches == [[{"info": "0"}, {"info": "1"}, {"info": "2"}]]
+    await buffer.stop(timeout=1)
+
+
+async def test_buffer_flushes_partial_batch_after_interval(dao, buffers):
+    buffer = buffers(batch_size=100, flush_interval=0.02)
+    await buffer.add(info="a")
+    await buffer.add(info="b")
+    assert dao.batches == []
+    await asyncio.sleep(0.1)
+    assert dao.batches == [[{"info": "a"}, {"info": "b"}]]
+    await buffer.stop(timeout=1)
+
+
+async def test_buffer_stop_writes_remaining_rows_in_batches(dao, buffers):
+    buffer = buffers(batch_size=2, flush_interval=10)
+    buffer._rows = [{"info": str(i)} for i in range(5)]
+    buffer._has_rows.set()
+    await buffer.stop(timeout=1)
+    assert [len(batch) for batch in dao.batches] == [2, 2, 1]
+
+
+async def test_buffer_retries_failed_batch(dao, buffers):
+    dao.failures = 2
+    buffer = buffers(batch_size=1, flush_interval=10, max_retries=2)
+    await buffer.add(info="a")
+    await buffer.stop(timeout=1)
+    assert dao.batches == [[{"info": "a"}]]
+
+
+async def test_buffer_drops_batch_after_max_retries(dao, buffers):
+    dao.failures = 10
+    buffer = buffers(batch_size=1, flush_interval=10, max_retries=1)
+    await buffer.add(info="a")
+    await buffer.stop(timeout=1)
+    assert dao.batches == []
+    assert dao.failures == 8
+
+
+async def test_buffer_add_waits_for_space(dao, buffers):
+    buffer = buffers(batch_size=10, flush_interval=0.05, max_pending=2)
+    await buffer.add(info="a")
+    await buffer.add(info="b")
+    blocked = asyncio.create_task(buffer.add(info="c"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    await asyncio.wait_for(blocked, 1)
+    assert dao.batches[0] == [{"info": "a"}, {"info": "b"}]
+    await buffer.stop(timeout=1)
+    assert dao.batches[-1] == [{"info": "c"}]
+
+
+async def test_buffer_keeps_flushing_after_unexpected_error(dao, buffers, monkeypatch):
+    original = FakeDAO.bulk_create.__func__
+    calls = 0
+
+    async def bulk_create(cls, rows, batch_size=None):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise TypeError("cannot serialize row")
+        return await original(cls, rows, batch_size)
+
+    monkeypatch.setattr(FakeDAO, "bulk_create", classmethod(bulk_create))
+    buffer = buffers(batch_size=1, flush_interval=10)
+    await buffer.add(info="broken")
+    await asyncio.sleep(0.01)
+    await buffer.add(info="ok")
+    await asyncio.sleep(0.01)
+    assert dao.batches == [[{"info": "ok"}]]
+    assert not buffer._task.done()
+    await buffer.stop(timeout=1)